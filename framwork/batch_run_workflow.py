@@ -2,6 +2,8 @@ import argparse
 import asyncio
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
 
@@ -15,17 +17,18 @@ def log(message):
     """A simple logger for printing timestamped messages to console."""
     print(f"[{datetime.now().isoformat()}] {message}")
 
-async def run_workflow(semaphore, user_input, log_dir, swe_model=None):
+def make_log_file(log_dir, user_input):
+    """Create a unique log file path for a workflow run to avoid conflicts."""
+    input_slug = "".join(filter(str.isalnum, user_input))[:50]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return log_dir / f"run_{timestamp}_{input_slug}.log"
+
+async def run_workflow(semaphore, run_id, user_input, log_dir, swe_model=None, timeout=None, resume=False):
     """
-    Run a single workflow instance for a given user input.
+    Run a single workflow instance for a given user input in its own Python subprocess.
     """
-    log(f"⚠️ Batch generation mode can only use --non-interactive, meaning code cannot be adjusted in real-time. For functions involving sensitive information or path information, it's recommended to run run_langgraph_workflow.py.")
     async with semaphore:
-        # Create a unique name for the log file to avoid conflicts
-        input_slug = "".join(filter(str.isalnum, user_input))[:50]
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-        log_file_name = f"run_{timestamp}_{input_slug}.log"
-        log_file = log_dir / log_file_name
+        log_file = make_log_file(log_dir, user_input)
         
         model_info = f"Using model: '{swe_model}'" if swe_model else "Using default model"
         log(f"Starting workflow, {model_info}, input: '{user_input[:40]}...'. Log file: {log_file.name}")
@@ -39,6 +42,9 @@ async def run_workflow(semaphore, user_input, log_dir, swe_model=None):
         if swe_model:
             command.extend(["--swe-model", swe_model])
         
+        # The child resumes the run from its checkpoint, or starts it if it has none yet
+        command.extend(["--resume" if resume else "--run-id", run_id])
+        
         command.extend([
             "--user-input",
             user_input,
@@ -53,14 +59,93 @@ async def run_workflow(semaphore, user_input, log_dir, swe_model=None):
                 stderr=asyncio.subprocess.STDOUT
             )
 
-        await process.wait()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            log(f"⏱️ Timeout: Workflow '{user_input[:40]}...' exceeded {timeout}s and was killed. See log for details: {log_file}")
+            return "timeout"
 
         if process.returncode == 0:
             log(f"✅ Success: Workflow '{user_input[:40]}...' completed.")
-        else:
-            log(f"❌ Failed: Workflow '{user_input[:40]}...' failed. See log for details: {log_file}")
-        
-        return process.returncode
+            return "success"
+        log(f"❌ Failed: Workflow '{user_input[:40]}...' failed. See log for details: {log_file}")
+        return "failed"
+
+def report_run_result(result):
+    """Print the outcome of an in-process or worker-pool run."""
+    short_input = result["user_input"][:40]
+    if result["status"] == "success":
+        log(f"✅ Success: Workflow '{short_input}...' completed.")
+    elif result["status"] == "timeout":
+        log(f"⏱️ Timeout: Workflow '{short_input}...' was cancelled. See log for details: {result['log_file']}")
+    else:
+        log(f"❌ Failed: Workflow '{short_input}...' failed ({result['error']}). See log for details: {result['log_file']}")
+
+async def run_workflow_in_process(semaphore, app, run_id, user_input, log_dir, swe_model=None, timeout=None, resume=False):
+    """
+    Run a single workflow instance as a task of this process, sharing the compiled graph with the other tasks.
+    """
+    from framwork.mcp_swe_flow.runner import run_workflow_task
+
+    async with semaphore:
+        log_file = make_log_file(log_dir, user_input)
+        log(f"Starting workflow [{run_id}], input: '{user_input[:40]}...'. Log file: {log_file.name}")
+        result = await run_workflow_task(app, run_id, user_input, log_file, swe_model=swe_model, timeout=timeout, resume=resume)
+        report_run_result(result)
+        return result["status"]
+
+class WorkerPool:
+    """
+    A small pool of long-lived worker processes, each with the workflow compiled once.
+    A crashing worker only breaks the pool for the runs that were in flight; the pool
+    is rebuilt and those runs are retried once.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = asyncio.Lock()
+
+    async def _get_executor(self, broken=None):
+        async with self._lock:
+            if self._executor is None or self._executor is broken:
+                if broken is not None:
+                    log("⚠️ A worker process crashed, restarting the worker pool.")
+                    broken.shutdown(wait=False, cancel_futures=True)
+                from framwork.mcp_swe_flow.runner import init_worker_process
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker_process)
+            return self._executor
+
+    async def run(self, *args, retries=1):
+        from framwork.mcp_swe_flow.runner import run_workflow_in_worker
+
+        executor = await self._get_executor()
+        for attempt in range(retries + 1):
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, run_workflow_in_worker, *args)
+            except BrokenProcessPool:
+                if attempt == retries:
+                    raise
+                executor = await self._get_executor(broken=executor)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+async def run_workflow_in_worker_pool(semaphore, pool, run_id, user_input, log_dir, swe_model=None, timeout=None, resume=False):
+    """
+    Run a single workflow instance in one of the long-lived worker processes.
+    """
+    async with semaphore:
+        log_file = make_log_file(log_dir, user_input)
+        log(f"Starting workflow [{run_id}] in worker pool, input: '{user_input[:40]}...'. Log file: {log_file.name}")
+        try:
+            result = await pool.run(run_id, user_input, str(log_file), swe_model, timeout, resume)
+        except BrokenProcessPool as e:
+            result = {"user_input": user_input, "status": "failed", "error": f"worker process crashed: {e}", "log_file": str(log_file)}
+        report_run_result(result)
+        return result["status"]
 
 async def main():
     parser = argparse.ArgumentParser(
@@ -90,6 +175,29 @@ async def main():
         default=None,
         help="Specify model for SWE-Agent (e.g., 'deepseek-r1-0528')."
     )
+    parser.add_argument(
+        "--engine",
+        choices=["subprocess", "in-process", "worker-pool"],
+        default="subprocess",
+        help="How workflows are executed (default: subprocess).\n"
+             "  subprocess:  one Python process per input\n"
+             "  in-process:  concurrent tasks sharing one compiled workflow in this process\n"
+             "  worker-pool: --parallel-runs long-lived worker processes, isolating crashes"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Per-workflow timeout in seconds (default: no timeout)."
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        metavar="BATCH_ID",
+        help="Resume a previous batch: completed runs are skipped, failed or interrupted\n"
+             "runs restart from their last completed node. Use the same --input-file."
+    )
     
     args = parser.parse_args()
 
@@ -115,19 +223,56 @@ async def main():
     if args.swe_model:
         log(f"Will use SWE Agent model for all workflows: {args.swe_model}")
     
+    log(f"⚠️ Batch generation mode can only use --non-interactive, meaning code cannot be adjusted in real-time. For functions involving sensitive information or path information, it's recommended to run run_langgraph_workflow.py.")
+    log(f"Execution engine: {args.engine}")
+    
     semaphore = asyncio.Semaphore(args.parallel_runs)
-    tasks = [run_workflow(semaphore, user_input, log_dir, args.swe_model) for user_input in user_inputs]
+    resume = args.resume is not None
+    batch_id = args.resume or datetime.now().strftime('%Y%m%d%H%M%S')
+    run_ids = [f"{batch_id}-{idx}" for idx in range(len(user_inputs))]
+    log(f"Batch ID: {batch_id} (resume with --resume {batch_id})")
     
     log("\n--- Starting batch processing ---")
-    results = await asyncio.gather(*tasks)
+    if args.engine == "in-process":
+        from framwork.mcp_swe_flow.graph import create_mcp_swe_workflow
+        from framwork.mcp_swe_flow.checkpointing import open_checkpointer
+        from framwork.mcp_swe_flow.config import aclose_llm_clients
+
+        try:
+            async with open_checkpointer() as checkpointer:
+                # Compiled once and shared by every task of this batch
+                app = create_mcp_swe_workflow(checkpointer=checkpointer)
+                results = await asyncio.gather(*[
+                    run_workflow_in_process(semaphore, app, run_id, user_input, log_dir, args.swe_model, args.timeout, resume)
+                    for run_id, user_input in zip(run_ids, user_inputs)
+                ])
+        finally:
+            # Tasks share one pooled HTTP client per provider, close it once at the end
+            await aclose_llm_clients()
+    elif args.engine == "worker-pool":
+        pool = WorkerPool(args.parallel_runs)
+        try:
+            results = await asyncio.gather(*[
+                run_workflow_in_worker_pool(semaphore, pool, run_id, user_input, log_dir, args.swe_model, args.timeout, resume)
+                for run_id, user_input in zip(run_ids, user_inputs)
+            ])
+        finally:
+            pool.shutdown()
+    else:
+        results = await asyncio.gather(*[
+            run_workflow(semaphore, run_id, user_input, log_dir, args.swe_model, args.timeout, resume)
+            for run_id, user_input in zip(run_ids, user_inputs)
+        ])
 
-    successful_runs = sum(1 for r in results if r == 0)
-    failed_runs = len(results) - successful_runs
+    successful_runs = sum(1 for r in results if r == "success")
+    timed_out_runs = sum(1 for r in results if r == "timeout")
+    failed_runs = len(results) - successful_runs - timed_out_runs
 
     log("\n--- Batch processing completed ---")
     log(f"Total workflows executed: {len(results)}")
     log(f"  - Successful: {successful_runs}")
     log(f"  - Failed: {failed_runs}")
+    log(f"  - Timed out: {timed_out_runs}")
     log(f"Logs stored at: {log_dir.resolve()}")
     log("--------------------")
 
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Ensure the working directory is the project root
+# and load environment variables from .env file
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+load_dotenv()
+
+from framwork.mcp_swe_flow.utils.exemplar_index import (
+    DEFAULT_EXEMPLAR_INDEX_PATH, ExemplarIndex, build_exemplar_index, save_exemplar_index
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the exemplar index of public and pipeline-generated MCP servers used by the planner.")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.getenv("EXEMPLAR_INDEX_PATH", str(DEFAULT_EXEMPLAR_INDEX_PATH)),
+        help="Path of the index file (default: EXEMPLAR_INDEX_PATH or logs/exemplar_index/exemplar_index.json)"
+    )
+    parser.add_argument(
+        "--query",
+        type=str,
+        default=None,
+        help="Print the exemplars a planning request would get, e.g. --query \"MongoDB CRUD server\""
+    )
+    args = parser.parse_args()
+
+    start = time.time()
+    payload = build_exemplar_index(project_root)
+    output = Path(args.output)
+    save_exemplar_index(payload, output)
+    records = payload["records"]
+    scored = sum(1 for r in records if r["score"] is not None)
+    print(f"Indexed {len(records)} servers ({scored} with a score) in {time.time() - start:.1f}s -> {output}")
+
+    if args.query:
+        for exemplar in ExemplarIndex(records).search(args.query):
+            print(f"  {exemplar['id']}: score={exemplar['score']} ({exemplar['score_source']}), relevance={exemplar['relevance']}, libraries={exemplar['imports']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
+import atexit
+import queue
 import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 import json
 from loguru import logger as _logger
 from pathlib import Path
 import threading
-from typing import Dict, Tuple
+from typing import IO, Any, Dict, List, Optional, Tuple
 import os
 
+from framwork.metrics import get_run_metrics, drop_run_metrics
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard json module
+    orjson = None
+
 
 PROJECT_ROOT = Path(__file__).parent.parent # Adjust based on actual execution context
 
@@ -38,6 +50,160 @@ def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None
 
 logger = define_log_level()
 
+# ========== Buffered JSONL Writer ==========
+# Agent events are handed to a background thread that batches them per file, instead of
+# opening the file on the caller's thread for every event.
+# - AGENT_LOG_BUFFERED: set to false to write synchronously (default: true)
+# - AGENT_LOG_QUEUE_SIZE: maximum pending events, callers block when it is full (default: 10000)
+# - AGENT_LOG_FLUSH_INTERVAL: seconds between periodic flushes (default: 0.5)
+# - AGENT_LOG_FLUSH_BYTES: pending bytes that trigger an immediate flush (default: 256 KiB)
+AGENT_LOG_BUFFERED = os.getenv("AGENT_LOG_BUFFERED", "true").lower() == "true"
+# Events written and fsync'ed immediately, so a crash never loses a node boundary
+_SYNC_EVENTS = {"start_node", "end_node"}
+
+_OP_WRITE, _OP_FLUSH, _OP_CLOSE, _OP_STOP = range(4)
+
+
+def _dumps_line(entry: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which json handles
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class BufferedJsonlWriter:
+    """Single background thread appending queued lines to their files."""
+
+    def __init__(self, max_queue: int = 10000, flush_interval: float = 0.5, flush_bytes: int = 256 * 1024):
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="agent-jsonl-writer", daemon=True)
+                self._thread.start()
+
+    def write(self, path: Path, data: bytes, sync: bool = False):
+        self._ensure_started()
+        self._queue.put((_OP_WRITE, path, data, sync))
+
+    def flush(self, path: Optional[Path] = None, timeout: Optional[float] = 10.0):
+        """Blocks until everything queued so far (for path, or all files) is on disk."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((_OP_FLUSH, path, done, False))
+        done.wait(timeout)
+
+    def close_file(self, path: Path):
+        """Flushes and closes the handle kept open for path."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put((_OP_CLOSE, path, None, False))
+
+    def shutdown(self, timeout: Optional[float] = 10.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put((_OP_STOP, None, None, False))
+        self._thread.join(timeout)
+
+    def _run(self):
+        files: Dict[Path, IO[bytes]] = {}
+        buffers: Dict[Path, List[bytes]] = {}
+        pending_bytes = 0
+        last_flush = time.monotonic()
+
+        def write_out(path: Path, fsync: bool = False):
+            nonlocal pending_bytes
+            lines = buffers.pop(path, None)
+            if not lines and not fsync:
+                return
+            try:
+                handle = files.get(path)
+                if handle is None:
+                    handle = files[path] = open(path, "ab")
+                if lines:
+                    data = b"".join(lines)
+                    pending_bytes -= len(data)
+                    handle.write(data)
+                handle.flush()
+                if fsync:
+                    os.fsync(handle.fileno())
+            except OSError as e:
+                _logger.warning(f"Failed to write agent log {path}: {e}")
+
+        def write_out_all():
+            for path in list(buffers):
+                write_out(path)
+
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                op, path, payload, sync = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                op = None
+
+            if op == _OP_WRITE:
+                buffers.setdefault(path, []).append(payload)
+                pending_bytes += len(payload)
+                if sync:
+                    write_out(path, fsync=True)
+            elif op == _OP_FLUSH:
+                if path is None:
+                    write_out_all()
+                else:
+                    write_out(path)
+                payload.set()
+            elif op == _OP_CLOSE:
+                write_out(path)
+                handle = files.pop(path, None)
+                if handle is not None:
+                    handle.close()
+            elif op == _OP_STOP:
+                write_out_all()
+                for handle in files.values():
+                    handle.close()
+                files.clear()
+                return
+
+            if pending_bytes >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval:
+                write_out_all()
+                last_flush = time.monotonic()
+
+
+def _create_writer() -> BufferedJsonlWriter:
+    return BufferedJsonlWriter(
+        max_queue=int(os.getenv("AGENT_LOG_QUEUE_SIZE", 10000)),
+        flush_interval=float(os.getenv("AGENT_LOG_FLUSH_INTERVAL", 0.5)),
+        flush_bytes=int(os.getenv("AGENT_LOG_FLUSH_BYTES", 256 * 1024)),
+    )
+
+
+_jsonl_writer = _create_writer()
+
+
+def _reset_writer_after_fork():
+    # The writer thread does not survive fork(), a forked worker starts its own
+    global _jsonl_writer
+    _jsonl_writer = _create_writer()
+
+
+def flush_agent_logs(timeout: Optional[float] = 10.0):
+    """Blocks until all buffered agent events are written."""
+    _jsonl_writer.flush(timeout=timeout)
+
+
+atexit.register(lambda: _jsonl_writer.shutdown())
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_writer_after_fork)
+
 # ========== Structured Logging System ==========
 class AgentJsonlLogger:
     """
@@ -46,14 +212,16 @@ class AgentJsonlLogger:
         agent_logger = get_agent_logger("SWE-Agent")
         agent_logger.log(event_type="tool_call", tool="save_file", input=..., output=...)
     """
-    def __init__(self, agent_name: str, log_dir: Path = None):
+    def __init__(self, agent_name: str, log_dir: Path = None, run_id: Optional[str] = None):
         self.agent_name = agent_name
+        self.run_id = run_id
         self.log_dir = log_dir or (PROJECT_ROOT / "logs/agent_logs")
         self.log_dir.mkdir(parents=True, exist_ok=True)
         # Fix timestamp format to avoid illegal Windows filename characters
         now = datetime.now()
         timestamp = now.strftime("%Y%m%dT%H%M%S")[:-3] + "Z"  # Precise to milliseconds
-        self.log_path = self.log_dir / f"{agent_name}-{timestamp}.jsonl"
+        run_suffix = f"-{run_id}" if run_id else ""
+        self.log_path = self.log_dir / f"{agent_name}{run_suffix}-{timestamp}.jsonl"
         # Initialize token counter
         self.token_counter = {
             "prompt_tokens": 0,
@@ -62,6 +230,45 @@ class AgentJsonlLogger:
             "calls": 0
         }
         self._lock = threading.Lock()
+        # In-memory aggregates, so readers never have to re-parse the jsonl file
+        self.metrics = get_run_metrics(run_id)
+        self._pending_calls: Dict[str, float] = {}
+        self._usage_totals = {"total_tokens": 0, "total_cost": 0.0}
+
+    def _record_metrics(self, event_type: str, fields: Dict[str, Any]):
+        """Feeds the run metrics registry from the events the agents already log."""
+        call_id = fields.get("call_id")
+        if event_type in ("llm_invoke", "tool_call"):
+            if call_id:
+                self._pending_calls[call_id] = time.monotonic()
+            if event_type == "tool_call":
+                self.metrics.record_tool_call(fields.get("tool", "unknown_tool"))
+        elif event_type == "llm_response":
+            started_at = self._pending_calls.pop(call_id, None)
+            metadata = fields.get("usage_metadata") or {}
+            self.metrics.record_llm_call(
+                agent=self.agent_name,
+                model=metadata.get("model", "unknown"),
+                prompt_tokens=metadata.get("input_tokens") or 0,
+                completion_tokens=metadata.get("output_tokens") or 0,
+                cost=metadata.get("cost") or 0.0,
+                latency_s=time.monotonic() - started_at if started_at else None
+            )
+        elif event_type in ("tool_result", "tool_error"):
+            started_at = self._pending_calls.pop(call_id, None)
+            self.metrics.record_tool_finished(
+                fields.get("tool", "unknown_tool"),
+                duration_s=time.monotonic() - started_at if started_at else None,
+                error=event_type == "tool_error"
+            )
+        elif event_type == "llm_exception":
+            self._pending_calls.pop(call_id, None)
+        elif event_type == "llm_stream_metrics":
+            self.metrics.record_stream(fields.get("model", "unknown"), fields.get("time_to_first_token_s"), fields.get("tokens_per_second"))
+        elif event_type == "llm_token_usage":
+            usage_metadata = fields.get("usage_metadata") or {}
+            self._usage_totals["total_tokens"] += usage_metadata.get("total_tokens") or 0
+            self._usage_totals["total_cost"] += usage_metadata.get("total_cost") or 0.0
 
     def log(self, event_type: str, **kwargs):
         """Log an event"""
@@ -83,50 +290,33 @@ class AgentJsonlLogger:
             elif event_type == "llm_response" and "output_tokens" in metadata:
                 self.token_counter["completion_tokens"] += metadata.get("output_tokens", 0)
                 self.token_counter["total_tokens"] += metadata.get("output_tokens", 0)
-        
-        with self._lock:
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+
+        self._record_metrics(event_type, kwargs)
+        line = _dumps_line(log_entry)
+        if AGENT_LOG_BUFFERED:
+            _jsonl_writer.write(self.log_path, line, sync=event_type in _SYNC_EVENTS)
+        else:
+            with self._lock:
+                with open(self.log_path, "ab") as f:
+                    f.write(line)
+
+    def flush(self):
+        """Blocks until this logger's buffered events are written."""
+        if AGENT_LOG_BUFFERED:
+            _jsonl_writer.flush(self.log_path)
+
+    def close(self):
+        """Flushes pending events and releases the file handle kept by the writer."""
+        if AGENT_LOG_BUFFERED:
+            _jsonl_writer.close_file(self.log_path)
     
     def get_llm_usage_summary(self) -> Tuple[int, float]:
-        """Read and summarize LLM usage from log files.
+        """Summarize the LLM usage recorded by this logger (llm_token_usage events).
 
         Returns:
             A tuple (total_tokens, total_cost)
         """
-        total_tokens = 0
-        total_cost = 0.0
-
-        # Compatible with both old and new attribute names
-        log_file_path = getattr(self, "log_path", None) or getattr(self, "log_file", None)
-        if not log_file_path or not os.path.exists(log_file_path):
-            return 0, 0.0
-
-        with self._lock:
-            with open(log_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        log_entry = json.loads(line)
-                        # Compatible with new and old log formats
-                        if log_entry.get("event_type") == "llm_token_usage" or log_entry.get("event") == "llm_token_usage":
-                            # Handle new format
-                            if "usage_metadata" in log_entry:
-                                usage_metadata = log_entry.get("usage_metadata", {})
-                                total_tokens += usage_metadata.get("total_tokens", 0)
-                                total_cost += usage_metadata.get("total_cost", 0.0)
-                            # Handle old format
-                            elif "details" in log_entry and "usage_metadata" in log_entry["details"]:
-                                usage_metadata = log_entry["details"]["usage_metadata"]
-                                total_tokens += usage_metadata.get("total_tokens", 0)
-                                total_cost += usage_metadata.get("total_cost", 0.0)
-                            # Handle oldest format
-                            elif "usage" in log_entry:
-                                total_tokens += log_entry["usage"].get("total_tokens", 0)
-                                total_cost += log_entry.get("cost", 0.0)
-                    except (json.JSONDecodeError, KeyError):
-                        continue
-        
-        return total_tokens, total_cost
+        return self._usage_totals["total_tokens"], self._usage_totals["total_cost"]
     
     def log_llm_usage(self, call_id: str, model_name: str, 
                       prompt_tokens: int = None, completion_tokens: int = None, 
@@ -174,12 +364,43 @@ class AgentJsonlLogger:
 _agent_logger_cache = {}
 _loggers_lock = threading.Lock()
 
+# Identifies the workflow run that owns the current task. Several runs can share
+# one process (see batch_run_workflow.py --engine in-process), and each of them
+# must get its own agent loggers even when the agent names collide.
+_current_run_id: ContextVar[Optional[str]] = ContextVar("agent_log_run_id", default=None)
+
 def get_agent_logger(agent_name: str) -> AgentJsonlLogger:
-    """Get or create logger instance for specified Agent"""
+    """Get or create logger instance for specified Agent (scoped to the current run, if any)"""
+    run_id = _current_run_id.get()
     with _loggers_lock:
-        if agent_name not in _agent_logger_cache:
-            _agent_logger_cache[agent_name] = AgentJsonlLogger(agent_name)
-        return _agent_logger_cache[agent_name]
+        key = (run_id, agent_name)
+        if key not in _agent_logger_cache:
+            _agent_logger_cache[key] = AgentJsonlLogger(agent_name, run_id=run_id)
+        return _agent_logger_cache[key]
+
+def get_agent_log_run() -> Optional[str]:
+    """Run id that agent loggers are currently scoped to, if any"""
+    return _current_run_id.get()
+
+@contextmanager
+def agent_log_run(run_id: str):
+    """
+    Scope agent loggers to a single workflow run.
+    Usage:
+        with agent_log_run("batch-3"):
+            await app.ainvoke(initial_state)
+    """
+    token = _current_run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _current_run_id.reset(token)
+        # Drop the run's loggers so long-lived processes don't accumulate them
+        with _loggers_lock:
+            run_loggers = [_agent_logger_cache.pop(k) for k in [k for k in _agent_logger_cache if k[0] == run_id]]
+        for agent_logger in run_loggers:
+            agent_logger.close()
+        drop_run_metrics(run_id)
 
 
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ from mcp.shared.exceptions import McpError
 
 from framwork.logger import logger
 from framwork.mcp_swe_flow.adapters import MCPToolAdapter
+from framwork.mcp_swe_flow.adapters.zygote import stdio_server_params
 
 class MCPClientAdapter:
     """
@@ -82,8 +83,8 @@ class MCPClientAdapter:
             
             logger.info(f"🔄 Preparing startup command: {command} {' '.join(args)}, cwd={cwd_str}")
             
-            # Use the same method as framwork/tool/mcp.py
-            server_params = StdioServerParameters(command=command, args=args)
+            # Forked from the warm zygote when MCP_ZYGOTE is enabled, plain spawn otherwise
+            server_params = stdio_server_params(args)
             logger.info(f"🔄 Creating server parameters: {server_params}")
             
             # Start and connect to MCP server via subprocess
@@ -146,7 +147,8 @@ class MCPClientAdapter:
                         description=tool.description,
                         parameters=tool.inputSchema,
                         session=self.session,
-                        max_output_length=max_output_length
+                        max_output_length=max_output_length,
+                        read_only_hint=getattr(getattr(tool, "annotations", None), "readOnlyHint", None)
                     )
                     self.tools.append(adapter)
                     logger.info(f"✅ Successfully converted tool: {tool.name}")
@@ -257,8 +259,8 @@ class MCPClientAdapter:
             
             logger.info(f"🔄 Preparing startup command: {command} {' '.join(args)}, cwd={cwd_str}")
             
-            # Use the same method as framwork/tool/mcp.py
-            server_params = StdioServerParameters(command=command, args=args)
+            # Forked from the warm zygote when MCP_ZYGOTE is enabled, plain spawn otherwise
+            server_params = stdio_server_params(args)
             logger.info(f"🔄 Creating server parameters: {server_params}")
             
             # Start and connect to MCP server via subprocess
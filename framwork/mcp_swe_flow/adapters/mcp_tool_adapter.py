@@ -16,6 +16,7 @@ class MCPToolAdapter(BaseTool):
     description: str = Field(description="The description of the tool")
     args_schema: Dict[str, Any] = Field(default_factory=dict, description="JSON Schema of tool parameters")
     max_output_length: int = Field(default=2000, description="Maximum length of tool return results")
+    read_only_hint: Optional[bool] = Field(default=None, description="The server's readOnlyHint annotation, None if not declared")
     
     # Use getter/setter to handle session attributes
     _session: Optional[ClientSession] = None
@@ -28,7 +29,8 @@ class MCPToolAdapter(BaseTool):
         parameters: Dict[str, Any], 
         session: Optional[ClientSession],
         max_output_length: int = 2000,
-        ainvoke_override: Optional[Callable] = None
+        ainvoke_override: Optional[Callable] = None,
+        read_only_hint: Optional[bool] = None
     ):
         """Initialize MCP tool adapter"""
         super().__init__(
@@ -39,6 +41,7 @@ class MCPToolAdapter(BaseTool):
         self._session = session
         self.max_output_length = max_output_length
         self.ainvoke_override = ainvoke_override
+        self.read_only_hint = read_only_hint
     
     def _run(self, **kwargs) -> str:
         """Synchronous execution of MCP tool call (to satisfy BaseTool's abstract method requirement)"""
@@ -0,0 +1,161 @@
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from mcp import StdioServerParameters
+
+from framwork.logger import logger
+
+# ========== Zygote Launcher ==========
+# Every server_test / benchmark cycle starts a fresh interpreter for the server under test and
+# re-imports mcp, pydantic, httpx, etc. With MCP_ZYGOTE enabled, a fork server that already
+# imported those modules (zygote_server.py) forks the server process instead. The stdio client
+# still spawns a process, but it is a tiny stdlib-only shim that hands its stdin/stdout/stderr
+# to the zygote and waits for the forked server's exit code, so MCP sessions, termination and
+# exit codes behave as with a plain spawn.
+MCP_ZYGOTE = os.getenv("MCP_ZYGOTE", "false").lower() == "true"
+MCP_ZYGOTE_PRELOAD = os.getenv(
+    "MCP_ZYGOTE_PRELOAD",
+    "mcp.server.fastmcp,pydantic,httpx,anyio,requests,numpy,pandas"
+)
+
+ZYGOTE_SERVER_SCRIPT = Path(__file__).with_name("zygote_server.py")
+
+# Run with `python -S -c`: argv = ["-c", socket_path, *server_args]. If the zygote is gone the
+# shim execs the plain `python <server_args>` in place, keeping the same stdio pipes.
+_SHIM_CODE = """
+import json, os, socket, struct, sys
+socket_path, args = sys.argv[1], sys.argv[2:]
+try:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    payload = json.dumps({"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}).encode("utf-8")
+    socket.send_fds(sock, [struct.pack("!Q", len(payload))], [0, 1, 2])
+    sock.sendall(payload)
+except OSError:
+    os.execv(sys.executable, [sys.executable, *args])
+devnull = os.open(os.devnull, os.O_RDWR)
+for fd in (0, 1, 2):
+    os.dup2(devnull, fd)
+data = b""
+while True:
+    chunk = sock.recv(64)
+    if not chunk:
+        break
+    data += chunk
+os._exit(int(data.split()[1]) if data.startswith(b"EXIT ") else 1)
+"""
+
+
+class ZygoteLauncher:
+    """Owns the zygote process of this interpreter and builds the stdio parameters that use it."""
+
+    def __init__(self, preload: List[str]):
+        self.preload = preload
+        self.process: Optional[subprocess.Popen] = None
+        self.socket_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supported() -> bool:
+        return os.name == "posix" and hasattr(socket, "send_fds") and hasattr(os, "fork")
+
+    @property
+    def socket_path(self) -> Optional[str]:
+        return os.path.join(self.socket_dir, "zygote.sock") if self.socket_dir else None
+
+    def _start(self):
+        self.socket_dir = tempfile.mkdtemp(prefix="mcp-zygote-")
+        self.process = subprocess.Popen(
+            [sys.executable, str(ZYGOTE_SERVER_SCRIPT), self.socket_path, str(os.getpid()), ",".join(self.preload)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        logger.info(f"🧬 Starting MCP zygote (pid {self.process.pid}), preloading: {', '.join(self.preload) or 'nothing'}")
+
+    def ready_socket(self) -> Optional[str]:
+        """
+        The zygote's socket path if it is ready to fork servers, else None.
+        Starts (or restarts) the zygote without waiting for it: callers fall back to a plain
+        spawn while it is still importing its preload modules.
+        """
+        with self._lock:
+            if self.process is None or self.process.poll() is not None:
+                if self.process is not None:
+                    logger.warning(f"MCP zygote exited with code {self.process.returncode}, restarting it")
+                    self._cleanup_socket_dir()
+                self._start()
+                return None
+            return self.socket_path if os.path.exists(self.socket_path) else None
+
+    def _cleanup_socket_dir(self):
+        if self.socket_dir:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            self.socket_dir = None
+
+    def stop(self):
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+            self.process = None
+            self._cleanup_socket_dir()
+
+
+_launcher: Optional[ZygoteLauncher] = None
+_launcher_lock = threading.Lock()
+
+
+def get_zygote_launcher() -> Optional[ZygoteLauncher]:
+    """The process-wide launcher, or None when MCP_ZYGOTE is off or the platform can't fork/pass fds."""
+    global _launcher
+    if not MCP_ZYGOTE or not ZygoteLauncher.supported():
+        return None
+    with _launcher_lock:
+        if _launcher is None:
+            _launcher = ZygoteLauncher([m.strip() for m in MCP_ZYGOTE_PRELOAD.split(",") if m.strip()])
+            atexit.register(_launcher.stop)
+        return _launcher
+
+
+def _reset_after_fork():
+    # The zygote belongs to the parent: a forked worker starts its own and must not stop
+    # the parent's at exit
+    global _launcher
+    if _launcher is not None:
+        atexit.unregister(_launcher.stop)
+    _launcher = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def stdio_server_params(args: List[str], cwd: Optional[str] = None,
+                        env: Optional[Dict[str, str]] = None) -> StdioServerParameters:
+    """
+    Parameters for `stdio_client` that run `python <args>` (e.g. ["-m", module] or [file]).
+    Forked from the warm zygote when it is enabled and ready, a plain interpreter spawn otherwise.
+    """
+    launcher = get_zygote_launcher()
+    socket_path = launcher.ready_socket() if launcher else None
+    if socket_path is None:
+        return StdioServerParameters(command=sys.executable, args=list(args), cwd=cwd, env=env)
+    return StdioServerParameters(
+        command=sys.executable,
+        args=["-S", "-c", _SHIM_CODE, socket_path, *args],
+        cwd=cwd,
+        env=env
+    )
@@ -0,0 +1,209 @@
+"""
+Fork server ("zygote") for MCP servers under test, started by zygote.ZygoteLauncher.
+
+It imports the heavy modules shared by generated servers once, then listens on a Unix
+socket. Each connection comes from a tiny shim process spawned by the MCP stdio client:
+the shim passes its stdin/stdout/stderr over the socket, the zygote forks a child that
+takes over those descriptors and runs the server module as __main__, and the child's exit
+code is sent back to the shim. Closing the connection (the client terminated the shim)
+kills the child.
+
+Only the standard library is imported at module level, so the zygote does not pull the
+framework (and its log files) into every forked server.
+
+Usage: python zygote_server.py <socket_path> <parent_pid> <comma separated preload modules>
+"""
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+
+HEADER = struct.Struct("!Q")
+KILL_GRACE_SECONDS = 3.0
+
+
+def _preload(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except BaseException:
+            pass  # Not installed or not importable in this environment: the child imports it cold
+
+
+def _recv_exact(conn, size, initial=b""):
+    data = initial
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Shim closed the connection before sending its launch spec.")
+        data += chunk
+    return data
+
+
+def _receive_spec(conn):
+    """Reads the launch spec and the three stdio descriptors sent by the shim."""
+    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        raise ConnectionError(f"Expected 3 file descriptors, got {len(fds)}.")
+    header = _recv_exact(conn, HEADER.size, header)
+    (length,) = HEADER.unpack(header)
+    spec = json.loads(_recv_exact(conn, length).decode("utf-8"))
+    return spec, fds
+
+
+def _run_child(spec, fds):
+    """Runs in the forked child: becomes the MCP server process. Never returns."""
+    os.setsid()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    for target_fd, fd in zip((0, 1, 2), fds):
+        os.dup2(fd, target_fd)
+    for fd in fds:
+        if fd > 2:
+            os.close(fd)
+
+    sys.stdin = sys.__stdin__ = open(0, "r", encoding="utf-8", closefd=False)
+    sys.stdout = sys.__stdout__ = open(1, "w", encoding="utf-8", closefd=False, buffering=1)
+    sys.stderr = sys.__stderr__ = open(2, "w", encoding="utf-8", closefd=False, buffering=1)
+
+    code = 0
+    try:
+        os.chdir(spec["cwd"])
+        os.environ.clear()
+        os.environ.update(spec["env"])
+        # Server files may have been written after the zygote started
+        importlib.invalidate_caches()
+        args = spec["args"]
+        if args[0] == "-m":
+            sys.argv = [args[1]] + args[2:]
+            sys.path[0] = spec["cwd"]
+            runpy.run_module(args[1], run_name="__main__", alter_sys=True)
+        else:
+            sys.argv = list(args)
+            sys.path[0] = os.path.dirname(os.path.abspath(args[0]))
+            runpy.run_path(args[0], run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve(socket_path, parent_pid, preload):
+    _preload(preload)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The socket only appears once the preloads are done: its existence means "ready"
+    tmp_path = socket_path + ".tmp"
+    listener.bind(tmp_path)
+    listener.listen(64)
+    os.rename(tmp_path, socket_path)
+
+    children = {}       # pid -> shim connection
+    kill_deadlines = {}  # pid -> time after which SIGKILL is sent
+
+    def stop(signum=None, frame=None):
+        for pid in list(children):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+
+    while True:
+        if os.getppid() != parent_pid:
+            stop()
+
+        connections = {conn: pid for pid, conn in children.items() if conn is not None}
+        readable, _, _ = select.select([listener, *connections], [], [], 0.05)
+        for sock in readable:
+            if sock is listener:
+                conn, _ = listener.accept()
+                conn.settimeout(5.0)
+                try:
+                    spec, fds = _receive_spec(conn)
+                except (OSError, ValueError) as e:
+                    print(f"zygote: rejected launch request: {e}", file=sys.stderr)
+                    conn.close()
+                    continue
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    listener.close()
+                    conn.close()
+                    for other in connections:
+                        other.close()
+                    _run_child(spec, fds)
+                for fd in fds:
+                    os.close(fd)
+                conn.settimeout(None)
+                children[pid] = conn
+            else:
+                pid = connections[sock]
+                try:
+                    closed = sock.recv(1) == b""
+                except OSError:
+                    closed = True
+                if closed:
+                    # The client terminated the shim: stop the server it stood for
+                    sock.close()
+                    children[pid] = None
+                    try:
+                        os.killpg(pid, signal.SIGTERM)
+                    except OSError:
+                        pass
+                    kill_deadlines[pid] = time.monotonic() + KILL_GRACE_SECONDS
+
+        now = time.monotonic()
+        for pid, deadline in list(kill_deadlines.items()):
+            if now >= deadline:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                del kill_deadlines[pid]
+
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            kill_deadlines.pop(pid, None)
+            if conn is not None:
+                try:
+                    conn.sendall(f"EXIT {os.waitstatus_to_exitcode(status)}\n".encode("ascii"))
+                except OSError:
+                    pass
+                conn.close()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], int(sys.argv[2]), [m for m in sys.argv[3].split(",") if m])
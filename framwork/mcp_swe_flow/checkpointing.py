@@ -0,0 +1,104 @@
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from framwork.logger import logger, get_agent_log_run
+from framwork.metrics import get_run_metrics
+
+# SQLite file holding a checkpoint of MCPWorkflowState after every node, one thread per run_id
+DEFAULT_CHECKPOINT_DB = Path(__file__).parent.parent.parent / "logs" / "checkpoints" / "workflow_checkpoints.sqlite"
+
+# Resume decisions returned by find_resume_point
+RESUME_NEW = "new"            # no checkpoint for this run yet
+RESUME_COMPLETE = "complete"  # the run finished without an error, nothing to do
+RESUME_PENDING = "pending"    # the run stopped mid-way or failed, continue from the returned config
+
+
+def new_run_id() -> str:
+    """Creates a run id that is readable and unique enough to be typed back with --resume."""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def make_run_config(run_id: str) -> Dict[str, Any]:
+    """LangGraph config that binds an invocation to the checkpoint thread of a run."""
+    return {"configurable": {"thread_id": run_id}}
+
+
+@asynccontextmanager
+async def open_checkpointer(db_path: Optional[Path] = None):
+    """
+    Opens the SQLite checkpointer used to persist workflow state between nodes.
+    The location can be overridden with WORKFLOW_CHECKPOINT_DB.
+    Usage:
+        async with open_checkpointer() as checkpointer:
+            app = create_mcp_swe_workflow(checkpointer=checkpointer)
+    """
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    db_path = Path(db_path or os.getenv("WORKFLOW_CHECKPOINT_DB", str(DEFAULT_CHECKPOINT_DB)))
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(str(db_path)) as checkpointer:
+        logger.info(f"Workflow checkpoints are stored in: {db_path}")
+        yield checkpointer
+
+
+async def find_resume_point(app, run_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Decides where a run should restart from.
+
+    - A run that was interrupted (crash, timeout, killed process) resumes at the node
+      that was about to run when the last checkpoint was written.
+    - A run that ended through the error handler is rewound to the checkpoint taken
+      right before the failing node, so that node runs again with everything that
+      completed before it (e.g. the generated server code) kept as-is.
+
+    Returns (decision, config); config is only set for RESUME_PENDING.
+    """
+    config = make_run_config(run_id)
+    snapshot = await app.aget_state(config)
+    if not snapshot.values:
+        return RESUME_NEW, None
+
+    if snapshot.next and "error_handler" not in snapshot.next:
+        logger.info(f"Run '{run_id}' was interrupted before node(s) {snapshot.next}, resuming there.")
+        return RESUME_PENDING, snapshot.config
+
+    if not snapshot.next and not snapshot.values.get("error"):
+        return RESUME_COMPLETE, None
+
+    # The run failed: find the latest hand-off to the error handler (newest first) and
+    # step back to its parent checkpoint, which is scheduled to run the failing node.
+    async for past in app.aget_state_history(config):
+        if "error_handler" in past.next and past.parent_config:
+            failed = await app.aget_state(past.parent_config)
+            logger.info(f"Run '{run_id}' failed in node(s) {failed.next}, resuming from the checkpoint before it.")
+            return RESUME_PENDING, failed.config
+
+    if snapshot.next:
+        return RESUME_PENDING, snapshot.config
+    return RESUME_COMPLETE, None
+
+
+async def invoke_with_checkpoint(app, run_id: str, initial_state: Dict[str, Any], resume: bool = False) -> Dict[str, Any]:
+    """
+    Invokes a checkpointed workflow under the thread of run_id.
+    With resume=True, an existing run continues from its last completed node; a run
+    without any checkpoint is started from initial_state if one is given.
+    """
+    if resume:
+        decision, resume_config = await find_resume_point(app, run_id)
+        if decision == RESUME_COMPLETE:
+            logger.info(f"Run '{run_id}' already completed, nothing to resume.")
+            return (await app.aget_state(make_run_config(run_id))).values
+        if decision == RESUME_PENDING:
+            # Nodes completed before the interruption recorded their metrics in another process
+            get_run_metrics(get_agent_log_run()).partial = True
+            return await app.ainvoke(None, resume_config)
+        if not initial_state.get("api_name") and not initial_state.get("user_input"):
+            raise ValueError(f"No checkpoint found for run '{run_id}', cannot resume it.")
+        logger.info(f"No checkpoint found for run '{run_id}', starting it from the beginning.")
+
+    return await app.ainvoke(initial_state, make_run_config(run_id))
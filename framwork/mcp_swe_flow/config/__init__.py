@@ -3,6 +3,7 @@ from .config import (
     llm,
     llm_with_tools,
     get_llm_for_agent,
+    aclose_llm_clients,
     PROJECT_ROOT,
     DEFAULT_RESOURCES_DIR,
     DEFAULT_OUTPUT_DIR,
@@ -12,6 +13,8 @@ from .config import (
     get_provider_config,
     calculate_cost
 )
+from .llm_cache import get_llm_cache, LLMCacheMissError
+from .scheduler import get_scheduler, LLMCallDeadlineError
 
 __all__ = [
     "PROJECT_ROOT",
@@ -22,7 +25,12 @@ __all__ = [
     "llm",
     "llm_with_tools",
     "get_llm_for_agent",
+    "aclose_llm_clients",
     "get_env_int",
     "get_provider_config",
-    "calculate_cost"
+    "calculate_cost",
+    "get_llm_cache",
+    "LLMCacheMissError",
+    "get_scheduler",
+    "LLMCallDeadlineError"
 ] 
\ No newline at end of file
@@ -1,7 +1,14 @@
 from pathlib import Path
 from langchain_openai import ChatOpenAI
 from framwork.logger import logger, get_agent_logger
+from framwork.mcp_swe_flow.config.llm_cache import get_llm_cache
+from framwork.mcp_swe_flow.config.scheduler import ScheduledChatOpenAI, LLM_CALL_DEADLINE
+from framwork.mcp_swe_flow.config.http_clients import get_async_http_client, get_sync_http_client, aclose_async_http_clients
+import asyncio
+import json
+import threading
 import uuid
+import weakref
 from langchain_core.callbacks import BaseCallbackHandler
 from typing import Dict, Any, List, Optional
 import os
@@ -111,10 +118,18 @@ class TokenCounterHandler(BaseCallbackHandler):
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
         self.agent_logger = get_agent_logger(agent_name)
+        self.streamed_runs = set()
+        # LLM run_id -> call_id; the same LLM instance may serve concurrent calls
+        self.call_ids: Dict[Any, str] = {}
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        """Remember streamed calls, their usage arrives on the message instead of llm_output"""
+        self.streamed_runs.add(kwargs.get("run_id"))
         
     def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs):
         """Log LLM call start"""
-        self.call_id = str(uuid.uuid4())
+        call_id = str(uuid.uuid4())
+        self.call_ids[kwargs.get("run_id")] = call_id
         
         # Estimate token count for prompts
         prompt_tokens = 0
@@ -132,7 +147,7 @@ class TokenCounterHandler(BaseCallbackHandler):
         # Create log with prompt token estimation
         self.agent_logger.log(
             event_type="llm_invoke", 
-            call_id=self.call_id,
+            call_id=call_id,
             model=serialized.get("kwargs", {}).get("model", "unknown"),
             usage_metadata={
                 "input_tokens": prompt_tokens,
@@ -142,18 +157,34 @@ class TokenCounterHandler(BaseCallbackHandler):
         
     def on_llm_end(self, response: Any, **kwargs):
         """Log LLM call end and token usage"""
-        usage = response.llm_output.get("token_usage", {})
+        # Cached responses carry no llm_output, they cost nothing
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage", {})
         prompt_tokens = usage.get("prompt_tokens", 0)
         completion_tokens = usage.get("completion_tokens", 0)
         total_tokens = usage.get("total_tokens", 0)
+        model_name = llm_output.get("model_name", "unknown")
+
+        # Streamed responses (astream) report usage on the final message (requires stream_usage=True)
+        run_id = kwargs.get("run_id")
+        if not usage and run_id in self.streamed_runs:
+            self.streamed_runs.discard(run_id)
+            message = getattr(response.generations[0][0], "message", None) if response.generations and response.generations[0] else None
+            if message is not None:
+                usage_metadata = getattr(message, "usage_metadata", None) or {}
+                prompt_tokens = usage_metadata.get("input_tokens", 0)
+                completion_tokens = usage_metadata.get("output_tokens", 0)
+                total_tokens = usage_metadata.get("total_tokens", prompt_tokens + completion_tokens)
+                model_name = message.response_metadata.get("model_name", model_name)
         
+        call_id = self.call_ids.pop(run_id, None) or str(uuid.uuid4())
+
         # Calculate cost (if needed)
-        model_name = response.llm_output.get("model_name", "unknown")
         costs = calculate_cost(model_name, prompt_tokens, completion_tokens)
         
         # Log usage information
         self.agent_logger.log_llm_usage(
-            call_id=self.call_id,
+            call_id=call_id,
             model_name=model_name,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
@@ -163,7 +194,7 @@ class TokenCounterHandler(BaseCallbackHandler):
         
         # Log response
         self.agent_logger.log(event_type="llm_response", 
-                           call_id=self.call_id,
+                           call_id=call_id,
                            usage_metadata={
                                "model": model_name,
                                "input_tokens": prompt_tokens,
@@ -174,13 +205,72 @@ class TokenCounterHandler(BaseCallbackHandler):
                        
     def on_llm_error(self, error: Exception, **kwargs):
         """Log LLM call error"""
+        run_id = kwargs.get("run_id")
+        self.streamed_runs.discard(run_id)
         self.agent_logger.log(event_type="llm_exception", 
-                           call_id=getattr(self, "call_id", str(uuid.uuid4())),
+                           call_id=self.call_ids.pop(run_id, None) or str(uuid.uuid4()),
                            error=str(error))
 
 # --- Dynamic LLM Instantiation ---
 # Global llm and llm_with_tools are removed.
 
+# --- Client Registry ---
+# Base ChatOpenAI instances keyed by (provider, model, params). Agents receive shallow copies
+# carrying their own callbacks, so every call to the same provider base URL goes through one
+# keep-alive httpx pool (see http_clients.py) instead of a fresh client per instance.
+# The async pool is bound to an event loop, hence one registry per loop.
+_llm_registry: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, ChatOpenAI]]" = weakref.WeakKeyDictionary()
+_sync_llm_registry: Dict[tuple, ChatOpenAI] = {}
+_llm_registry_lock = threading.Lock()
+
+
+def _get_registered_llm(provider: str, env_prefix: str, model_name: str, base_url: str, api_key: str,
+                        max_tokens: int, temperature: float, extra_body: Dict[str, Any]) -> ChatOpenAI:
+    """Returns the shared base ChatOpenAI for these parameters, creating it on first use."""
+    key = (provider, env_prefix, model_name, base_url, api_key, max_tokens, temperature, json.dumps(extra_body, sort_keys=True))
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _llm_registry_lock:
+        registry = _llm_registry.setdefault(loop, {}) if loop is not None else _sync_llm_registry
+        base_llm = registry.get(key)
+    if base_llm is not None:
+        return base_llm
+
+    client_kwargs = {"http_client": get_sync_http_client(base_url)}
+    if loop is not None:
+        client_kwargs["http_async_client"] = get_async_http_client(base_url)
+    # Rate limits, retries and deadlines are handled by the provider scheduler (see scheduler.py)
+    base_llm = ScheduledChatOpenAI(
+        model=model_name,
+        openai_api_base=base_url,
+        openai_api_key=api_key,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        request_timeout=LLM_CALL_DEADLINE,
+        max_retries=0,
+        rate_limit_provider=provider,
+        rate_limit_env_prefix=env_prefix,
+        extra_body=extra_body,
+        stream_usage=True, # Token usage on streamed responses (see utils/streaming.py)
+        **client_kwargs
+    )
+    with _llm_registry_lock:
+        base_llm = registry.setdefault(key, base_llm)
+    logger.info(f"Registered shared LLM client for model '{model_name}' via provider '{provider}' ({base_url}).")
+    return base_llm
+
+
+async def aclose_llm_clients():
+    """Drops the LLM instances of the running event loop and closes their pooled HTTP connections."""
+    loop = asyncio.get_running_loop()
+    with _llm_registry_lock:
+        _llm_registry.pop(loop, None)
+    await aclose_async_http_clients()
+
+
 def get_llm_for_agent(agent_name: str, model_override: Optional[str] = None) -> ChatOpenAI:
     """
     Dynamically gets an LLM instance for a specific agent.
@@ -219,6 +309,7 @@ def get_llm_for_agent(agent_name: str, model_override: Optional[str] = None) ->
     llm_enable_thinking = os.getenv("LLM_ENABLE_THINKING", "false").lower() == "true"
 
     token_handler = TokenCounterHandler(agent_name)
+    llm_cache = get_llm_cache()
     
     try:
         # Set different extra_body based on different providers
@@ -244,17 +335,19 @@ def get_llm_for_agent(agent_name: str, model_override: Optional[str] = None) ->
                 }
 
         
-        agent_llm = ChatOpenAI(
-            model=model_name,
-            openai_api_base=base_url,
-            openai_api_key=api_key,
+        base_llm = _get_registered_llm(
+            provider=provider_config['provider'],
+            env_prefix=env_prefix,
+            model_name=model_name,
+            base_url=base_url,
+            api_key=api_key,
             max_tokens=llm_max_tokens,
             temperature=llm_temperature,
-            callbacks=[token_handler],
-            request_timeout=6000, # Set to no timeout
-            extra_body=extra_body
+            extra_body=extra_body,
         )
-        logger.info(f"Created LLM instance for agent '{agent_name}' with model '{model_name}' via provider '{provider_config['provider']}'.")
+        # Shallow copy: shares the pooled OpenAI/httpx clients, only the callbacks differ
+        agent_llm = base_llm.model_copy(update={"callbacks": [token_handler], "cache": llm_cache})
+        logger.debug(f"Created LLM instance for agent '{agent_name}' with model '{model_name}' via provider '{provider_config['provider']}'.")
         return agent_llm
     except Exception as e:
         logger.error(f"Failed to initialize ChatOpenAI for model {model_name}: {e}")
@@ -279,5 +372,6 @@ __all__ = [
     "DEFAULT_OUTPUT_DIR",
     "DEFAULT_REFINEMENT_DIR",
     "DEFAULT_TEST_REPORT_DIR",
-    "get_llm_for_agent"
+    "get_llm_for_agent",
+    "aclose_llm_clients"
 ] 
\ No newline at end of file
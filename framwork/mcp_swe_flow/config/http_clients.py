@@ -0,0 +1,88 @@
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Dict
+
+import httpx
+
+from framwork.logger import logger
+
+# Async clients are bound to the event loop they were created in, so they are pooled per loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_sync_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_float_env(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _pool_settings() -> dict:
+    """
+    Connection pool settings shared by every provider client.
+    - LLM_HTTP_MAX_CONNECTIONS: maximum open connections per base URL (default: 100)
+    - LLM_HTTP_MAX_KEEPALIVE: maximum idle keep-alive connections per base URL (default: 20)
+    - LLM_HTTP_KEEPALIVE_EXPIRY: seconds an idle connection is kept open (default: 60)
+    - LLM_HTTP2: negotiate HTTP/2 when the 'h2' package is installed (default: true)
+    """
+    limits = httpx.Limits(
+        max_connections=int(_get_float_env("LLM_HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(_get_float_env("LLM_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=_get_float_env("LLM_HTTP_KEEPALIVE_EXPIRY", 60),
+    )
+    http2 = os.getenv("LLM_HTTP2", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+    return {"limits": limits, "http2": http2}
+
+
+def get_async_http_client(base_url: str) -> httpx.AsyncClient:
+    """Returns the keep-alive async client for base_url, shared by all LLM instances on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(base_url)
+        if client is None or client.is_closed:
+            settings = _pool_settings()
+            client = httpx.AsyncClient(**settings)
+            clients[base_url] = client
+            logger.info(f"Created pooled async HTTP client for {base_url} (http2={settings['http2']}).")
+        return client
+
+
+def get_sync_http_client(base_url: str) -> httpx.Client:
+    """Returns the keep-alive sync client for base_url, shared process-wide."""
+    with _clients_lock:
+        client = _sync_clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_pool_settings())
+            _sync_clients[base_url] = client
+        return client
+
+
+async def aclose_async_http_clients():
+    """Closes the async clients that belong to the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.pop(loop, {})
+    for base_url, client in clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client for {base_url}: {e}")
+
+
+def close_sync_http_clients():
+    """Closes the process-wide sync clients."""
+    with _clients_lock:
+        clients = dict(_sync_clients)
+        _sync_clients.clear()
+    for client in clients.values():
+        client.close()
+
+
+atexit.register(close_sync_http_clients)
@@ -0,0 +1,108 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from framwork.logger import logger
+from framwork.mcp_swe_flow.utils.disk_cache import DiskLRUStore
+
+# --- LLM Response Cache Modes ---
+# record:      serve hits from the cache, call the provider on a miss and store the response
+# replay:      serve hits from the cache, fail on a miss (no provider calls at all)
+# passthrough: no caching, every call goes to the provider (default)
+CACHE_MODE_RECORD = "record"
+CACHE_MODE_REPLAY = "replay"
+CACHE_MODE_PASSTHROUGH = "passthrough"
+CACHE_MODES = (CACHE_MODE_RECORD, CACHE_MODE_REPLAY, CACHE_MODE_PASSTHROUGH)
+
+DEFAULT_LLM_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "logs" / "llm_cache" / "llm_cache.sqlite"
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class ContentAddressedLLMCache(BaseCache):
+    """
+    LangChain cache that stores chat responses on disk, keyed by a hash of the
+    serialized LLM parameters (model, temperature, bound tools, ...) and the
+    serialized message list.
+    """
+    def __init__(self, store: DiskLRUStore, mode: str = CACHE_MODE_RECORD):
+        if mode not in (CACHE_MODE_RECORD, CACHE_MODE_REPLAY):
+            raise ValueError(f"Unsupported LLM cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        self.store = store
+        self.mode = mode
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Content address of a single LLM request."""
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        raw = self.store.get(key)
+        if raw is None:
+            if self.mode == CACHE_MODE_REPLAY:
+                raise LLMCacheMissError(f"LLM cache miss in replay mode (key={key[:12]}). Re-run with LLM_CACHE_MODE=record to populate the cache.")
+            logger.debug(f"LLM cache miss (key={key[:12]}).")
+            return None
+        try:
+            generations = loads(raw.decode("utf-8"))
+            logger.info(f"LLM cache hit (key={key[:12]}).")
+            return generations
+        except Exception as e:
+            logger.warning(f"Discarding unreadable LLM cache entry (key={key[:12]}): {e}")
+            self.store.delete(key)
+            if self.mode == CACHE_MODE_REPLAY:
+                raise LLMCacheMissError(f"LLM cache entry unreadable in replay mode (key={key[:12]}).") from e
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode == CACHE_MODE_REPLAY:
+            return
+        key = self.make_key(prompt, llm_string)
+        try:
+            self.store.set(key, dumps(return_val).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Failed to store LLM response in cache (key={key[:12]}): {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+
+_llm_cache: Optional[ContentAddressedLLMCache] = None
+_llm_cache_initialized = False
+
+
+def get_llm_cache() -> Optional[ContentAddressedLLMCache]:
+    """
+    Returns the process-wide LLM cache configured through environment variables,
+    or None in passthrough mode.
+    - LLM_CACHE_MODE: record | replay | passthrough (default: passthrough)
+    - LLM_CACHE_PATH: SQLite file for cached responses
+    - LLM_CACHE_MAX_MB: size budget before least recently used entries are evicted
+    """
+    global _llm_cache, _llm_cache_initialized
+    if _llm_cache_initialized:
+        return _llm_cache
+
+    mode = os.getenv("LLM_CACHE_MODE", CACHE_MODE_PASSTHROUGH).strip().lower()
+    if mode not in CACHE_MODES:
+        logger.warning(f"Unknown LLM_CACHE_MODE '{mode}', falling back to '{CACHE_MODE_PASSTHROUGH}'.")
+        mode = CACHE_MODE_PASSTHROUGH
+
+    if mode != CACHE_MODE_PASSTHROUGH:
+        cache_path = Path(os.getenv("LLM_CACHE_PATH", str(DEFAULT_LLM_CACHE_PATH)))
+        try:
+            max_mb = int(os.getenv("LLM_CACHE_MAX_MB", 512))
+        except ValueError:
+            max_mb = 512
+        _llm_cache = ContentAddressedLLMCache(DiskLRUStore(cache_path, max_bytes=max_mb * 1024 * 1024), mode=mode)
+        logger.info(f"LLM response cache enabled in '{mode}' mode at {cache_path} (max {max_mb} MB).")
+
+    _llm_cache_initialized = True
+    return _llm_cache
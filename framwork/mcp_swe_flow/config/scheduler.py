@@ -0,0 +1,334 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import openai
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from framwork.logger import logger
+
+# Every LLM call of the workflow is admitted by the scheduler of its provider:
+#   - token buckets for requests/min and tokens/min ({PREFIX}_RPM, {PREFIX}_TPM, unset = unlimited)
+#   - AIMD concurrency: +1 slot per window of successes, halved on 429/5xx/timeouts,
+#     between 1 and {PREFIX}_MAX_CONCURRENCY
+#   - retries with full-jitter exponential backoff (honouring Retry-After)
+#   - a deadline per logical call (LLM_CALL_DEADLINE), counted from its first admission and shared by
+#     all attempts and backoff sleeps, so retries never extend a stalled call beyond it
+# Limits apply per process: with the batch worker pool, divide the provider quota by the worker count.
+
+
+def _get_float_env(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+LLM_CALL_DEADLINE = _get_float_env("LLM_CALL_DEADLINE", 600)
+LLM_MAX_RETRIES = int(_get_float_env("LLM_MAX_RETRIES", 5))
+LLM_RETRY_BASE_DELAY = _get_float_env("LLM_RETRY_BASE_DELAY", 1.0)
+LLM_RETRY_MAX_DELAY = _get_float_env("LLM_RETRY_MAX_DELAY", 60.0)
+# Output tokens reserved in the tokens/min bucket before the real usage is known
+LLM_TPM_OUTPUT_ESTIMATE = int(_get_float_env("LLM_TPM_OUTPUT_ESTIMATE", 1024))
+
+# Minimum time between two multiplicative decreases, so one burst of 429s halves the window once
+BACKOFF_COOLDOWN_SECONDS = 2.0
+
+
+class LLMCallDeadlineError(TimeoutError):
+    """Raised when an LLM call, retries included, does not complete within LLM_CALL_DEADLINE."""
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, up to a burst of one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # A request larger than the bucket can never fit, let it drain the whole bucket instead
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta: float):
+        """Charges (delta > 0) or refunds (delta < 0) units once the real cost is known."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class AIMDLimiter:
+    """Concurrency window with additive increase and multiplicative decrease."""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Woken but cancelled before resuming: pass the slot on instead of losing it
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def on_success(self):
+        previous = int(self.limit)
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        if int(self.limit) > previous:
+            self._wake()
+
+    def on_overload(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_decrease < BACKOFF_COOLDOWN_SECONDS:
+            return False
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+        return True
+
+
+def _classify_error(error: BaseException) -> Tuple[bool, bool, Optional[float]]:
+    """Returns (retryable, overload, retry_after_seconds) for an exception raised by a call."""
+    retry_after = None
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return True, True, retry_after
+    if isinstance(error, openai.RateLimitError):
+        return True, True, retry_after
+    if isinstance(error, openai.APIConnectionError):
+        return True, False, retry_after
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status >= 500:
+            return True, True, retry_after
+        if status in (408, 409):
+            return True, False, retry_after
+    return False, False, None
+
+
+class ProviderScheduler:
+    """Admission control, retries and deadlines for all LLM calls to one provider."""
+
+    def __init__(self, provider: str, env_prefix: str):
+        self.provider = provider
+        rpm = _get_float_env(f"{env_prefix}_RPM", 0)
+        tpm = _get_float_env(f"{env_prefix}_TPM", 0)
+        self.request_bucket = TokenBucket(rpm) if rpm > 0 else None
+        self.token_bucket = TokenBucket(tpm) if tpm > 0 else None
+        self.limiter = AIMDLimiter(int(_get_float_env(f"{env_prefix}_MAX_CONCURRENCY", 16)))
+        self.deadline = LLM_CALL_DEADLINE
+        self.max_retries = LLM_MAX_RETRIES
+        logger.info(f"LLM scheduler for '{provider}': rpm={rpm or 'unlimited'}, tpm={tpm or 'unlimited'}, "
+                    f"max_concurrency={self.limiter.max_limit}, deadline={self.deadline}s, retries={self.max_retries}")
+
+    async def _admit(self, estimated_tokens: int):
+        await self.limiter.acquire()
+        try:
+            if self.request_bucket:
+                await self.request_bucket.acquire(1)
+            if self.token_bucket:
+                await self.token_bucket.acquire(estimated_tokens)
+        except BaseException:
+            self.limiter.release()
+            raise
+
+    def _settle(self, estimated_tokens: int, used_tokens: Optional[int]):
+        self.limiter.on_success()
+        if self.token_bucket and used_tokens:
+            self.token_bucket.adjust(used_tokens - estimated_tokens)
+
+    def _retry_delay(self, error: BaseException, attempt: int, call_deadline: float) -> Optional[float]:
+        """
+        Records a failed attempt and returns how long to wait before retrying, or None to give up.
+        Gives up as well when the backoff would leave no time before the call's deadline.
+        """
+        retryable, overload, retry_after = _classify_error(error)
+        if overload and self.limiter.on_overload():
+            logger.warning(f"[{self.provider}] Provider overloaded ({type(error).__name__}), concurrency window reduced to {int(self.limiter.limit)}.")
+        if not retryable or attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay >= call_deadline:
+            return None
+        logger.warning(f"[{self.provider}] LLM call failed ({type(error).__name__}: {error}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s.")
+        return delay
+
+    def _give_up(self, error: BaseException):
+        if isinstance(error, asyncio.TimeoutError):
+            raise LLMCallDeadlineError(f"LLM call to '{self.provider}' exceeded the {self.deadline}s deadline.") from error
+        raise error
+
+    async def run(self, call: Callable[[], Awaitable[ChatResult]], estimated_tokens: int) -> ChatResult:
+        """Runs a non-streaming call under admission control, retrying transient failures."""
+        attempt = 0
+        call_deadline = None
+        while True:
+            await self._admit(estimated_tokens)
+            if call_deadline is None:
+                call_deadline = time.monotonic() + self.deadline
+            try:
+                remaining = call_deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                result = await asyncio.wait_for(call(), timeout=remaining)
+            except Exception as e:
+                self.limiter.release()
+                delay = self._retry_delay(e, attempt, call_deadline)
+                if delay is None:
+                    self._give_up(e)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+            self.limiter.release()
+            usage = (result.llm_output or {}).get("token_usage") or {}
+            self._settle(estimated_tokens, usage.get("total_tokens"))
+            return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[ChatGenerationChunk]],
+                     estimated_tokens: int) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Streaming variant of run(). A failed attempt is only retried if nothing has been
+        yielded yet; the deadline covers the whole stream, retries included.
+        """
+        attempt = 0
+        call_deadline = None
+        while True:
+            await self._admit(estimated_tokens)
+            if call_deadline is None:
+                call_deadline = time.monotonic() + self.deadline
+            stream = open_stream()
+            yielded = False
+            used_tokens = None
+            delay = None
+            try:
+                while True:
+                    remaining = call_deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    usage_metadata = getattr(chunk.message, "usage_metadata", None)
+                    if usage_metadata:
+                        used_tokens = (used_tokens or 0) + usage_metadata.get("total_tokens", 0)
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, call_deadline) if not yielded else None
+                if delay is None:
+                    self._give_up(e)
+            else:
+                self._settle(estimated_tokens, used_tokens)
+                return
+            finally:
+                self.limiter.release()
+                await stream.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+# Schedulers hold futures bound to an event loop, hence one set per loop
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, ProviderScheduler]]" = weakref.WeakKeyDictionary()
+
+
+def get_scheduler(provider: str, env_prefix: str) -> ProviderScheduler:
+    """Returns the scheduler of a provider for the running event loop."""
+    schedulers = _schedulers.setdefault(asyncio.get_running_loop(), {})
+    scheduler = schedulers.get(provider)
+    if scheduler is None:
+        scheduler = schedulers[provider] = ProviderScheduler(provider, env_prefix)
+    return scheduler
+
+
+def estimate_request_tokens(messages: List[BaseMessage]) -> int:
+    """Rough tokens/min reservation for a request (~4 characters per token plus expected output)."""
+    characters = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+    return characters // 4 + LLM_TPM_OUTPUT_ESTIMATE
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI whose async calls go through the provider's ProviderScheduler.
+    The OpenAI client's own retries are disabled (max_retries=0), the scheduler retries instead.
+    Cached responses are served before _agenerate is reached, so they bypass the scheduler.
+    """
+
+    rate_limit_provider: str = "default"
+    rate_limit_env_prefix: str = "LLM"
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        scheduler = get_scheduler(self.rate_limit_provider, self.rate_limit_env_prefix)
+        agenerate = super()._agenerate
+        return await scheduler.run(
+            lambda: agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            estimated_tokens=estimate_request_tokens(messages)
+        )
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        scheduler = get_scheduler(self.rate_limit_provider, self.rate_limit_env_prefix)
+        astream = super()._astream
+        async for chunk in scheduler.stream(
+            lambda: astream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            estimated_tokens=estimate_request_tokens(messages)
+        ):
+            yield chunk
@@ -4,29 +4,95 @@ from framwork.mcp_swe_flow.nodes import (
     load_input_node,
     swe_generate_node,
     server_test_node,
+    preflight_node,
     refine_code_node,
     error_handler_node,
     human_confirmation_node,
     error_recovery_node,
-    statistics_logger_node
+    statistics_logger_node,
+    create_model_fanout_node
 )
 from framwork.logger import logger
 
 
-def create_mcp_swe_workflow():
-    """Creates the LangGraph workflow for the MCP agent system."""
+def create_model_run_subgraph():
+    """
+    Creates the per-model part of the workflow used by the fan-out node:
+    swe_generate -> preflight -> server_test <-> refine_code. Runs are non-interactive and every
+    terminal route (statistics, recovery, end) finishes the subgraph; the parent
+    graph produces the joined statistics report.
+    """
+    subgraph = StateGraph(MCPWorkflowState)
+    subgraph.add_node("swe_generate", swe_generate_node)
+    subgraph.add_node("preflight", preflight_node)
+    subgraph.add_node("server_test", server_test_node)
+    subgraph.add_node("refine_code", refine_code_node)
+    subgraph.add_node("error_handler", error_handler_node)
+    subgraph.set_entry_point("swe_generate")
+
+    subgraph.add_conditional_edges(
+        "swe_generate",
+        lambda state: state["next_step"],
+        {
+            "human_confirmation": "preflight",
+            "server_test": "preflight",
+            "error_handler": "error_handler"
+        }
+    )
+    subgraph.add_conditional_edges(
+        "preflight",
+        lambda state: state["next_step"],
+        {
+            "server_test": "server_test",
+            "refine_code": "refine_code"
+        }
+    )
+    subgraph.add_conditional_edges(
+        "server_test",
+        lambda state: state["next_step"],
+        {
+            "refine_code": "refine_code",
+            "error_handler": "error_handler"
+        }
+    )
+    subgraph.add_conditional_edges(
+        "refine_code",
+        lambda state: state["next_step"],
+        {
+            "server_test": "preflight",
+            "statistics_logger": END,
+            "error_handler": "error_handler"
+        }
+    )
+    subgraph.add_edge("error_handler", END)
+
+    # Concurrent invocations from one parent node can't share the parent's checkpoint
+    # namespace, so the subgraph opts out; the parent checkpoints the joined result.
+    return subgraph.compile(checkpointer=False)
+
+
+def create_mcp_swe_workflow(checkpointer=None):
+    """
+    Creates the LangGraph workflow for the MCP agent system.
+
+    Args:
+        checkpointer: Optional LangGraph checkpointer (see checkpointing.open_checkpointer).
+            When given, the state is persisted after every node so a run can be resumed.
+    """
     workflow = StateGraph(MCPWorkflowState)
 
     # Add nodes to the graph
     logger.info("Adding nodes to the graph...")
     workflow.add_node("load_input", load_input_node)
     workflow.add_node("swe_generate", swe_generate_node)
+    workflow.add_node("preflight", preflight_node)
     workflow.add_node("server_test", server_test_node)
     workflow.add_node("refine_code", refine_code_node)
     workflow.add_node("error_handler", error_handler_node)
     workflow.add_node("human_confirmation", human_confirmation_node)
     workflow.add_node("error_recovery", error_recovery_node)
     workflow.add_node("statistics_logger", statistics_logger_node)
+    workflow.add_node("model_fanout", create_model_fanout_node(create_model_run_subgraph()))
     logger.info("Nodes added.")
 
     # Define the entry point
@@ -40,22 +106,44 @@ def create_mcp_swe_workflow():
         lambda state: state["next_step"],
         {
             "swe_generate": "swe_generate",
+            "model_fanout": "model_fanout",
+            "error_handler": "error_handler"
+        }
+    )
+
+    # Fan-out mode: one swe_generate -> server_test -> refine_code run per model
+    workflow.add_conditional_edges(
+        "model_fanout",
+        lambda state: state["next_step"],
+        {
+            "statistics_logger": "statistics_logger",
             "error_handler": "error_handler"
         }
     )
     
+    # Every route to "server_test" passes the pre-flight gate first: servers that don't
+    # compile or import go back to refine_code without starting an MCP session.
     workflow.add_conditional_edges(
         "swe_generate",
         lambda state: state["next_step"],
         {
             "human_confirmation": "human_confirmation",
-            "server_test": "server_test",
+            "server_test": "preflight",
             "error_handler": "error_handler"
         }
     )
     
     # 从人工确认节点到服务器测试节点
-    workflow.add_edge("human_confirmation", "server_test")
+    workflow.add_edge("human_confirmation", "preflight")
+
+    workflow.add_conditional_edges(
+        "preflight",
+        lambda state: state["next_step"],
+        {
+            "server_test": "server_test",
+            "refine_code": "refine_code"
+        }
+    )
     
     workflow.add_conditional_edges(
         "server_test",
@@ -70,7 +158,7 @@ def create_mcp_swe_workflow():
         "refine_code",
         lambda state: state["next_step"],
         {            
-            "server_test": "server_test",
+            "server_test": "preflight",
             "statistics_logger": "statistics_logger",
             "error_handler": "error_handler"
         }
@@ -82,7 +170,8 @@ def create_mcp_swe_workflow():
         lambda state: state["next_step"],
         {
             "statistics_logger": "statistics_logger",
-            "error_recovery": "error_recovery"
+            "error_recovery": "error_recovery",
+            "end": END
         }
     )
     
@@ -91,9 +180,10 @@ def create_mcp_swe_workflow():
         "error_recovery",
         lambda state: state["next_step"],
         {
-            "server_test": "server_test",
+            "server_test": "preflight",
             "refine_code": "refine_code",
-            "statistics_logger": "statistics_logger"
+            "statistics_logger": "statistics_logger",
+            "end": END
         }
     )
 
@@ -104,6 +194,6 @@ def create_mcp_swe_workflow():
 
     # Compile the graph
     logger.info("Compiling the graph...")
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
     logger.info("Graph compiled successfully.")
     return app 
\ No newline at end of file
@@ -1,19 +1,23 @@
 from framwork.mcp_swe_flow.nodes.input_loader import load_input_node
 from framwork.mcp_swe_flow.nodes.swe_generator import swe_generate_node
 from framwork.mcp_swe_flow.nodes.server_tester import server_test_node
+from framwork.mcp_swe_flow.nodes.preflight import preflight_node
 from framwork.mcp_swe_flow.nodes.code_refiner import refine_code_node
 from framwork.mcp_swe_flow.nodes.error_handler import error_handler_node
 from framwork.mcp_swe_flow.nodes.human_confirmation import human_confirmation_node
 from framwork.mcp_swe_flow.nodes.error_recovery import error_recovery_node
 from framwork.mcp_swe_flow.nodes.statistics_logger import statistics_logger_node
+from framwork.mcp_swe_flow.nodes.model_fanout import create_model_fanout_node
 
 __all__ = [
     "load_input_node",
     "swe_generate_node",
     "server_test_node",
+    "preflight_node",
     "refine_code_node",
     "error_handler_node",
     "human_confirmation_node",
     "error_recovery_node",
-    "statistics_logger_node"
+    "statistics_logger_node",
+    "create_model_fanout_node"
 ] 
\ No newline at end of file
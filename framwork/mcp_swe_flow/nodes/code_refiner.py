@@ -1,4 +1,6 @@
+import asyncio
 import json
+import os
 import re
 from pathlib import Path
 
@@ -7,6 +9,9 @@ from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
 from framwork.mcp_swe_flow.prompts.utils import load_prompt
 from framwork.mcp_swe_flow.state import MCPWorkflowState
 from framwork.mcp_swe_flow.config import llm, PROJECT_ROOT, get_llm_for_agent, get_env_int
+from framwork.mcp_swe_flow.utils.patching import apply_patch, extract_edits, PatchApplyError
+from framwork.mcp_swe_flow.utils.doc_retrieval import select_mcp_doc
+from framwork.mcp_swe_flow.utils.requirements_scan import REQUIREMENTS_SCAN, scan_requirements, merge_requirements
 from framwork.tool import save_file_tool, read_file_tool, tavily_search_tool, context7_docs_tool
 from framwork.schema import Memory
 from framwork.logger import logger, get_agent_logger
@@ -16,6 +21,60 @@ MAX_REFINE_LOOPS = get_env_int("MAX_REFINE_LOOPS", 2)
 # Define the maximum number of internal thinking/research turns for the refiner
 MAX_INTERNAL_TURNS = get_env_int("MAX_INTERNAL_TURNS", 5)
 MAX_INTERNAL_TOOL_CALLS = get_env_int("MAX_INTERNAL_TOOL_CALLS", 3)
+# Ask the refiner for search/replace edits instead of the whole file; falls back to full-file mode if a patch fails
+REFINE_PATCH_MODE = os.getenv("REFINE_PATCH_MODE", "true").lower() == "true"
+
+async def _generate_readme(finalizer_llm, refined_code, api_name, mcp_doc, readme_path, agent_logger):
+    logger.info("📄 Generating README.md...")
+    readme_template = load_prompt("code_refiner/generate_readme.prompt")
+    readme_message = readme_template.render_message(
+        refined_code=refined_code,
+        api_name=api_name,
+        mcp_doc=select_mcp_doc(mcp_doc, f"README installation usage running the server client configuration\n{refined_code}", agent_logger, purpose="readme")
+    )
+    readme_response = await finalizer_llm.ainvoke([readme_message])
+    relative_readme_path = readme_path.relative_to(PROJECT_ROOT / "workspace")
+    await save_file_tool.ainvoke({"file_path": str(relative_readme_path), "content": readme_response.content.strip()})
+    logger.info(f"✅ README.md saved to: {readme_path}")
+    agent_logger.log(event_type="readme_generated", path=str(readme_path))
+
+
+async def _generate_requirements(finalizer_llm, refined_code, requirements_path, search_dirs, agent_logger):
+    """
+    requirements.txt from the AST import scan. The LLM is only asked about modules the scan
+    cannot map to a distribution, or about the whole file if the scan is disabled or the code does not parse.
+    """
+    logger.info("📦 Generating requirements.txt...")
+    requirements, unknown_modules, source = None, [], "llm"
+    if REQUIREMENTS_SCAN:
+        try:
+            requirements, unknown_modules = scan_requirements(refined_code, search_dirs)
+            source = "import_scan"
+        except SyntaxError as e:
+            logger.warning(f"Import scan failed ({e}); generating requirements.txt with the LLM.")
+
+    if requirements is None or unknown_modules:
+        req_template = load_prompt("code_refiner/generate_requirements.prompt")
+        req_message = req_template.render_message(
+            refined_code=refined_code,
+            known_requirements=requirements or [],
+            unknown_modules=unknown_modules
+        )
+        req_response = await finalizer_llm.ainvoke([req_message])
+        if requirements is None:
+            content = req_response.content.strip()
+        else:
+            logger.info(f"Asking the LLM about modules the import scan could not map: {unknown_modules}")
+            requirements = merge_requirements(requirements, req_response.content.splitlines())
+            source = "import_scan+llm"
+    if requirements is not None:
+        content = "\n".join(requirements)
+
+    relative_req_path = requirements_path.relative_to(PROJECT_ROOT / "workspace")
+    await save_file_tool.ainvoke({"file_path": str(relative_req_path), "content": content})
+    logger.info(f"✅ requirements.txt saved to: {requirements_path} ({source})")
+    agent_logger.log(event_type="requirements_generated", path=str(requirements_path), source=source, unknown_modules=unknown_modules)
+
 
 async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
     """
@@ -53,32 +112,43 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
         # --- Stage 1: Initial Assessment (Decide if refinement is needed) ---
         logger.info("--- Stage 1: Initial Code Assessment ---")
         agent_logger.log(event_type="start_initial_assessment")
-        assessment_template = load_prompt("code_refiner/assess_deliverability.prompt")
-        assessment_prompt_str = assessment_template.render(
-            server_code=server_code,
-            test_report_str=json.dumps(test_report, indent=2) if isinstance(test_report, dict) else str(test_report)
-        )
+        preflight_report = state.get("preflight_report") or {}
+        if preflight_report and not preflight_report.get("passed", True):
+            # The server failed the pre-flight gate: the diagnostics already say what is broken,
+            # there is nothing for an LLM to assess.
+            preflight_errors = [d["message"] for d in preflight_report.get("diagnostics", []) if d.get("severity") == "error"]
+            initial_decision = "NEEDS_REFINEMENT"
+            reason = "Pre-flight checks failed: " + "; ".join(preflight_errors)
+            assessment_data = {"decision": initial_decision, "reason": reason, "source": "preflight"}
+            logger.info(f"Initial Assessment: {initial_decision} (from pre-flight diagnostics, no LLM call).")
+            agent_logger.log(event_type="initial_assessment_complete", decision=initial_decision, reason=reason, source="preflight")
+        else:
+            assessment_template = load_prompt("code_refiner/assess_deliverability.prompt")
+            assessment_message = assessment_template.render_message(
+                server_code=server_code,
+                test_report_str=json.dumps(test_report, indent=2) if isinstance(test_report, dict) else str(test_report)
+            )
         
-        assessment_llm = get_llm_for_agent(f"CodeRefiner-Agent-{api_name or 'custom'}")
-        assessment_response = await assessment_llm.ainvoke([HumanMessage(content=assessment_prompt_str)])
+            assessment_llm = get_llm_for_agent(f"CodeRefiner-Agent-{api_name or 'custom'}")
+            assessment_response = await assessment_llm.ainvoke([assessment_message])
         
-        try:
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', assessment_response.content, re.DOTALL)
-            if not json_match:
-                raise json.JSONDecodeError("No JSON block found in assessment response", assessment_response.content, 0)
-            assessment_data = json.loads(json_match.group(1).strip())
-            initial_decision = assessment_data["decision"]
-            reason = assessment_data.get("reason", "No reason provided.")
-            logger.info(f"Initial Assessment: {initial_decision}. Reason: {reason}")
-            agent_logger.log(event_type="initial_assessment_complete", decision=initial_decision, reason=reason)
-        except (json.JSONDecodeError, KeyError) as e:
-            error_msg = f"Failed to parse initial assessment from LLM: {e}. Defaulting to refinement."
-            logger.warning(error_msg)
-            initial_decision = "NEEDS_REFINEMENT"
-            reason = "Could not parse initial assessment."
-            agent_logger.log(event_type="initial_assessment_failed", error=error_msg)
-            # Ensure assessment_data exists even on failure, for logging purposes.
-            assessment_data = {"decision": initial_decision, "reason": reason, "error_details": error_msg}
+            try:
+                json_match = re.search(r'```json\s*([\s\S]*?)\s*```', assessment_response.content, re.DOTALL)
+                if not json_match:
+                    raise json.JSONDecodeError("No JSON block found in assessment response", assessment_response.content, 0)
+                assessment_data = json.loads(json_match.group(1).strip())
+                initial_decision = assessment_data["decision"]
+                reason = assessment_data.get("reason", "No reason provided.")
+                logger.info(f"Initial Assessment: {initial_decision}. Reason: {reason}")
+                agent_logger.log(event_type="initial_assessment_complete", decision=initial_decision, reason=reason)
+            except (json.JSONDecodeError, KeyError) as e:
+                error_msg = f"Failed to parse initial assessment from LLM: {e}. Defaulting to refinement."
+                logger.warning(error_msg)
+                initial_decision = "NEEDS_REFINEMENT"
+                reason = "Could not parse initial assessment."
+                agent_logger.log(event_type="initial_assessment_failed", error=error_msg)
+                # Ensure assessment_data exists even on failure, for logging purposes.
+                assessment_data = {"decision": initial_decision, "reason": reason, "error_details": error_msg}
 
         refined_code = server_code
         decision = initial_decision
@@ -92,8 +162,11 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
             tools = [save_file_tool, tavily_search_tool, context7_docs_tool]
             refiner_llm = get_llm_for_agent(f"CodeRefiner-Agent-{api_name or 'custom'}").bind_tools(tools)
 
+            patch_mode = REFINE_PATCH_MODE
+            test_report_str = json.dumps(test_report, indent=2, ensure_ascii=False) if isinstance(test_report, dict) else str(test_report)
             refine_prompt_template = load_prompt("code_refiner/refine_with_tools.prompt")
-            refine_prompt = refine_prompt_template.render(
+            refine_message = refine_prompt_template.render_message(
+                patch_mode=patch_mode,
                 server_file_name=server_file_path.name,
                 server_code=server_code,
                 tavily_search_tool_name=tavily_search_tool.name,
@@ -102,13 +175,14 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
                 save_file_tool_description=save_file_tool.description,
                 context7_docs_tool_name=context7_docs_tool.name,
                 context7_docs_tool_description=context7_docs_tool.description,
-                test_report_str=json.dumps(test_report, indent=2, ensure_ascii=False) if isinstance(test_report, dict) else str(test_report),
-                mcp_doc=mcp_doc,
+                test_report_str=test_report_str,
+                # Sections matching the failures and the assessment's reason, not the whole document
+                mcp_doc=select_mcp_doc(mcp_doc, f"{reason}\n{test_report_str}", agent_logger, purpose="refinement"),
                 max_tool_calls=MAX_INTERNAL_TOOL_CALLS
             )
 
             memory = Memory()
-            memory.add_message(HumanMessage(content=refine_prompt))
+            memory.add_message(refine_message)
             
             # --- Internal Loop: Refinement with Tools ---
             decision_data = None
@@ -131,7 +205,8 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
                                 
                                 final_output = str(tool_output)
                                 if internal_tool_calls_used >= MAX_INTERNAL_TOOL_CALLS:
-                                    final_output += f"\n\n[INFO] You have used all {MAX_INTERNAL_TOOL_CALLS} tool calls. You MUST now provide the complete 'refined_code'."
+                                    final_answer = "search/replace edits" if patch_mode else "complete 'refined_code'"
+                                    final_output += f"\n\n[INFO] You have used all {MAX_INTERNAL_TOOL_CALLS} tool calls. You MUST now provide the {final_answer}."
 
                                 logger.info(f"Tool output: {final_output}")
                                 agent_logger.log(event_type="tool_result", tool=tool_call["name"], output=final_output, call_id=tool_call["id"])
@@ -151,6 +226,31 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
                     continue
 
                 response_content = response_message.content
+
+                # --- Patch Mode: apply search/replace edits or a unified diff to the current code ---
+                if patch_mode and ("<<<<<<< SEARCH" in response_content or re.search(r"^@@ -\d+", response_content, re.MULTILINE)):
+                    try:
+                        patched_code = apply_patch(server_code, response_content, filename=server_file_path.name)
+                        if patched_code.strip() == server_code.strip():
+                            raise PatchApplyError("The edits did not change the code.")
+                        logger.info(f"Applied {len(extract_edits(response_content))} edit(s) from the refiner to the server code.")
+                        agent_logger.log(event_type="patch_applied", edits=len(extract_edits(response_content)),
+                                         original_lines=server_code.count("\n") + 1, patched_lines=patched_code.count("\n") + 1)
+                        refined_code = patched_code
+                        break
+                    except PatchApplyError as e:
+                        # Fall back to full-file mode for the rest of this refinement cycle
+                        logger.warning(f"Refiner patch could not be applied, falling back to full-file mode: {e}")
+                        agent_logger.log(event_type="patch_failed", error=str(e))
+                        patch_mode = False
+                        fallback_msg = (
+                            f"Your edits could not be applied: {e}\n"
+                            "Please provide the complete refined code instead, as a single JSON object enclosed in ```json ... ``` "
+                            "with one field, `refined_code`, containing the entire, raw, runnable Python source code."
+                        )
+                        memory.add_message(HumanMessage(content=fallback_msg))
+                        continue
+
                 json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response_content, re.DOTALL)
                 if json_match:
                     try:
@@ -248,28 +348,14 @@ async def refine_code_node(state: MCPWorkflowState) -> MCPWorkflowState:
             readme_path = refined_dir / "README.md"
             requirements_path = refined_dir / "requirements.txt"
             
-            workspace_dir = PROJECT_ROOT / "workspace"
-            relative_readme_path = readme_path.relative_to(workspace_dir)
-            relative_req_path = requirements_path.relative_to(workspace_dir)
-            
             finalizer_llm = get_llm_for_agent(f"CodeRefiner-Agent-{api_name or 'custom'}")
 
-            logger.info("📄 Generating README.md...")
-            readme_template = load_prompt("code_refiner/generate_readme.prompt")
-            readme_prompt = readme_template.render(refined_code=refined_code, api_name=api_name, mcp_doc=mcp_doc)
-            readme_response = await finalizer_llm.ainvoke([HumanMessage(content=readme_prompt)])
-            await save_file_tool.ainvoke({"file_path": str(relative_readme_path), "content": readme_response.content.strip()})
-            logger.info(f"✅ README.md saved to: {readme_path}")
-            agent_logger.log(event_type="readme_generated", path=str(readme_path))
+            # README and requirements.txt do not depend on each other: generate them concurrently
+            await asyncio.gather(
+                _generate_readme(finalizer_llm, refined_code, api_name, mcp_doc, readme_path, agent_logger),
+                _generate_requirements(finalizer_llm, refined_code, requirements_path, [refined_dir, project_dir], agent_logger),
+            )
             update["readme_path"] = str(readme_path)
-
-            logger.info("📦 Generating requirements.txt...")
-            req_template = load_prompt("code_refiner/generate_requirements.prompt")
-            req_prompt = req_template.render(refined_code=refined_code)
-            req_response = await finalizer_llm.ainvoke([HumanMessage(content=req_prompt)])
-            await save_file_tool.ainvoke({"file_path": str(relative_req_path), "content": req_response.content.strip()})
-            logger.info(f"✅ requirements.txt saved to: {requirements_path}")
-            agent_logger.log(event_type="requirements_generated", path=str(requirements_path))
             update["requirements_path"] = str(requirements_path)
             
             update["next_step"] = "statistics_logger"
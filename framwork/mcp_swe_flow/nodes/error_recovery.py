@@ -28,6 +28,11 @@ def error_recovery_node(state: MCPWorkflowState) -> MCPWorkflowState:
         print("  - Please check detailed logs in terminal for more clues.")
         print("  - Review generated code or related configuration files.")
 
+    # Without a user at the terminal (e.g. batch runs) there is nobody to ask, finish with the statistics report
+    if not state.get("interactive_mode", True):
+        logger.info("Non-interactive mode: skipping recovery prompt and finishing the workflow.")
+        return {**state, "next_step": "statistics_logger"}
+
     # --- Provide specific recovery options based on error source ---
     if error_source == "server_test":
         print("\n🛠️ How would you like to proceed? (Server test failed)")
@@ -105,7 +105,7 @@ def load_input_node(state: MCPWorkflowState) -> MCPWorkflowState:
         agent_logger.log(event_type="user_input_validated", user_input=user_input)
 
     # Determine the next step after successful loading
-    update["next_step"] = "swe_generate" 
+    update["next_step"] = "model_fanout" if state.get("swe_models") else "swe_generate" 
     logger.info(f"Successfully loaded inputs for {mode} mode")
     agent_logger.log(event_type="node_success", mode=mode, update=update)
     logger.info("--- Finished Load Input Node ---")
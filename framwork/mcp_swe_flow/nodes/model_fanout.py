@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+from framwork.mcp_swe_flow.state import MCPWorkflowState
+from framwork.mcp_swe_flow.config import get_env_int
+from framwork.mcp_swe_flow.nodes.swe_generator import generate_server_name_from_user_input
+from framwork.logger import logger, get_agent_logger, get_agent_log_run, agent_log_run
+from framwork.metrics import get_run_metrics
+
+
+def create_model_fanout_node(model_run_app):
+    """
+    Builds the fan-out node around a compiled per-model subgraph
+    (swe_generate -> server_test -> refine_code, see graph.create_model_run_subgraph).
+
+    The node runs the subgraph once per model in `swe_models`, concurrently and capped
+    by `fanout_concurrency` (or FANOUT_CONCURRENCY), then joins the results into
+    `model_runs` so a single statistics report covers the whole comparison.
+    """
+    async def model_fanout_node(state: MCPWorkflowState) -> MCPWorkflowState:
+        agent_logger = get_agent_logger("ModelFanout-Agent")
+        logger.info("--- Starting Model Fan-out Node ---")
+        agent_logger.log(event_type="start_node", swe_models=state.get("swe_models"))
+
+        swe_models = list(dict.fromkeys(state.get("swe_models") or []))
+        if not swe_models:
+            return {**state, "error": "Fan-out mode requires at least one model in 'swe_models'.", "error_source": "model_fanout", "next_step": "error_handler"}
+
+        # Shared inputs are resolved once instead of once per model
+        api_name = state.get("api_name")
+        user_input = state.get("user_input")
+        if not api_name and user_input:
+            api_name = await generate_server_name_from_user_input(user_input, swe_models[0])
+        if not api_name:
+            api_name = "unnamed_mcp_server"
+
+        concurrency = state.get("fanout_concurrency") or get_env_int("FANOUT_CONCURRENCY", len(swe_models))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        parent_run = get_agent_log_run() or uuid.uuid4().hex[:8]
+        logger.info(f"Fanning out '{api_name}' to {len(swe_models)} model(s) with concurrency {concurrency}: {swe_models}")
+
+        async def run_model(model: str) -> Dict[str, Any]:
+            async with semaphore:
+                model_state = {
+                    **state,
+                    "api_name": api_name,
+                    "swe_model": model,
+                    # Nobody can answer prompts from several concurrent runs
+                    "interactive_mode": False,
+                    "log_files": [],
+                    "error": None,
+                    "error_source": None,
+                }
+                logger.info(f"[{model}] Starting model run.")
+                # Agent names repeat across models (same api_name), keep their logs apart
+                model_run_id = f"{parent_run}-{model}"
+                with agent_log_run(model_run_id):
+                    try:
+                        final_state = await model_run_app.ainvoke(model_state)
+                    except Exception as e:
+                        logger.error(f"[{model}] Model run crashed: {e}", exc_info=True)
+                        final_state = None
+                        error = f"{type(e).__name__}: {e}"
+                    # The run's registry is dropped when its log scope ends
+                    metrics = get_run_metrics(model_run_id).snapshot(include_samples=True)
+                if final_state is None:
+                    return {"status": "failed", "error": error, "log_files": [], "metrics": metrics}
+
+                status = "failed" if final_state.get("error") else "success"
+                logger.info(f"[{model}] Model run finished with status '{status}'.")
+                return {
+                    "status": status,
+                    "error": final_state.get("error"),
+                    "error_source": final_state.get("error_source"),
+                    "server_file_path": final_state.get("server_file_path"),
+                    "project_dir": final_state.get("project_dir"),
+                    "test_report_path": final_state.get("test_report_path"),
+                    "refined_code_path": final_state.get("refined_code_path"),
+                    "refinement_loop_count": final_state.get("refinement_loop_count", 0),
+                    "log_files": final_state.get("log_files", []),
+                    "metrics": metrics,
+                }
+
+        results = await asyncio.gather(*[run_model(model) for model in swe_models])
+        model_runs = dict(zip(swe_models, results))
+
+        log_files = list(state.get("log_files", []))
+        for run in results:
+            log_files.extend(f for f in run["log_files"] if f not in log_files)
+        if str(agent_logger.log_path) not in log_files:
+            log_files.append(str(agent_logger.log_path))
+
+        # The joined report lives next to the per-model outputs
+        fanout_dir = Path("workspace") / "fanout-runs" / api_name
+        fanout_dir.mkdir(parents=True, exist_ok=True)
+
+        succeeded = [model for model, run in model_runs.items() if run["status"] == "success"]
+        update = {
+            "api_name": api_name,
+            "model_runs": model_runs,
+            "log_files": log_files,
+            "project_dir": str(fanout_dir.resolve()),
+            "next_step": "statistics_logger",
+        }
+        if not succeeded:
+            update["error"] = f"All {len(swe_models)} model runs failed."
+            update["error_source"] = "model_fanout"
+
+        agent_logger.log(event_type="end_node", succeeded=succeeded,
+                         failed=[model for model in swe_models if model not in succeeded])
+        logger.info(f"--- Finished Model Fan-out Node: {len(succeeded)}/{len(swe_models)} model run(s) succeeded ---")
+        return {**state, **update}
+
+    return model_fanout_node
@@ -0,0 +1,249 @@
+import ast
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from framwork.mcp_swe_flow.state import MCPWorkflowState
+from framwork.mcp_swe_flow.config import PROJECT_ROOT, get_env_int
+from framwork.mcp_swe_flow.utils.code_analysis import (
+    extract_mcp_tools,
+    find_fastmcp_instances,
+    find_missing_imports
+)
+from framwork.logger import logger, get_agent_logger
+
+# Static checks and a sandboxed import of the generated server, run before server_test_node.
+# A server that fails them goes straight back to the refiner with the diagnostics, without
+# starting an MCP session or asking an LLM for a test plan.
+PREFLIGHT_ENABLED = os.getenv("PREFLIGHT_ENABLED", "true").lower() == "true"
+PREFLIGHT_IMPORT_TIMEOUT = get_env_int("PREFLIGHT_IMPORT_TIMEOUT", 15)
+
+RESULT_MARKER = "__PREFLIGHT_RESULT__"
+
+# Imports the server in a fresh interpreter. The `if __name__ == "__main__"` guard keeps the
+# server from starting; anything raised at import time (including SystemExit) is reported.
+_IMPORT_CHECK_SCRIPT = f"""
+import importlib, importlib.util, json, os, sys, traceback
+target, server_path = sys.argv[1], os.path.realpath(sys.argv[2])
+result = {{"ok": True}}
+try:
+    if target.endswith(".py"):
+        spec = importlib.util.spec_from_file_location("__preflight_server__", target)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    else:
+        importlib.import_module(target)
+except BaseException as e:
+    frames = [f for f in traceback.extract_tb(e.__traceback__) if os.path.realpath(f.filename) == server_path]
+    result = {{
+        "ok": False,
+        "error_type": type(e).__name__,
+        "message": str(e),
+        "lineno": frames[-1].lineno if frames else None,
+        "traceback": "".join(traceback.format_exception(type(e), e, e.__traceback__, limit=-6)),
+    }}
+sys.stdout.flush()
+print("{RESULT_MARKER}" + json.dumps(result))
+"""
+
+
+def _diagnostic(severity: str, check: str, message: str, lineno: int = None) -> Dict[str, Any]:
+    return {"severity": severity, "check": check, "message": message, "lineno": lineno}
+
+
+def _import_target(server_file_path: Path) -> str:
+    """Module name (or file path) the server is started from, mirroring server_test_node."""
+    if "gemini-2.5-pro" in str(server_file_path):
+        return str(server_file_path)
+    try:
+        relative_path = server_file_path.relative_to(PROJECT_ROOT)
+    except ValueError:
+        return str(server_file_path)
+    return str(relative_path).replace(".py", "").replace(os.path.sep, ".")
+
+
+def _static_checks(tree: ast.Module, server_file_path: Path) -> Dict[str, Any]:
+    diagnostics = []
+
+    server_names = find_fastmcp_instances(tree)
+    if not server_names:
+        diagnostics.append(_diagnostic("warning", "server", "No module-level `FastMCP(...)` instance found."))
+    else:
+        runs_server = any(
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "run" and isinstance(node.func.value, ast.Name) and node.func.value.id in server_names
+            for node in ast.walk(tree)
+        )
+        if not runs_server:
+            diagnostics.append(_diagnostic("error", "server", f"`{server_names[0]}.run()` is never called, the server process would exit immediately instead of serving stdio."))
+
+    tools = extract_mcp_tools(tree)
+    if not tools:
+        diagnostics.append(_diagnostic("error", "tools", "No function is registered with `@mcp.tool()`, the server would expose no tools."))
+    for name, count in Counter(tool["name"] for tool in tools).items():
+        if count > 1:
+            diagnostics.append(_diagnostic("error", "tools", f"Tool name '{name}' is registered {count} times."))
+    for tool in tools:
+        unannotated = [p["name"] for p in tool["parameters"] if p["annotation"] is None and p["name"] not in ("self", "ctx")]
+        if unannotated:
+            diagnostics.append(_diagnostic("warning", "tools", f"Tool '{tool['name']}' has parameters without type annotations ({', '.join(unannotated)}), their input schema will be untyped.", tool["lineno"]))
+        if not tool["has_docstring"]:
+            diagnostics.append(_diagnostic("warning", "tools", f"Tool '{tool['name']}' has no docstring, clients will see no description.", tool["lineno"]))
+
+    for missing in find_missing_imports(tree, search_dirs=[server_file_path.parent]):
+        severity = "warning" if missing["optional"] else "error"
+        diagnostics.append(_diagnostic(severity, "dependencies", f"Module '{missing['module']}' is not installed in the server's interpreter ({sys.executable}).", missing["lineno"]))
+
+    signatures = [
+        {key: tool[key] for key in ("name", "function", "is_async", "lineno", "parameters", "returns", "has_docstring")}
+        for tool in tools
+    ]
+    return {"diagnostics": diagnostics, "tools": signatures}
+
+
+async def _sandboxed_import(server_file_path: Path) -> Dict[str, Any]:
+    """Imports the server in a subprocess with a timeout; returns an 'import' diagnostic on failure, else None."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", _IMPORT_CHECK_SCRIPT, _import_target(server_file_path), str(server_file_path),
+        cwd=str(PROJECT_ROOT),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=PREFLIGHT_IMPORT_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return _diagnostic("error", "import", f"Importing the server did not finish within {PREFLIGHT_IMPORT_TIMEOUT}s; module-level code is blocking (e.g. a network call or an input() prompt outside the tools).")
+
+    result_line = next((line for line in reversed(stdout.decode("utf-8", errors="replace").splitlines()) if line.startswith(RESULT_MARKER)), None)
+    if result_line is None:
+        stderr_tail = stderr.decode("utf-8", errors="replace")[-2000:]
+        return _diagnostic("error", "import", f"Importing the server crashed the interpreter (exit code {process.returncode}):\n{stderr_tail}")
+
+    result = json.loads(result_line[len(RESULT_MARKER):])
+    if result["ok"]:
+        return None
+    diagnostic = _diagnostic("error", "import", f"Importing the server raised {result['error_type']}: {result['message']}", result.get("lineno"))
+    diagnostic["traceback"] = result["traceback"]
+    return diagnostic
+
+
+async def run_preflight(server_file_path: Path, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Runs the pre-flight checks on a server file:
+    compile, static @mcp.tool / server / dependency checks, then a sandboxed import
+    (skipped when the static checks already found errors).
+    """
+    started_at = time.perf_counter()
+    if source is None:
+        source = server_file_path.read_text(encoding="utf-8")
+    report: Dict[str, Any] = {"server_file_path": str(server_file_path), "diagnostics": [], "tools": []}
+
+    try:
+        tree = ast.parse(source, filename=server_file_path.name)
+        compile(tree, server_file_path.name, "exec")
+    except SyntaxError as e:
+        line = (e.text or "").rstrip()
+        report["diagnostics"].append(_diagnostic("error", "syntax", f"{e.msg}: `{line.strip()}`" if line else e.msg, e.lineno))
+        tree = None
+
+    if tree is not None:
+        static = _static_checks(tree, server_file_path)
+        report["diagnostics"].extend(static["diagnostics"])
+        report["tools"] = static["tools"]
+        if not any(d["severity"] == "error" for d in report["diagnostics"]):
+            import_error = await _sandboxed_import(server_file_path)
+            if import_error:
+                report["diagnostics"].append(import_error)
+
+    report["passed"] = not any(d["severity"] == "error" for d in report["diagnostics"])
+    report["duration_s"] = round(time.perf_counter() - started_at, 3)
+    return report
+
+
+def format_preflight_report(report: Dict[str, Any]) -> str:
+    """Markdown diagnostics handed to the refiner in place of a runtime test report."""
+    lines = [
+        "# Pre-flight Check Report",
+        "",
+        f"**Status: {'PASSED' if report['passed'] else 'FAILED'}** - the server was not started for runtime testing; "
+        "these problems were found statically or while importing the module.",
+        "",
+    ]
+    for severity, title in (("error", "Errors (must be fixed)"), ("warning", "Warnings")):
+        entries = [d for d in report["diagnostics"] if d["severity"] == severity]
+        if not entries:
+            continue
+        lines += [f"## {title}", ""]
+        for d in entries:
+            location = f" (line {d['lineno']})" if d.get("lineno") else ""
+            lines.append(f"- [{d['check']}]{location} {d['message']}")
+            if d.get("traceback"):
+                lines += ["", "```", d["traceback"].rstrip(), "```"]
+        lines.append("")
+    if report["tools"]:
+        lines += ["## Tools found", ""]
+        for tool in report["tools"]:
+            params = ", ".join(f"{p['name']}: {p['annotation'] or '?'}" + (" = ..." if p["has_default"] else "") for p in tool["parameters"])
+            lines.append(f"- `{tool['name']}({params})` -> {tool['returns'] or '?'} (line {tool['lineno']})")
+    return "\n".join(lines)
+
+
+async def preflight_node(state: MCPWorkflowState) -> MCPWorkflowState:
+    """
+    Zero-LLM gate in front of server_test_node. Servers that don't compile, can't be
+    imported or expose no tools are sent back to refine_code with precise diagnostics.
+    """
+    api_name = state.get("api_name")
+    agent_logger = get_agent_logger(f"Preflight-Agent-{api_name or 'custom'}")
+    log_files = state.get("log_files", [])
+    if agent_logger.log_path and str(agent_logger.log_path) not in log_files:
+        log_files.append(str(agent_logger.log_path))
+
+    # A report from an earlier pass must not reach the refiner as if it described this code
+    if not PREFLIGHT_ENABLED:
+        return {**state, "preflight_report": None, "log_files": log_files, "next_step": "server_test"}
+
+    logger.info("--- Starting Pre-flight Check Node ---")
+    agent_logger.log(event_type="start_node", server_file_path=state.get("server_file_path"))
+
+    try:
+        server_file_path = Path(state.get("server_file_path") or "")
+        if not server_file_path.is_file():
+            raise FileNotFoundError(f"Server file not found: {server_file_path}")
+        server_code = server_file_path.read_text(encoding="utf-8")
+        report = await run_preflight(server_file_path, server_code)
+    except Exception as e:
+        # The gate is an optimization, let the runtime test report the problem
+        logger.warning(f"Pre-flight check could not run, continuing with the server test: {e}")
+        agent_logger.log(event_type="preflight_skipped", error=str(e))
+        agent_logger.log(event_type="end_node", next_step="server_test")
+        return {**state, "preflight_report": None, "log_files": log_files, "next_step": "server_test"}
+
+    errors = [d for d in report["diagnostics"] if d["severity"] == "error"]
+    # The file may have been edited since generation (human confirmation), the refiner works on it
+    update: Dict[str, Any] = {"preflight_report": report, "server_code": server_code, "log_files": log_files}
+    if report["passed"]:
+        logger.info(f"✅ Pre-flight passed in {report['duration_s']}s: {len(report['tools'])} tool(s), {len(report['diagnostics'])} warning(s).")
+        update["next_step"] = "server_test"
+    else:
+        for d in errors:
+            logger.error(f"❌ Pre-flight [{d['check']}] line {d.get('lineno')}: {d['message']}")
+        logger.info(f"Pre-flight failed in {report['duration_s']}s, sending {len(errors)} error(s) to the refiner.")
+        update["test_report_content"] = format_preflight_report(report)
+        update["next_step"] = "refine_code"
+
+    agent_logger.log(event_type="end_node", passed=report["passed"], duration_s=report["duration_s"],
+                     diagnostics=report["diagnostics"], tools=[t["name"] for t in report["tools"]])
+    logger.info("--- ✅ Pre-flight Check Node Completed ---")
+    return {**state, **update}
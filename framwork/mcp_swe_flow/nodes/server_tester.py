@@ -4,113 +4,39 @@ import os
 import sys
 import traceback
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Sequence, Set, Tuple
 import re
 
-from langchain_core.messages import HumanMessage
 from framwork.mcp_swe_flow.state import MCPWorkflowState
-from framwork.mcp_swe_flow.config import PROJECT_ROOT, get_llm_for_agent
+from framwork.mcp_swe_flow.config import PROJECT_ROOT, get_llm_for_agent, get_env_int
 from framwork.tool import save_file_tool
-from framwork.mcp_swe_flow.adapters import MCPClientAdapter
+from framwork.mcp_swe_flow.adapters import MCPClientAdapter, MCPToolAdapter
 from framwork.logger import logger, get_agent_logger
+from framwork.tool_hints import READ_ONLY_TOOL_VERBS
 from framwork.mcp_swe_flow.prompts.utils import load_prompt
+from framwork.mcp_swe_flow.utils.code_analysis import tool_fingerprints
+from framwork.mcp_swe_flow.utils.placeholders import (
+    StepOutputs,
+    compile_parameters,
+    placeholder_dependencies,
+    resolve_parameters
+)
 
-def _substitute_parameters(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+# Test plan steps run as a dependency graph: a step starts once the steps it references via
+# $outputs have finished. Steps that may change server state run alone, in plan order.
+TEST_PLAN_CONCURRENCY = get_env_int("TEST_PLAN_CONCURRENCY", 4)
+# Extra server processes for parallel-safe steps, for servers that can't handle concurrent
+# requests on one session. Only suitable for servers that keep no state between calls.
+TEST_PLAN_SESSIONS = get_env_int("TEST_PLAN_SESSIONS", 1)
+
+def _validate_test_plan(test_plan: List[Dict[str, Any]], known_step_ids: Optional[Set[str]] = None) -> Dict[str, Any]:
     """
-    Recursively substitutes placeholders in a parameter dictionary.
-    This version uses a robust greedy traversal logic to handle keys containing dots.
-    Placeholder format: "$outputs.step_id.json_path" or "$outputs.step_id[index].json_path"
+    Validates the structure and logic of the test plan. known_step_ids are steps reused from
+    the previous test round, which the plan may reference.
+    Returns the step parameters with their $outputs placeholders compiled, keyed by step_id.
     """
-    substituted_params = {}
-    for key, value in params.items():
-        if isinstance(value, str) and value.startswith("$outputs."):
-            try:
-                placeholder = value.replace("$outputs.", "")
-                
-                # Extract step_id using regex, stopping at the first '[' or '.'
-                match = re.match(r'^([a-zA-Z0-9_]+)', placeholder)
-                if not match:
-                    raise ValueError(f"Invalid placeholder format: could not extract step_id from '{placeholder}'")
-                
-                step_id = match.group(1)
-                path_to_process = placeholder[len(step_id):]
-                
-                if step_id not in outputs:
-                    raise KeyError(f"Step ID '{step_id}' not found in outputs")
-
-                current_value = outputs[step_id]['result']
-                
-                # --- Robust JSON parsing ---
-                if isinstance(current_value, str):
-                    json_match = re.search(r'```json\s*([\s\S]*?)\s*```', current_value, re.DOTALL)
-                    str_to_parse = json_match.group(1).strip() if json_match else current_value
-                    try:
-                        current_value = json.loads(str_to_parse)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Could not parse output from step '{step_id}' as JSON. Proceeding with raw string.")
-                
-                # --- Greedy Traversal Logic ---
-                while path_to_process:
-                    # Check for index access first
-                    match_index = re.match(r'\[(\d+)\]', path_to_process)
-                    if match_index:
-                        index = int(match_index.group(1))
-                        if not isinstance(current_value, list):
-                            raise TypeError(f"Cannot apply index [{index}] to non-list value (type: {type(current_value).__name__}).")
-                        current_value = current_value[index]
-                        path_to_process = path_to_process[match_index.end():]
-                        continue
-
-                    # If not an index, it must be a dot-prefixed key
-                    if not path_to_process.startswith('.'):
-                        raise ValueError(f"Invalid path segment in placeholder: '{path_to_process}'")
-                    
-                    path_to_process = path_to_process[1:] # Consume the dot
-                    
-                    # Find the end of the current key segment (before next '[' or end of string)
-                    key_segment_match = re.match(r'[^\[\]]+', path_to_process)
-                    key_segment = key_segment_match.group(0)
-                    
-                    # Process this segment using greedy key matching
-                    sub_keys_to_process = key_segment.split('.')
-                    while sub_keys_to_process:
-                        matched = False
-                        # Try to match the longest possible key from the remaining parts
-                        for i in range(len(sub_keys_to_process), 0, -1):
-                            potential_key = ".".join(sub_keys_to_process[0:i])
-                            if isinstance(current_value, dict) and potential_key in current_value:
-                                current_value = current_value[potential_key]
-                                # Consume the matched parts
-                                sub_keys_to_process = sub_keys_to_process[i:]
-                                matched = True
-                                break # Restart the while loop with remaining sub_keys
-                        
-                        if not matched:
-                            unresolved_key = ".".join(sub_keys_to_process)
-                            raise KeyError(f"Could not resolve key '{unresolved_key}' in placeholder '{value}'")
-                    
-                    # Consume the processed segment from the main path
-                    path_to_process = path_to_process[len(key_segment):]
-
-                substituted_params[key] = current_value
-
-            except (KeyError, TypeError, IndexError, ValueError) as e:
-                logger.error(f"❌ Failed to resolve placeholder '{value}': {e}")
-                substituted_params[key] = None # Mark as failed
-        elif isinstance(value, dict):
-            substituted_params[key] = _substitute_parameters(value, outputs)
-        elif isinstance(value, list):
-            substituted_params[key] = [
-                _substitute_parameters(item, outputs) if isinstance(item, dict) else item
-                for item in value
-            ]
-        else:
-            substituted_params[key] = value
-    return substituted_params
-
-def _validate_test_plan(test_plan: List[Dict[str, Any]]):
-    """Validates the structure and logic of the test plan."""
-    defined_step_ids = set()
+    defined_step_ids = set(known_step_ids or ())
+    compiled_parameters = {}
     for i, step in enumerate(test_plan):
         if not all(k in step for k in ["step_id", "tool_name", "parameters", "description"]):
             raise ValueError(f"Test plan step {i+1} is missing required fields ('step_id', 'tool_name', 'parameters', 'description').")
@@ -119,101 +45,264 @@ def _validate_test_plan(test_plan: List[Dict[str, Any]]):
         if step_id in defined_step_ids:
             raise ValueError(f"Found duplicate step_id in test plan: '{step_id}'")
         
-        params_str = json.dumps(step["parameters"])
-        dependencies = re.findall(r'"\$outputs\.([^.\["]+)', params_str)
-        for dep_id in dependencies:
+        compiled = compile_parameters(step["parameters"])
+        for dep_id in placeholder_dependencies(compiled):
             if dep_id not in defined_step_ids:
                 raise ValueError(f"Step '{step_id}' depends on an undefined step '{dep_id}'.")
         
+        compiled_parameters[step_id] = compiled
         defined_step_ids.add(step_id)
     logger.info("✅ Test plan validation passed.")
+    return compiled_parameters
 
 
-async def _execute_test_plan(mcp_adapter: MCPClientAdapter, test_plan: List[Dict[str, Any]], agent_logger) -> List[Dict[str, Any]]:
+def _is_parallel_safe(step: Dict[str, Any], tool: Optional[MCPToolAdapter]) -> bool:
     """
-    Executes the test plan, handling dependencies and logging results.
-    This function does not interact with an LLM.
+    Whether a step may run concurrently with other parallel-safe steps: an explicit
+    `parallel_safe` in the plan wins, then the tool's readOnlyHint, then a read-only verb
+    at the start of the tool name (e.g. get_weather, searchPapers, arxiv.list_categories).
     """
-    logger.info("🚀 Starting test plan execution...")
-    execution_log = []
-    step_outputs = {}
+    if isinstance(step.get("parallel_safe"), bool):
+        return step["parallel_safe"]
+    if tool is not None and tool.read_only_hint is not None:
+        return tool.read_only_hint
+    name = str(step.get("tool_name", "")).rsplit(".", 1)[-1]
+    verb = re.split(r"[_\-\s]|(?<=[a-z0-9])(?=[A-Z])", name)[0].lower()
+    return verb in READ_ONLY_TOOL_VERBS
+
 
+def _build_step_prerequisites(test_plan: List[Dict[str, Any]], compiled_parameters: Dict[str, Any], parallel_safe: List[bool]) -> List[Set[int]]:
+    """
+    Plan indexes each step has to wait for. Besides its `$outputs` dependencies, a step that is
+    not parallel-safe waits for every earlier step, and every step waits for the last earlier
+    step that is not parallel-safe, so state-changing calls keep their place in the plan.
+    """
+    index_by_id = {step["step_id"]: i for i, step in enumerate(test_plan)}
+    prerequisites = []
+    last_exclusive = None
+    since_last_exclusive: List[int] = []
     for i, step in enumerate(test_plan):
-        step_id = step.get("step_id")
-        tool_name = step.get("tool_name")
-        params = step.get("parameters", {})
-        description = step.get("description", "No description")
+        # Dependencies outside the plan are reused results, already available
+        waits_for = {index_by_id[dep_id] for dep_id in placeholder_dependencies(compiled_parameters[step["step_id"]]) if dep_id in index_by_id}
+        if last_exclusive is not None:
+            waits_for.add(last_exclusive)
+        if not parallel_safe[i]:
+            waits_for.update(since_last_exclusive)
+            last_exclusive = i
+            since_last_exclusive = []
+        else:
+            since_last_exclusive.append(i)
+        prerequisites.append(waits_for)
+    return prerequisites
 
-        logger.info(f"🔄 (Step {i+1}/{len(test_plan)}) Preparing to execute: {step_id} - {tool_name}")
-        agent_logger.log(event_type="test_step_start", step_id=step_id, tool_name=tool_name, description=description)
 
-        substituted_params = _substitute_parameters(params, step_outputs)
-        
-        try:
-            # Propagate failure: if any substituted parameter is None due to a previous step's failure, this step should also fail.
-            if any(v is None for v in substituted_params.values()):
-                # Find the first placeholder that resolved to None
-                failed_placeholder = next((p_val for p_key, p_val in params.items() if substituted_params.get(p_key) is None), "unknown")
-                raise ValueError(f"A required parameter resolved to None, likely due to a failure in a dependency. Failed placeholder: '{failed_placeholder}'")
-
-            tool_to_invoke = next((t for t in mcp_adapter.tools if t.name == tool_name), None)
-            if not tool_to_invoke:
-                raise ValueError(f"Tool '{tool_name}' not found in adapter")
-
-            # Enhanced robustness: add a 60-second timeout for the tool call
-            result = await asyncio.wait_for(
-                tool_to_invoke.ainvoke(substituted_params),
-                timeout=60.0
-            )
+async def _run_test_step(mcp_adapter: MCPClientAdapter, step: Dict[str, Any], compiled_params: Dict[str, Any],
+                         step_outputs: StepOutputs, agent_logger) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Executes one step on the given session; returns the substituted parameters and the step result."""
+    step_id = step.get("step_id")
+    tool_name = step.get("tool_name")
+    params = step.get("parameters", {})
+    description = step.get("description", "No description")
 
-            # 检查结果是否包含错误信息，但排除适配器截断标记
-            is_error_in_result = isinstance(result, str) and (
-                ("error" in result.lower() 
-                or "failed" in result.lower() 
-                or "invalid" in result.lower()
-                or "exception" in result.lower())
-                # 排除适配器截断标记导致的误判
-                and not ("adapter_truncation_note" in result.lower() or "__adapter_truncation_note__" in result.lower())
-            )
+    agent_logger.log(event_type="test_step_start", step_id=step_id, tool_name=tool_name, description=description)
 
-            if is_error_in_result:
-                logger.warning(f"    - ⚠️  Tool '{tool_name}' returned a potential error message: {result}")
-                step_result = {"status": "error", "result": result}
-                agent_logger.log(event_type="test_step_error", step_id=step_id, error=f"Tool returned an error message: {result}")
+    substituted_params, resolution_errors = resolve_parameters(compiled_params, step_outputs)
+    for error in resolution_errors:
+        logger.error(f"❌ Failed to resolve placeholder '{error.placeholder}': {error}")
+    
+    try:
+        # Propagate failure: if any substituted parameter is None due to a previous step's failure, this step should also fail.
+        if resolution_errors:
+            raise ValueError(f"A required parameter could not be resolved, likely due to a failure in a dependency. {resolution_errors[0]}")
+        if any(v is None for v in substituted_params.values()):
+            # Find the first parameter that resolved to None
+            failed_placeholder = next((p_val for p_key, p_val in params.items() if substituted_params.get(p_key) is None), "unknown")
+            raise ValueError(f"A required parameter resolved to None, likely due to a failure in a dependency. Failed placeholder: '{failed_placeholder}'")
+
+        tool_to_invoke = next((t for t in mcp_adapter.tools if t.name == tool_name), None)
+        if not tool_to_invoke:
+            raise ValueError(f"Tool '{tool_name}' not found in adapter")
+
+        # Enhanced robustness: add a 60-second timeout for the tool call
+        result = await asyncio.wait_for(
+            tool_to_invoke.ainvoke(substituted_params),
+            timeout=60.0
+        )
+
+        # 检查结果是否包含错误信息，但排除适配器截断标记
+        is_error_in_result = isinstance(result, str) and (
+            ("error" in result.lower() 
+            or "failed" in result.lower() 
+            or "invalid" in result.lower()
+            or "exception" in result.lower())
+            # 排除适配器截断标记导致的误判
+            and not ("adapter_truncation_note" in result.lower() or "__adapter_truncation_note__" in result.lower())
+        )
+
+        if is_error_in_result:
+            logger.warning(f"    - ⚠️  Tool '{tool_name}' returned a potential error message: {result}")
+            step_result = {"status": "error", "result": result}
+            agent_logger.log(event_type="test_step_error", step_id=step_id, error=f"Tool returned an error message: {result}")
+        else:
+            # 检查是否存在适配器截断标记
+            has_adapter_truncation = isinstance(result, str) and ("adapter_truncation_note" in result.lower() or "__adapter_truncation_note__" in result.lower())
+            if has_adapter_truncation:
+                logger.info(f"    - ℹ️ Execution successful with adapter truncation (not a tool error): {result[:200]}...")
             else:
-                # 检查是否存在适配器截断标记
-                has_adapter_truncation = isinstance(result, str) and ("adapter_truncation_note" in result.lower() or "__adapter_truncation_note__" in result.lower())
-                if has_adapter_truncation:
-                    logger.info(f"    - ℹ️ Execution successful with adapter truncation (not a tool error): {result[:200]}...")
-                else:
-                    logger.info(f"    - ✅ Execution successful: {result}")
-                    
-                step_result = {"status": "success", "result": result}
-                agent_logger.log(event_type="test_step_success", step_id=step_id, result=result)
-        
-        except asyncio.TimeoutError:
-            error_msg = f"Tool '{tool_name}' execution timed out (exceeded 60 seconds)."
-            logger.error(f"    - ❌ {error_msg}")
-            step_result = {"status": "error", "result": error_msg}
-            agent_logger.log(event_type="test_step_timeout", step_id=step_id, error=error_msg)
+                logger.info(f"    - ✅ Execution successful: {result}")
+                
+            step_result = {"status": "success", "result": result}
+            agent_logger.log(event_type="test_step_success", step_id=step_id, result=result)
+    
+    except asyncio.TimeoutError:
+        error_msg = f"Tool '{tool_name}' execution timed out (exceeded 60 seconds)."
+        logger.error(f"    - ❌ {error_msg}")
+        step_result = {"status": "error", "result": error_msg}
+        agent_logger.log(event_type="test_step_timeout", step_id=step_id, error=error_msg)
 
-        except Exception as e:
-            error_msg = f"Tool '{tool_name}' call failed: {e}"
-            logger.error(f"    - ❌ {error_msg}")
-            step_result = {"status": "error", "result": str(e)}
-            agent_logger.log(event_type="test_step_error", step_id=step_id, error=str(e))
-        
+    except Exception as e:
+        error_msg = f"Tool '{tool_name}' call failed: {e}"
+        logger.error(f"    - ❌ {error_msg}")
+        step_result = {"status": "error", "result": str(e)}
+        agent_logger.log(event_type="test_step_error", step_id=step_id, error=str(e))
+
+    return substituted_params, step_result
+
+
+async def _execute_test_plan(mcp_adapter: MCPClientAdapter, test_plan: List[Dict[str, Any]], agent_logger,
+                             extra_adapters: Sequence[MCPClientAdapter] = (),
+                             compiled_parameters: Optional[Dict[str, Any]] = None,
+                             seed_outputs: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Executes the test plan as a dependency graph, handling dependencies and logging results.
+    Parallel-safe steps run concurrently (up to TEST_PLAN_CONCURRENCY), spread over the extra
+    sessions when given; the execution log keeps the plan order. seed_outputs holds results of
+    steps reused from the previous round, which placeholders may reference.
+    This function does not interact with an LLM.
+    """
+    logger.info("🚀 Starting test plan execution...")
+    if compiled_parameters is None:
+        compiled_parameters = {step["step_id"]: compile_parameters(step.get("parameters", {})) for step in test_plan}
+    tools_by_name = {tool.name: tool for tool in mcp_adapter.tools}
+    if TEST_PLAN_CONCURRENCY > 1:
+        parallel_safe = [_is_parallel_safe(step, tools_by_name.get(step.get("tool_name"))) for step in test_plan]
+    else:
+        parallel_safe = [False] * len(test_plan)
+    prerequisites = _build_step_prerequisites(test_plan, compiled_parameters, parallel_safe)
+    logger.info(f"🧭 {sum(parallel_safe)}/{len(test_plan)} steps are parallel-safe "
+                f"(concurrency {TEST_PLAN_CONCURRENCY}, {1 + len(extra_adapters)} session(s)).")
+    agent_logger.log(event_type="test_plan_schedule", parallel_safe=parallel_safe,
+                     prerequisites=[sorted(p) for p in prerequisites], sessions=1 + len(extra_adapters))
+
+    execution_log: List[Optional[Dict[str, Any]]] = [None] * len(test_plan)
+    step_outputs = StepOutputs()
+    for step_id, step_result in (seed_outputs or {}).items():
         step_outputs[step_id] = step_result
-        execution_log.append({
-            "step": step,
-            "substituted_params": substituted_params,
-            "result": step_result
-        })
+    finished = [asyncio.Event() for _ in test_plan]
+    # Non-reentrant servers: with extra sessions, each session runs one step at a time
+    idle_adapters: asyncio.Queue = asyncio.Queue()
+    for adapter in [mcp_adapter, *extra_adapters]:
+        idle_adapters.put_nowait(adapter)
+    limit = TEST_PLAN_CONCURRENCY if not extra_adapters else min(TEST_PLAN_CONCURRENCY, idle_adapters.qsize())
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(i: int, step: Dict[str, Any]):
+        for j in sorted(prerequisites[i]):
+            await finished[j].wait()
+        try:
+            async with semaphore:
+                logger.info(f"🔄 (Step {i+1}/{len(test_plan)}) Preparing to execute: {step.get('step_id')} - {step.get('tool_name')}")
+                if parallel_safe[i] and extra_adapters:
+                    adapter = await idle_adapters.get()
+                    try:
+                        substituted_params, step_result = await _run_test_step(adapter, step, compiled_parameters[step['step_id']], step_outputs, agent_logger)
+                    finally:
+                        idle_adapters.put_nowait(adapter)
+                else:
+                    # Steps that are not parallel-safe run alone, on the primary session
+                    substituted_params, step_result = await _run_test_step(mcp_adapter, step, compiled_parameters[step['step_id']], step_outputs, agent_logger)
+            step_outputs[step.get("step_id")] = step_result
+            execution_log[i] = {
+                "step": step,
+                "substituted_params": substituted_params,
+                "result": step_result
+            }
+        finally:
+            finished[i].set()
+
+    await asyncio.gather(*(run(i, step) for i, step in enumerate(test_plan)))
 
     logger.info("✅ Test plan execution completed.")
     return execution_log
 
 
+def _reusable_test_results(state: MCPWorkflowState, fingerprints: Dict[str, str], tool_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Execution log entries of the previous test round for the tools whose fingerprint didn't change."""
+    if state.get("full_retest"):
+        return {}
+    previous_fingerprints = state.get("tool_fingerprints") or {}
+    previous_results = state.get("tool_test_results") or {}
+    return {
+        name: previous_results[name]
+        for name in tool_names
+        if previous_results.get(name) and fingerprints.get(name) and previous_fingerprints.get(name) == fingerprints[name]
+    }
+
+
+def _format_reused_steps(reused_entries: List[Dict[str, Any]]) -> str:
+    """Summary of reused steps for the planner, so it can reference their outputs instead of re-testing them."""
+    lines = []
+    for entry in reused_entries:
+        result = entry["result"].get("result")
+        preview = result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+        preview = preview if len(preview) <= 300 else preview[:300] + "..."
+        lines.append(f"- `{entry['step']['step_id']}` ({entry['step']['tool_name']}, {entry['result'].get('status')}): {preview}")
+    return "\n".join(lines)
+
+
+def _drop_reused_tool_steps(test_plan: List[Dict[str, Any]], reused_tools: Set[str]) -> List[Dict[str, Any]]:
+    """Removes steps for tools whose results are reused, unless a remaining step references their output."""
+    if not reused_tools:
+        return test_plan
+    kept = list(test_plan)
+    while True:
+        referenced = {dep_id for step in kept for dep_id in placeholder_dependencies(compile_parameters(step.get("parameters", {})))}
+        remaining = [step for step in kept if step.get("tool_name") not in reused_tools or step.get("step_id") in referenced]
+        if len(remaining) == len(kept):
+            break
+        kept = remaining
+    if len(kept) < len(test_plan):
+        logger.info(f"♻️ Dropped {len(test_plan) - len(kept)} planned step(s) for tools with reused results.")
+    return kept
+
+
+def _group_results_by_tool(execution_log: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in execution_log:
+        grouped.setdefault(entry["step"].get("tool_name"), []).append({key: value for key, value in entry.items() if key != "reused"})
+    return grouped
+
+
+async def _connect_server(mcp_adapter: MCPClientAdapter, server_file_path: Path, agent_logger=None):
+    """Starts the server under test and connects the adapter to it over stdio."""
+    # 根据路径特征选择合适的连接方式
+    if "gemini-2.5-pro" in str(server_file_path):
+        logger.info(f"🔍 检测到 Gemini 模型生成的服务器，使用文件路径方式连接")
+        logger.info(f"🚀 Starting and connecting to MCP server file: {server_file_path}")
+        await mcp_adapter.connect_stdio_file(str(server_file_path), cwd=PROJECT_ROOT)
+        if agent_logger:
+            agent_logger.log(event_type="mcp_adapter_connected", connection_type="file", file_path=str(server_file_path))
+    else:
+        # 原有的模块导入方式
+        relative_path = server_file_path.relative_to(PROJECT_ROOT) 
+        module_name = str(relative_path).replace(".py", "").replace(os.path.sep, ".")
+        
+        logger.info(f"🚀 Starting and connecting to MCP server module: {module_name}")
+        await mcp_adapter.connect_stdio(module_name, cwd=PROJECT_ROOT)
+        if agent_logger:
+            agent_logger.log(event_type="mcp_adapter_connected", connection_type="module", module_name=module_name)
+
+
 async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
     """
     Server test node, using a "Plan-Execute-Report" three-stage model.
@@ -231,6 +320,7 @@ async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
     
     update = {}
     mcp_adapter = MCPClientAdapter()    
+    extra_adapters: List[MCPClientAdapter] = []
     
     try:
         server_file_path_str = state.get("server_file_path")
@@ -250,20 +340,7 @@ async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
         update["server_code"] = server_code
         logger.info(f"✅ Successfully read server code: {server_file_path}")
 
-        # 根据路径特征选择合适的连接方式
-        if "gemini-2.5-pro" in str(server_file_path):
-            logger.info(f"🔍 检测到 Gemini 模型生成的服务器，使用文件路径方式连接")
-            logger.info(f"🚀 Starting and connecting to MCP server file: {server_file_path}")
-            await mcp_adapter.connect_stdio_file(str(server_file_path), cwd=PROJECT_ROOT)
-            agent_logger.log(event_type="mcp_adapter_connected", connection_type="file", file_path=str(server_file_path))
-        else:
-            # 原有的模块导入方式
-            relative_path = server_file_path.relative_to(PROJECT_ROOT) 
-            module_name = str(relative_path).replace(".py", "").replace(os.path.sep, ".")
-            
-            logger.info(f"🚀 Starting and connecting to MCP server module: {module_name}")
-            await mcp_adapter.connect_stdio(module_name, cwd=PROJECT_ROOT)
-            agent_logger.log(event_type="mcp_adapter_connected", connection_type="module", module_name=module_name)
+        await _connect_server(mcp_adapter, server_file_path, agent_logger)
         
         # ----------------- Stage 1: Generate Test Plan -----------------
         logger.info("=============== Stage 1: Generate Test Plan ===============")
@@ -293,32 +370,67 @@ async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
         else:
             logger.warning(f"Test file directory not found: {test_files_dir}")
 
-        plan_template = load_prompt("server_tester/generate_test_plan.prompt")
-        plan_prompt = plan_template.render(
-            tool_schemas=json.dumps(tools_info, indent=2, ensure_ascii=False),
-            server_code=server_code,
-            test_files_info=test_files_info
-        )
-        
-        logger.info("🤖 Requesting LLM to generate test plan...")
+        # Change-impact selection: tools whose code (and helpers) didn't change since the last
+        # test round keep their results; only the affected tools are planned and run again.
+        try:
+            current_fingerprints = tool_fingerprints(server_code)
+        except SyntaxError:
+            current_fingerprints = {}
+        reused_results = _reusable_test_results(state, current_fingerprints, [tool.name for tool in mcp_adapter.tools])
+        reused_entries = [entry for entries in reused_results.values() for entry in entries]
+        affected_tools_info = [info for info in tools_info if info["name"] not in reused_results]
+        if reused_results:
+            logger.info(f"♻️ Reusing results of {len(reused_entries)} step(s) for unchanged tools: {sorted(reused_results)}")
+        agent_logger.log(event_type="test_selection", full_retest=bool(state.get("full_retest")),
+                         reused_tools=sorted(reused_results), affected_tools=[info["name"] for info in affected_tools_info])
+
         test_agent_llm = get_llm_for_agent(f"ServerTest-Agent-{api_name}")
-        plan_response = await test_agent_llm.ainvoke([HumanMessage(content=plan_prompt)])
-        
-        json_match = re.search(r'```json\s*([\s\S]*?)\s*```', plan_response.content)
-        json_str = json_match.group(1).strip() if json_match else plan_response.content
-        test_plan = json.loads(json_str).get("test_plan", [])
-
-        if not test_plan:
-            raise ValueError("Generated test plan is empty or incorrectly formatted.")
-        logger.info(f"✅ Successfully parsed test plan with {len(test_plan)} steps.")
-        logger.info(f"✅ Successfully parsed test plan:{test_plan}")
-        
-        # Enhanced robustness: validate the test plan
-        _validate_test_plan(test_plan)
+        test_plan = []
+        compiled_parameters = {}
+        if affected_tools_info:
+            plan_template = load_prompt("server_tester/generate_test_plan.prompt")
+            plan_message = plan_template.render_message(
+                tool_schemas=json.dumps(affected_tools_info, indent=2, ensure_ascii=False),
+                server_code=server_code,
+                test_files_info=test_files_info,
+                reused_steps_info=_format_reused_steps(reused_entries)
+            )
+            
+            logger.info("🤖 Requesting LLM to generate test plan...")
+            plan_response = await test_agent_llm.ainvoke([plan_message])
+            
+            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', plan_response.content)
+            json_str = json_match.group(1).strip() if json_match else plan_response.content
+            test_plan = json.loads(json_str).get("test_plan", [])
+
+            if not test_plan:
+                raise ValueError("Generated test plan is empty or incorrectly formatted.")
+            test_plan = _drop_reused_tool_steps(test_plan, set(reused_results))
+            logger.info(f"✅ Successfully parsed test plan with {len(test_plan)} steps.")
+            logger.info(f"✅ Successfully parsed test plan:{test_plan}")
+            
+            # A new step supersedes a reused step with the same step_id
+            planned_ids = {step.get("step_id") for step in test_plan}
+            reused_entries = [entry for entry in reused_entries if entry["step"]["step_id"] not in planned_ids]
+            
+            # Enhanced robustness: validate the test plan
+            compiled_parameters = _validate_test_plan(test_plan, known_step_ids={entry["step"]["step_id"] for entry in reused_entries})
+        else:
+            logger.info("♻️ No tool changed since the last test round, skipping test planning.")
 
         # ----------------- Stage 2: Execute Test Plan -----------------
         logger.info("=============== Stage 2: Execute Test Plan ===============")
-        execution_log = await _execute_test_plan(mcp_adapter, test_plan, agent_logger)
+        if test_plan and TEST_PLAN_SESSIONS > 1 and TEST_PLAN_CONCURRENCY > 1:
+            for _ in range(TEST_PLAN_SESSIONS - 1):
+                extra_adapter = MCPClientAdapter()
+                extra_adapters.append(extra_adapter)
+                await _connect_server(extra_adapter, server_file_path)
+            logger.info(f"🔌 Connected {len(extra_adapters)} extra session(s) for parallel-safe steps.")
+        seed_outputs = {entry["step"]["step_id"]: entry["result"] for entry in reused_entries}
+        execution_log = [{**entry, "reused": True} for entry in reused_entries]
+        execution_log += await _execute_test_plan(mcp_adapter, test_plan, agent_logger, extra_adapters, compiled_parameters, seed_outputs)
+        update["tool_fingerprints"] = current_fingerprints
+        update["tool_test_results"] = _group_results_by_tool(execution_log)
         
         # Enhanced robustness: persist the raw execution log
         try:
@@ -347,10 +459,10 @@ async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
             "api_spec_json": json.dumps(state.get("api_spec"), indent=2, ensure_ascii=False) if state.get("api_spec") else "{}",
             "user_input": state.get("user_input", "")
         }
-        report_prompt = load_prompt("server_tester/final_report.prompt").render(**report_context)
+        report_message = load_prompt("server_tester/final_report.prompt").render_message(**report_context)
         
         logger.info("🤖 Requesting LLM to generate final test report...")
-        report_response = await test_agent_llm.ainvoke([HumanMessage(content=report_prompt)])
+        report_response = await test_agent_llm.ainvoke([report_message])
         test_report_content = report_response.content
         logger.info("✅ Successfully generated test report.")
 
@@ -390,6 +502,9 @@ async def server_test_node(state: MCPWorkflowState) -> MCPWorkflowState:
         })
     
     finally:
+        for extra_adapter in extra_adapters:
+            if extra_adapter.session:
+                await extra_adapter.disconnect()
         if mcp_adapter and mcp_adapter.session:
             await mcp_adapter.disconnect()
             logger.info("✅ Server process has been terminated.")
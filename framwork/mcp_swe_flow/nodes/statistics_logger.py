@@ -1,15 +1,172 @@
+import asyncio
 import json
 from pathlib import Path
 import traceback
+from typing import Any, Dict, List
 
 from framwork.mcp_swe_flow.state import MCPWorkflowState
 from framwork.tool import save_file_tool
-from framwork.logger import logger, PROJECT_ROOT
+from framwork.logger import logger, PROJECT_ROOT, flush_agent_logs, get_agent_log_run
+from framwork.metrics import RunMetrics, get_run_metrics
+
+def _aggregate_log_files(log_files: List[str]) -> Dict[str, Any]:
+    """
+    Sums LLM token usage, cost and tool calls recorded in the given agent log files.
+    Only used when the in-memory metrics are incomplete (a run resumed from a checkpoint).
+    Blocking (it waits for the agent log writer): call it through asyncio.to_thread.
+    """
+    total_prompt_tokens = 0
+    total_completion_tokens = 0
+    total_cost = 0.0
+    model_usage = {}
+    total_tool_calls = 0
+    tool_usage_counts = {}
+
+    # Agent events are written by a background thread, make sure they are on disk
+    flush_agent_logs()
+    unique_log_files = sorted(list(set(log_files)))
+    
+    for log_path_str in unique_log_files:
+        log_path = Path(log_path_str)
+        if not log_path.exists():
+            logger.warning(f"Log file not found: {log_path}")
+            continue
+        
+        try:
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        log_entry = json.loads(line)
+                        # Per user feedback, we only observe the 'llm_response' event,
+                        # as it marks the definitive end of a single LLM invocation.
+                        if log_entry.get("event") == "llm_response":
+                            metadata = log_entry.get("usage_metadata", {})
+                            if not metadata:
+                                continue
+
+                            model = metadata.get("model", "unknown")
+                            prompt_tokens = metadata.get("input_tokens", 0)
+                            completion_tokens = metadata.get("output_tokens", 0)
+                            # The 'llm_response' event uses the 'cost' key for the total cost.
+                            cost = metadata.get("cost", 0.0)
+                            
+                            # Aggregate totals
+                            total_prompt_tokens += prompt_tokens
+                            total_completion_tokens += completion_tokens
+                            total_cost += cost
+
+                            # Aggregate per-model stats
+                            if model not in model_usage:
+                                model_usage[model] = {"prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "calls": 0}
+                            
+                            model_usage[model]["prompt_tokens"] += prompt_tokens
+                            model_usage[model]["completion_tokens"] += completion_tokens
+                            model_usage[model]["cost"] += cost
+                            model_usage[model]["calls"] += 1
+                            
+                        # Also, capture tool call events
+                        elif log_entry.get("event") == "tool_call":
+                            tool_name = log_entry.get("tool", "unknown_tool")
+                            total_tool_calls += 1
+                            tool_usage_counts[tool_name] = tool_usage_counts.get(tool_name, 0) + 1
+                            
+                    except (json.JSONDecodeError, KeyError):
+                        # Ignore lines that are not valid JSON or don't have the expected keys
+                        continue
+        except Exception as e:
+            logger.error(f"Failed to read or process log file {log_path}: {e}")
+
+    return {
+        "prompt_tokens": total_prompt_tokens,
+        "completion_tokens": total_completion_tokens,
+        "total_tokens": total_prompt_tokens + total_completion_tokens,
+        "cost": total_cost,
+        "model_usage": model_usage,
+        "tool_calls": total_tool_calls,
+        "tool_usage_counts": tool_usage_counts,
+    }
+
+
+def _usage_from_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as _aggregate_log_files, computed from a RunMetrics snapshot."""
+    totals = snapshot["totals"]
+    return {
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "total_tokens": totals["total_tokens"],
+        "cost": totals["cost"],
+        "model_usage": {
+            model: {key: bucket[key] for key in ("prompt_tokens", "completion_tokens", "cost", "calls")}
+            for model, bucket in snapshot["llm"]["by_model"].items()
+        },
+        "tool_calls": totals["tool_calls"],
+        "tool_usage_counts": {tool: bucket["calls"] for tool, bucket in snapshot["tools"].items()},
+    }
+
+
+def _collect_run_metrics(state: MCPWorkflowState) -> RunMetrics:
+    """Metrics of this run, including the model runs of fan-out mode."""
+    run_metrics = get_run_metrics(get_agent_log_run())
+    combined = RunMetrics(run_metrics.run_id)
+    combined.merge_snapshot(run_metrics.snapshot(include_samples=True))
+    for run in (state.get("model_runs") or {}).values():
+        if run.get("metrics"):
+            combined.merge_snapshot(run["metrics"])
+        else:
+            combined.partial = True
+    return combined
+
+
+def _format_metrics_sections(snapshot: Dict[str, Any]) -> str:
+    """Latency, per-agent and tool duration tables, only available from the in-memory metrics."""
+    def fmt(summary: Dict[str, Any], key: str) -> str:
+        return f"{summary[key]:.2f}" if summary.get("count") else "-"
+
+    content = "\n---\n\n## LLM 调用延迟 (秒)\n\n"
+    content += "| 模型 | 调用次数 | P50 | P95 | 最大值 | 首 Token P50 |\n"
+    content += "| :--- | :--- | :--- | :--- | :--- | :--- |\n"
+    for model, bucket in snapshot["llm"]["by_model"].items():
+        latency = bucket["latency_s"]
+        ttft = snapshot["streaming"].get(model, {}).get("time_to_first_token_s", {})
+        content += f"| `{model}` | {bucket['calls']} | {fmt(latency, 'p50')} | {fmt(latency, 'p95')} | {fmt(latency, 'max')} | {fmt(ttft, 'p50')} |\n"
+
+    content += "\n---\n\n## 按 Agent 划分的使用情况\n\n"
+    content += "| Agent | 调用次数 | 总 Token | 总成本 (RMB) | 延迟 P95 (秒) |\n"
+    content += "| :--- | :--- | :--- | :--- | :--- |\n"
+    for agent, bucket in snapshot["llm"]["by_agent"].items():
+        content += (f"| `{agent}` | {bucket['calls']} | {bucket['prompt_tokens'] + bucket['completion_tokens']:,} "
+                    f"| ¥{bucket['cost']:.6f} | {fmt(bucket['latency_s'], 'p95')} |\n")
+
+    if snapshot["tools"]:
+        content += "\n---\n\n## 工具调用耗时 (秒)\n\n"
+        content += "| 工具名称 | 调用次数 | 失败次数 | 平均耗时 | P95 |\n"
+        content += "| :--- | :--- | :--- | :--- | :--- |\n"
+        for tool_name, bucket in snapshot["tools"].items():
+            duration = bucket["duration_s"]
+            content += f"| `{tool_name}` | {bucket['calls']} | {bucket['errors']} | {fmt(duration, 'mean')} | {fmt(duration, 'p95')} |\n"
+    return content
+
+
+async def _save_workspace_file(project_dir: Path, file_name: str, content: str) -> Path:
+    # The save_file_tool expects a path relative to its workspace root (PROJECT_ROOT/workspace)
+    workspace_dir = PROJECT_ROOT / "workspace"
+
+    # Ensure the project directory path is absolute before making it relative
+    if not project_dir.is_absolute():
+        project_dir = workspace_dir / project_dir
+
+    relative_path = project_dir.relative_to(workspace_dir) / file_name
+    await save_file_tool.ainvoke({
+        "file_path": str(relative_path),
+        "content": content
+    })
+    return project_dir / file_name
+
 
 async def statistics_logger_node(state: MCPWorkflowState) -> MCPWorkflowState:
     """
-    Aggregates token usage and cost statistics from all agent log files
-    generated during the workflow run and saves a final report.
+    Renders the token usage, cost, latency and tool statistics of the workflow run from
+    the in-memory run metrics and saves statistics_report.md and statistics.json.
     """
     logger.info("--- 📊 Starting Statistics Logger Node ---")
     
@@ -24,76 +181,33 @@ async def statistics_logger_node(state: MCPWorkflowState) -> MCPWorkflowState:
 
     project_dir = Path(project_dir_str)
         
-    if not log_files:
+    run_metrics = _collect_run_metrics(state)
+    snapshot = run_metrics.snapshot()
+    # A resumed run only has the metrics of the nodes executed since the resume
+    from_logs = run_metrics.partial and bool(log_files)
+    statistics = {**snapshot, "source": "log_files" if from_logs else "metrics"}
+
+    if not log_files and not snapshot["totals"]["llm_calls"] and not snapshot["totals"]["tool_calls"]:
         logger.warning("No log files were found in the state to generate statistics from.")
         # Still generate an empty report for consistency
         report_content = "# Statistics Report\n\nNo log files found to analyze.\n"
     else:
-        logger.info(f"Aggregating statistics from {len(log_files)} log file(s)...")
-        
-        total_prompt_tokens = 0
-        total_completion_tokens = 0
-        total_tokens = 0
-        total_cost = 0.0
-        model_usage = {}
-        total_tool_calls = 0
-        tool_usage_counts = {}
-
-        unique_log_files = sorted(list(set(log_files)))
-        
-        for log_path_str in unique_log_files:
-            log_path = Path(log_path_str)
-            if not log_path.exists():
-                logger.warning(f"Log file not found: {log_path}")
-                continue
-            
-            try:
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            log_entry = json.loads(line)
-                            # Per user feedback, we only observe the 'llm_response' event,
-                            # as it marks the definitive end of a single LLM invocation.
-                            if log_entry.get("event") == "llm_response":
-                                metadata = log_entry.get("usage_metadata", {})
-                                if not metadata:
-                                    continue
-
-                                model = metadata.get("model", "unknown")
-                                prompt_tokens = metadata.get("input_tokens", 0)
-                                completion_tokens = metadata.get("output_tokens", 0)
-                                # The 'llm_response' event uses the 'cost' key for the total cost.
-                                cost = metadata.get("cost", 0.0)
-                                
-                                # Aggregate totals
-                                total_prompt_tokens += prompt_tokens
-                                total_completion_tokens += completion_tokens
-                                total_cost += cost
-
-                                # Aggregate per-model stats
-                                if model not in model_usage:
-                                    model_usage[model] = {"prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "calls": 0}
-                                
-                                model_usage[model]["prompt_tokens"] += prompt_tokens
-                                model_usage[model]["completion_tokens"] += completion_tokens
-                                model_usage[model]["cost"] += cost
-                                model_usage[model]["calls"] += 1
-                                
-                            # Also, capture tool call events
-                            elif log_entry.get("event") == "tool_call":
-                                tool_name = log_entry.get("tool", "unknown_tool")
-                                total_tool_calls += 1
-                                tool_usage_counts[tool_name] = tool_usage_counts.get(tool_name, 0) + 1
-                                
-                        except (json.JSONDecodeError, KeyError):
-                            # Ignore lines that are not valid JSON or don't have the expected keys
-                            continue
-            except Exception as e:
-                logger.error(f"Failed to read or process log file {log_path}: {e}")
+        if from_logs:
+            logger.info(f"Run was resumed, aggregating statistics from {len(log_files)} log file(s)...")
+            # Flushing the agent logs blocks: keep it (and the file reads) off the event loop
+            usage = await asyncio.to_thread(_aggregate_log_files, log_files)
+            statistics["usage"] = usage
+        else:
+            usage = _usage_from_snapshot(snapshot)
+        total_prompt_tokens = usage["prompt_tokens"]
+        total_completion_tokens = usage["completion_tokens"]
+        total_cost = usage["cost"]
+        model_usage = usage["model_usage"]
+        total_tool_calls = usage["tool_calls"]
+        tool_usage_counts = usage["tool_usage_counts"]
 
         total_tokens = total_prompt_tokens + total_completion_tokens
 
-        # --- Format the report ---
         report_content = f"""# Workflow Execution Statistics
 
 ## 概要
@@ -136,26 +250,38 @@ async def statistics_logger_node(state: MCPWorkflowState) -> MCPWorkflowState:
             for tool_name, count in sorted(tool_usage_counts.items()):
                 report_content += f"| `{tool_name}` | {count} |\n"
 
+        if not from_logs:
+            report_content += _format_metrics_sections(snapshot)
+
+        # Fan-out mode: compare the model runs side by side
+        model_runs = state.get("model_runs") or {}
+        if model_runs:
+            report_content += "\n---\n\n## 按 SWE 模型划分的运行结果\n\n"
+            report_content += "| SWE 模型 | 状态 | 优化轮次 | 总 Token | 总成本 (RMB) | 服务器文件 |\n"
+            report_content += "| :--- | :--- | :--- | :--- | :--- | :--- |\n"
+            for swe_model, run in model_runs.items():
+                if run.get("metrics"):
+                    run_usage = _usage_from_snapshot(run["metrics"])
+                else:
+                    run_usage = await asyncio.to_thread(_aggregate_log_files, run.get("log_files", []))
+                report_content += (
+                    f"| `{swe_model}` | {run.get('status')} | {run.get('refinement_loop_count', 0)} "
+                    f"| {run_usage['total_tokens']:,} | ¥{run_usage['cost']:.6f} | {run.get('server_file_path') or '-'} |\n"
+                )
+            failed_runs = {m: r for m, r in model_runs.items() if r.get("error")}
+            for swe_model, run in failed_runs.items():
+                report_content += f"\n- `{swe_model}` 失败: {run['error']}"
+            if failed_runs:
+                report_content += "\n"
+
         logger.info(f"Generated statistics summary: Total Tokens={total_tokens}, Total Cost=¥{total_cost:.6f}, Total Tool Calls={total_tool_calls}")
 
     # --- Save the report ---
     try:
-        report_file_name = "statistics_report.md"
-        # The save_file_tool expects a path relative to its workspace root (PROJECT_ROOT/workspace)
-        workspace_dir = PROJECT_ROOT / "workspace"
-        
-        # Ensure the project directory path is absolute before making it relative
-        if not project_dir.is_absolute():
-            project_dir = workspace_dir / project_dir
-            
-        relative_report_path = project_dir.relative_to(workspace_dir) / report_file_name
-        
-        await save_file_tool.ainvoke({
-            "file_path": str(relative_report_path),
-            "content": report_content
-        })
-        absolute_report_path = project_dir / report_file_name
+        absolute_report_path = await _save_workspace_file(project_dir, "statistics_report.md", report_content)
         logger.info(f"✅ Statistics report saved to: {absolute_report_path}")
+        absolute_json_path = await _save_workspace_file(project_dir, "statistics.json", json.dumps(statistics, indent=2, ensure_ascii=False))
+        logger.info(f"✅ Statistics data saved to: {absolute_json_path}")
 
     except Exception as e:
         logger.error(f"Failed to save statistics report: {e}\n{traceback.format_exc()}")
@@ -11,6 +11,13 @@ from framwork.mcp_swe_flow.config import get_llm_for_agent, llm, get_env_int
 from framwork.tool import tavily_search_tool, save_file_tool, context7_docs_tool
 from framwork.logger import logger, get_agent_logger
 from framwork.mcp_swe_flow.prompts.utils import load_prompt
+from framwork.mcp_swe_flow.utils.patching import apply_patch, extract_edits, PatchApplyError
+from framwork.mcp_swe_flow.utils.streaming import astream_with_metrics, check_syntax, is_truncated
+from framwork.mcp_swe_flow.utils.doc_retrieval import select_mcp_doc
+from framwork.mcp_swe_flow.utils.exemplar_index import find_exemplars, format_exemplars
+
+# Ask the code reviewer for search/replace edits instead of the whole file; falls back to a full-file review if they fail
+REVIEW_PATCH_MODE = os.getenv("REVIEW_PATCH_MODE", "true").lower() == "true"
 
 
 def _normalize_and_extract_tool_calls(response_message: AIMessage) -> AIMessage:
@@ -77,6 +84,16 @@ def _normalize_and_extract_tool_calls(response_message: AIMessage) -> AIMessage:
     return response_message
 
 
+def _strip_gemini_thoughts(content: str, swe_model: str) -> str:
+    """Removes the <thought>...</thought> part that Gemini models prepend to their output."""
+    if swe_model and 'gemini' in swe_model.lower():
+        logger.info(f"Detected Gemini model response, applying special processing")
+        if '<thought>' in content:
+            thought_match = re.search(r'<thought>.*?</thought>(.*)', content, re.DOTALL)
+            content = thought_match.group(1).strip() if thought_match else re.sub(r'<thought>.*?</thought>', '', content, flags=re.DOTALL).strip()
+    return content
+
+
 async def swe_generate_node(state: MCPWorkflowState) -> MCPWorkflowState:
     """Asynchronously generates MCP server code using LLM and saves it using a tool."""
     api_name = state.get("api_name")
@@ -159,22 +176,28 @@ User Request:
     MAX_PLANNING_TURNS = get_env_int("MAX_PLANNING_TURNS", 4)
     MAX_PLANNING_TOOL_CALLS = get_env_int("MAX_PLANNING_TOOL_CALLS", 2)
     planning_tool_calls_used = 0
+    # Closest high-scoring servers already in the workspace (not the one being regenerated)
+    exemplars = await asyncio.to_thread(
+        find_exemplars, request_specific_part, agent_logger,
+        exclude_dirs=[str(Path("workspace") / tool_relative_project_dir)]
+    )
     plan_prompt_template = load_prompt("swe_generator/generate_plan.prompt")
-    plan_prompt = plan_prompt_template.render(
+    plan_message = plan_prompt_template.render_message(
         request_specific_part=request_specific_part,
-        mcp_doc=mcp_doc,
+        mcp_doc=select_mcp_doc(mcp_doc, request_specific_part, agent_logger, purpose="planning"),
+        exemplars=format_exemplars(exemplars),
         tavily_search_tool_name=tavily_search_tool.name,
         tavily_search_tool_description=tavily_search_tool.description,
         max_planning_tool_calls=MAX_PLANNING_TOOL_CALLS
     )
     
-    planning_messages = [HumanMessage(content=plan_prompt)]
+    planning_messages = [plan_message]
     plan = None
 
     for i in range(MAX_PLANNING_TURNS):
         logger.info(f"Planning turn {i + 1}/{MAX_PLANNING_TURNS} (Tool calls used: {planning_tool_calls_used}/{MAX_PLANNING_TOOL_CALLS})")
         try:
-            response_message = await planning_llm.ainvoke(planning_messages)
+            response_message = await astream_with_metrics(planning_llm, planning_messages, agent_logger, call_name="planning")
             response_message = _normalize_and_extract_tool_calls(response_message)
         except Exception as e:
             logger.error(f"LLM invocation failed during planning phase: {e}", exc_info=True)
@@ -268,10 +291,10 @@ User Request:
     codegen_tool_calls_used = 0
     code_gen_prompt_template = load_prompt("swe_generator/generate_code_from_plan.prompt")
 
-    prompt = code_gen_prompt_template.render(
+    code_gen_message = code_gen_prompt_template.render_message(
         plan=plan,
         request_specific_part=request_specific_part,
-        mcp_doc=mcp_doc,
+        mcp_doc=select_mcp_doc(mcp_doc, f"{request_specific_part}\n{plan}", agent_logger, purpose="code_generation"),
         api_name=api_name or "custom_mcp_server",
         tavily_search_tool_name=tavily_search_tool.name,
         tavily_search_tool_description=tavily_search_tool.description,
@@ -283,18 +306,54 @@ User Request:
         max_tool_calls=MAX_CODEGEN_TOOL_CALLS
     )
 
-    messages = [HumanMessage(content=prompt)]
+    backup_file_name = f"{api_name}_original.py"
+    relative_backup_path = tool_relative_project_dir / backup_file_name
+    # Code already backed up and syntax-checked while the response was streaming
+    early_checked_code = set()
+
+    async def backup_and_check_streamed_code(tool_name: str, tool_args: dict):
+        """Runs as soon as a save_file call's arguments are complete, before the stream ends."""
+        if tool_name != save_file_tool.name:
+            return
+        code = _strip_gemini_thoughts(tool_args.get("content", ""), swe_model)
+        if not code.strip() or code in early_checked_code:
+            return
+        syntax_error = check_syntax(code, server_file_name)
+        early_checked_code.add(code)
+        try:
+            await save_file_tool.ainvoke({"file_path": str(relative_backup_path), "content": code})
+            logger.info(f"✅ Saved pre-review code backup to: {relative_backup_path} (while streaming)")
+        except Exception as e:
+            logger.warning(f"Could not save pre-review backup file: {e}")
+        if syntax_error:
+            logger.warning(f"Generated code does not compile: {syntax_error}")
+        agent_logger.log(event_type="early_syntax_check", ok=syntax_error is None, error=syntax_error)
+
+    messages = [code_gen_message]
     saved_code = False
     for i in range(MAX_CODEGEN_TURNS):
         logger.info(f"Generation turn {i+1}/{MAX_CODEGEN_TURNS} (Tool calls used: {codegen_tool_calls_used}/{MAX_CODEGEN_TOOL_CALLS})")
 
         try:
-            response_message = await agent_llm.ainvoke(messages)
+            response_message = await astream_with_metrics(
+                agent_llm, messages, agent_logger, call_name="code_generation",
+                on_tool_args=backup_and_check_streamed_code
+            )
             response_message = _normalize_and_extract_tool_calls(response_message)
         except Exception as e:
             logger.error(f"LLM invocation failed during code generation phase: {e}", exc_info=True)
             return {**state, "error": f"LLM invocation failed during code generation: {e}", "next_step": "error_handler"}
 
+        if is_truncated(response_message):
+            # Truncated tool arguments would save a half-written server; ask again instead
+            logger.warning("Code generation response was truncated by the output token limit. Requesting a more concise version.")
+            messages.append(HumanMessage(content=(
+                "Your previous response was cut off because it exceeded the output token limit, so nothing was saved. "
+                f"Call the '{save_file_tool.name}' tool again with the complete code, keeping it more concise "
+                "(shorter docstrings and comments, no redundant helpers)."
+            )))
+            continue
+
         if response_message.tool_calls:
             messages.append(response_message)
             codegen_tool_calls_used += len(response_message.tool_calls)
@@ -317,29 +376,21 @@ User Request:
                             logger.warning(tool_output)
                         else:
                             # 根据模型类型进行特殊处理，确保我们处理的是纯代码
-                            if swe_model and 'gemini' in swe_model.lower():
-                                logger.info(f"Detected Gemini model response in code generation, applying special processing")
-                                if '<thought>' in code_to_review:
-                                    thought_match = re.search(r'<thought>.*?</thought>(.*)', code_to_review, re.DOTALL)
-                                    if thought_match:
-                                        code_to_review = thought_match.group(1).strip()
-                                    else:
-                                        code_to_review = re.sub(r'<thought>.*?</thought>', '', code_to_review, flags=re.DOTALL).strip()
+                            code_to_review = _strip_gemini_thoughts(code_to_review, swe_model)
                             
                             original_code = code_to_review
                             
-                            # --- 1. Define and Save Backup File ---
+                            # --- 1. Save Backup File (unless it was already written while streaming) ---
                             # 明确定义备份文件路径，确保与最终文件不同
-                            backup_file_name = f"{api_name}_original.py"
-                            relative_backup_path = tool_relative_project_dir / backup_file_name
-                            try:
-                                await save_file_tool.ainvoke({
-                                    "file_path": str(relative_backup_path),
-                                    "content": original_code
-                                })
-                                logger.info(f"✅ Saved pre-review code backup to: {relative_backup_path}")
-                            except Exception as e:
-                                logger.warning(f"Could not save pre-review backup file: {e}")
+                            if original_code not in early_checked_code:
+                                try:
+                                    await save_file_tool.ainvoke({
+                                        "file_path": str(relative_backup_path),
+                                        "content": original_code
+                                    })
+                                    logger.info(f"✅ Saved pre-review code backup to: {relative_backup_path}")
+                                except Exception as e:
+                                    logger.warning(f"Could not save pre-review backup file: {e}")
 
                             # --- 2. Code Review and Final Save Logic ---
                             final_code_to_save = original_code  # 默认使用原始代码
@@ -348,24 +399,38 @@ User Request:
 
                             try:
                                 review_prompt_template = load_prompt("swe_generator/review_and_correct.prompt")
-                                review_prompt = review_prompt_template.render(code=original_code)
                                 
                                 code_review_llm = get_llm_for_agent(f"SWE-Agent-{api_name}-Reviewer", model_override=swe_model)
                                 if not code_review_llm:
                                     raise ValueError("Could not create LLM for code review.")
 
-                                review_response = await code_review_llm.ainvoke([HumanMessage(content=review_prompt)])
-                                corrected_code_raw = review_response.content.strip()
-
-                                # Process the corrected code (Gemini thoughts, markdown extraction)
-                                if swe_model and 'gemini' in swe_model.lower():
-                                    logger.info(f"Detected Gemini model response in code review, applying special processing")
-                                    if '<thought>' in corrected_code_raw:
-                                        thought_match = re.search(r'<thought>.*?</thought>(.*)', corrected_code_raw, re.DOTALL)
-                                        corrected_code_raw = thought_match.group(1).strip() if thought_match else re.sub(r'<thought>.*?</thought>', '', corrected_code_raw, flags=re.DOTALL).strip()
-                                
-                                code_match = re.search(r'```python\n(.*?)\n```', corrected_code_raw, re.DOTALL)
-                                corrected_code = code_match.group(1).strip() if code_match else corrected_code_raw.replace("```python", "").replace("```", "").strip()
+                                corrected_code = None
+                                if REVIEW_PATCH_MODE:
+                                    # Patch mode: the reviewer only returns edits, falling back to a full-file review if they don't apply
+                                    review_message = review_prompt_template.render_message(code=original_code, patch_mode=True)
+                                    review_response = await astream_with_metrics(code_review_llm, [review_message], agent_logger, call_name="code_review_patch")
+                                    review_content = _strip_gemini_thoughts(review_response.content.strip(), swe_model)
+                                    if review_content.strip().strip("`").strip() == "NO_CHANGES":
+                                        corrected_code = original_code
+                                    else:
+                                        try:
+                                            corrected_code = apply_patch(original_code, review_content, filename=server_file_name)
+                                            agent_logger.log(event_type="review_patch_applied", edits=len(extract_edits(review_content)))
+                                        except PatchApplyError as e:
+                                            logger.warning(f"Reviewer patch could not be applied, falling back to a full-file review: {e}")
+                                            agent_logger.log(event_type="review_patch_failed", error=str(e))
+
+                                if corrected_code is None:
+                                    review_message = review_prompt_template.render_message(code=original_code, patch_mode=False)
+                                    review_response = await astream_with_metrics(code_review_llm, [review_message], agent_logger, call_name="code_review")
+                                    if is_truncated(review_response):
+                                        raise ValueError("Code review output was truncated by the output token limit.")
+                                    corrected_code_raw = review_response.content.strip()
+
+                                    # Process the corrected code (Gemini thoughts, markdown extraction)
+                                    corrected_code_raw = _strip_gemini_thoughts(corrected_code_raw, swe_model)
+                                    code_match = re.search(r'```python\n(.*?)\n```', corrected_code_raw, re.DOTALL)
+                                    corrected_code = code_match.group(1).strip() if code_match else corrected_code_raw.replace("```python", "").replace("```", "").strip()
 
                                 if corrected_code and corrected_code.strip() and corrected_code != original_code:
                                     final_code_to_save = corrected_code
@@ -481,7 +546,7 @@ async def generate_server_name_from_user_input(user_input: str, swe_model: str)
     logger.info(f"Generating server name from user input using LLM: '{user_input[:50]}...'")
     
     prompt_template = load_prompt("swe_generator/generate_server_name.prompt")
-    prompt = prompt_template.render(user_input=user_input)
+    name_message = prompt_template.render_message(user_input=user_input)
 
     try:
         # The name generator should also use the specified SWE model for consistency.
@@ -489,7 +554,7 @@ async def generate_server_name_from_user_input(user_input: str, swe_model: str)
         if not name_generator_llm:
             raise ValueError("Could not initialize LLM for name generation.")
 
-        response = await name_generator_llm.ainvoke([HumanMessage(content=prompt)])
+        response = await name_generator_llm.ainvoke([name_message])
         raw_name = response.content.strip()
         
         # 根据模型类型进行特殊处理
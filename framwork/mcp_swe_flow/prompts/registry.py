@@ -0,0 +1,99 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from jinja2 import Environment, TemplateSyntaxError, nodes
+from langchain_core.messages import HumanMessage
+
+from framwork.logger import logger
+from framwork.mcp_swe_flow.utils.doc_retrieval import estimate_tokens
+
+# ========== Prompt Registry ==========
+# Every *.prompt file is read and compiled once per process instead of on each load_prompt call.
+# A `{# dynamic #}` line splits a template into a static prefix (role, instructions, rubrics,
+# examples) and a dynamic suffix (request, code, reports). Putting the static part first makes
+# consecutive calls start with the same bytes, which is what provider prefix caches match on
+# (automatic on OpenAI, DeepSeek, Qwen and Gemini).
+# - PROMPT_CACHE_CONTROL: 'true' also sends the static prefix as a separate content block marked
+#   with cache_control, for providers that only cache explicitly marked blocks (default: false)
+DYNAMIC_MARKER = "{# dynamic #}"
+PROMPT_CACHE_CONTROL = os.getenv("PROMPT_CACHE_CONTROL", "false").lower() == "true"
+
+
+class PromptTemplate:
+    """A compiled prompt, split into its static prefix and dynamic suffix."""
+
+    def __init__(self, name: str, source: str, environment: Environment):
+        self.name = name
+        static_source, marker, dynamic_source = source.partition(DYNAMIC_MARKER)
+        if not marker:
+            static_source, dynamic_source = "", source
+        # Rendered as before: the marker line disappears and the final newline is dropped
+        dynamic_source = dynamic_source.removeprefix("\n").removesuffix("\n")
+        try:
+            self.static = environment.from_string(static_source) if static_source else None
+            self.dynamic = environment.from_string(dynamic_source)
+            # Literal text only: variables rendered into the prefix are not counted
+            self.static_tokens = estimate_tokens("".join(
+                node.data for node in environment.parse(static_source).find_all(nodes.TemplateData)
+            )) if static_source else 0
+        except TemplateSyntaxError as e:
+            raise ValueError(f"Prompt '{name}' failed to compile ({DYNAMIC_MARKER} must not be inside a block): {e}") from e
+
+    def render_parts(self, **kwargs) -> Tuple[str, str]:
+        static = self.static.render(**kwargs) if self.static else ""
+        return static, self.dynamic.render(**kwargs)
+
+    def render(self, **kwargs) -> str:
+        return "".join(self.render_parts(**kwargs))
+
+    def render_message(self, **kwargs) -> HumanMessage:
+        """The rendered prompt as a HumanMessage, with the static prefix marked for caching if PROMPT_CACHE_CONTROL is set."""
+        static, dynamic = self.render_parts(**kwargs)
+        if not (PROMPT_CACHE_CONTROL and static):
+            return HumanMessage(content=static + dynamic)
+        return HumanMessage(content=[
+            {"type": "text", "text": static, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": dynamic},
+        ])
+
+
+class PromptRegistry:
+    """All prompt templates of a directory, compiled on first use and shared by every node."""
+
+    def __init__(self, prompts_dir: Path):
+        self.prompts_dir = prompts_dir
+        self.environment = Environment(keep_trailing_newline=True)
+        self._templates: Dict[str, PromptTemplate] = {}
+        # A broken template only fails the nodes that use it
+        self._errors: Dict[str, Exception] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load_all(self):
+        for path in sorted(self.prompts_dir.rglob("*.prompt")):
+            name = path.relative_to(self.prompts_dir).as_posix()
+            try:
+                self._templates[name] = PromptTemplate(name, path.read_text(encoding="utf-8"), self.environment)
+            except Exception as e:
+                self._errors[name] = e
+                logger.error(f"Could not load prompt {path}: {e}")
+        static_tokens = sum(t.static_tokens for t in self._templates.values())
+        logger.info(f"Compiled {len(self._templates)} prompt templates (~{static_tokens} tokens of static prefixes).")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self._load_all()
+                self._loaded = True
+
+    def get(self, prompt_path: str) -> PromptTemplate:
+        self._ensure_loaded()
+        name = Path(prompt_path).as_posix()
+        if name in self._errors:
+            raise self._errors[name]
+        template = self._templates.get(name)
+        if template is None:
+            raise FileNotFoundError(f"Prompt file not found at: {self.prompts_dir / prompt_path}")
+        return template
@@ -1,6 +1,9 @@
 from pathlib import Path
 import os
-from jinja2 import Template
+import threading
+from typing import Optional
+
+from framwork.mcp_swe_flow.prompts.registry import PromptRegistry, PromptTemplate
 
 # This will be framwork/mcp_swe_flow/prompts/utils.py
 # We need to calculate the project root relative to this file's location.
@@ -9,27 +12,37 @@ from jinja2 import Template
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
 PROMPTS_DIR = PROJECT_ROOT / "framwork" / "mcp_swe_flow" / "prompts"
 
-def load_prompt(prompt_path: str) -> Template:
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """The process-wide registry of the templates in PROMPTS_DIR."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry(PROMPTS_DIR)
+        return _registry
+
+
+def load_prompt(prompt_path: str) -> PromptTemplate:
     """
-    Loads a prompt from the specified path within the prompts directory
-    and returns it as a Jinja2 Template object.
+    Returns the compiled template of the specified path within the prompts directory.
+    Templates are read and compiled once, on the first call, and shared afterwards.
     
     Args:
         prompt_path: The relative path to the prompt file from the 'prompts' directory.
                      e.g., 'swe_generator/api_spec_mode.prompt'
         
     Returns:
-        The content of the prompt file as a Jinja2 Template object.
+        The compiled PromptTemplate (render() / render_message() like a Jinja2 Template).
     """
-    full_path = PROMPTS_DIR / prompt_path
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            prompt_content = f.read()
-            return Template(prompt_content)
+        return get_prompt_registry().get(prompt_path)
     except FileNotFoundError:
         # In a real app, you'd use a logger. For now, raising is clear.
-        print(f"Error: Prompt file not found at: {full_path}")
+        print(f"Error: Prompt file not found at: {PROMPTS_DIR / prompt_path}")
         raise
     except Exception as e:
-        print(f"Error reading prompt file at: {full_path}: {e}")
-        raise IOError(f"Error reading prompt file at: {full_path}: {e}") 
\ No newline at end of file
+        print(f"Error reading prompt file at: {PROMPTS_DIR / prompt_path}: {e}")
+        raise IOError(f"Error reading prompt file at: {PROMPTS_DIR / prompt_path}: {e}")
@@ -0,0 +1,120 @@
+import asyncio
+import atexit
+import os
+import traceback
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from framwork.logger import logger, agent_log_run
+from framwork.mcp_swe_flow.graph import create_mcp_swe_workflow
+from framwork.mcp_swe_flow.checkpointing import open_checkpointer, invoke_with_checkpoint
+from framwork.mcp_swe_flow.config import aclose_llm_clients
+
+# State of a worker process of the batch worker pool: a long-lived event loop,
+# the workflow compiled once, and the checkpointer it writes to.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_app = None
+_worker_resources: Optional[AsyncExitStack] = None
+
+
+def build_initial_state(user_input: Optional[str] = None, api_name: Optional[str] = None,
+                        swe_model: Optional[str] = None, interactive_mode: bool = False) -> Dict[str, Any]:
+    """Builds the initial workflow state for a single run."""
+    initial_state: Dict[str, Any] = {
+        "interactive_mode": interactive_mode,
+        "swe_model": swe_model or os.getenv("SWE_AGENT_MODEL", "gpt-4o")
+    }
+    if api_name:
+        initial_state["api_name"] = api_name
+    if user_input:
+        initial_state["user_input"] = user_input
+    return initial_state
+
+
+async def run_workflow_task(app, run_id: str, user_input: str, log_file: Path,
+                            swe_model: Optional[str] = None, timeout: Optional[float] = None,
+                            resume: bool = False) -> Dict[str, Any]:
+    """
+    Runs one non-interactive workflow inside the current process.
+
+    `app` must be compiled with a checkpointer; run_id is used as the checkpoint thread,
+    so a run that fails or times out can be resumed later with resume=True.
+    Everything logged by the run (loguru records and agent jsonl logs) is tagged
+    with run_id, so concurrent runs sharing the process keep separate log files.
+    Returns a picklable summary of the run.
+    """
+    result = {
+        "run_id": run_id,
+        "user_input": user_input,
+        "status": "failed",
+        "error": None,
+        "server_file_path": None,
+        "log_file": str(log_file),
+    }
+
+    sink_id = logger.add(
+        str(log_file),
+        level="DEBUG",
+        filter=lambda record: record["extra"].get("run_id") == run_id
+    )
+    try:
+        with logger.contextualize(run_id=run_id), agent_log_run(run_id):
+            initial_state = build_initial_state(user_input=user_input, swe_model=swe_model)
+            logger.info(f"Invoking workflow run '{run_id}' (resume={resume}) with initial state: {initial_state}")
+            try:
+                final_state = await asyncio.wait_for(
+                    invoke_with_checkpoint(app, run_id, initial_state, resume=resume),
+                    timeout=timeout
+                )
+                if final_state.get("error"):
+                    result["error"] = final_state["error"]
+                else:
+                    result["status"] = "success"
+                result["server_file_path"] = final_state.get("server_file_path")
+            except asyncio.TimeoutError:
+                result["status"] = "timeout"
+                result["error"] = f"Workflow did not finish within {timeout} seconds."
+                logger.error(result["error"])
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                logger.error(f"An error occurred during workflow execution: {e}\n{traceback.format_exc()}")
+    finally:
+        logger.remove(sink_id)
+    return result
+
+
+async def _open_worker_resources():
+    global _worker_app, _worker_resources
+    _worker_resources = AsyncExitStack()
+    # The pooled LLM connections live as long as the worker's event loop
+    _worker_resources.push_async_callback(aclose_llm_clients)
+    checkpointer = await _worker_resources.enter_async_context(open_checkpointer())
+    _worker_app = create_mcp_swe_workflow(checkpointer=checkpointer)
+
+
+def _close_worker_resources():
+    if _worker_loop is not None and _worker_resources is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(_worker_resources.aclose())
+        _worker_loop.close()
+
+
+def init_worker_process():
+    """ProcessPoolExecutor initializer: compile the workflow and create a long-lived event loop."""
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_loop.run_until_complete(_open_worker_resources())
+    atexit.register(_close_worker_resources)
+
+
+def run_workflow_in_worker(run_id: str, user_input: str, log_file: str,
+                           swe_model: Optional[str] = None, timeout: Optional[float] = None,
+                           resume: bool = False) -> Dict[str, Any]:
+    """Entry point executed in a worker process of the batch worker pool."""
+    if _worker_loop is None:
+        init_worker_process()
+    return _worker_loop.run_until_complete(
+        run_workflow_task(_worker_app, run_id, user_input, Path(log_file),
+                          swe_model=swe_model, timeout=timeout, resume=resume)
+    )
@@ -15,6 +15,10 @@ class MCPWorkflowState(TypedDict, total=False):
     test_report_dir: str
     user_input: str
     model_name: str # The name of the LLM model to use for the run
+    swe_model: str # Model used by the SWE-Agent, carried in state so concurrent runs can differ
+    swe_models: List[str] # Fan-out mode: run generation, testing and refinement once per model
+    fanout_concurrency: int # Fan-out mode: maximum number of model runs in flight
+    full_retest: bool # Re-plan and re-run every tool in each test round, ignoring unchanged tools' results
     
     # Loaded content
     api_spec: Dict[str, Any]
@@ -27,6 +31,9 @@ class MCPWorkflowState(TypedDict, total=False):
     # Generated content
     server_code: str
     server_file_path: str
+    preflight_report: Dict[str, Any] # Diagnostics of the static/import checks run before server_test
+    tool_fingerprints: Dict[str, str] # Hash of each tool and its helpers in the last tested server version
+    tool_test_results: Dict[str, List[Dict[str, Any]]] # Execution log entries of the last test round, keyed by tool name
     test_report: Union[str, Dict[str, Any]]
     test_report_path: str
     test_report_content: Union[str, Dict[str, Any]]
@@ -34,6 +41,7 @@ class MCPWorkflowState(TypedDict, total=False):
     refined_code_path: str
     refined_report: Dict[str, Any]
     log_files: List[str] # List of paths to agent log files for the current run
+    model_runs: Dict[str, Dict[str, Any]] # Fan-out mode: outcome of each model run, keyed by model name
     
     # Flow control
     next_step: Optional[str]
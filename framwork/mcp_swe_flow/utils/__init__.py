@@ -6,6 +6,11 @@ from .file_helpers import (
     list_server_files,
     list_report_files
 )
+from .disk_cache import DiskLRUStore
+from .patching import apply_patch, PatchApplyError
+from .doc_retrieval import select_mcp_doc
+from .requirements_scan import scan_requirements
+from .placeholders import compile_parameters, resolve_parameters, StepOutputs, PlaceholderResolutionError
 
 __all__ = [
     "find_api_file",
@@ -13,5 +18,14 @@ __all__ = [
     "load_mcp_doc",
     "read_file_content",
     "list_server_files",
-    "list_report_files"
+    "list_report_files",
+    "DiskLRUStore",
+    "apply_patch",
+    "PatchApplyError",
+    "compile_parameters",
+    "resolve_parameters",
+    "StepOutputs",
+    "PlaceholderResolutionError",
+    "select_mcp_doc",
+    "scan_requirements"
 ] 
\ No newline at end of file
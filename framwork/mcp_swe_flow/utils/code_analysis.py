@@ -0,0 +1,224 @@
+import ast
+import hashlib
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _decorator_target(decorator: ast.expr) -> Optional[ast.expr]:
+    """`@mcp.tool` and `@mcp.tool(...)` both resolve to the `mcp.tool` attribute."""
+    if isinstance(decorator, ast.Call):
+        decorator = decorator.func
+    return decorator if isinstance(decorator, ast.Attribute) else None
+
+
+def find_fastmcp_instances(tree: ast.Module) -> List[str]:
+    """Names bound to a FastMCP(...) instance at module level, e.g. ['mcp']."""
+    names = []
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AnnAssign)) and isinstance(node.value, ast.Call):
+            func = node.value.func
+            func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            if func_name == "FastMCP":
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names.extend(t.id for t in targets if isinstance(t, ast.Name))
+    return names
+
+
+def extract_mcp_tools(tree: ast.Module, source: str = "") -> List[Dict[str, Any]]:
+    """
+    Statically extracts the functions registered with `@<server>.tool`.
+
+    Each entry has the tool name, its decorator owner, line range, parameters
+    (name, annotation, has_default), return annotation, whether it has a docstring
+    and, when source is given, the exact source segment of the function.
+    """
+    tools = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            target = _decorator_target(decorator)
+            if target is None or target.attr != "tool":
+                continue
+            name = node.name
+            # @mcp.tool(name="...") overrides the registered name
+            if isinstance(decorator, ast.Call):
+                for keyword in decorator.keywords:
+                    if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                        name = keyword.value.value
+            args = node.args
+            positional = args.posonlyargs + args.args
+            defaults_start = len(positional) - len(args.defaults)
+            parameters = [
+                {
+                    "name": arg.arg,
+                    "annotation": ast.unparse(arg.annotation) if arg.annotation else None,
+                    "has_default": index >= defaults_start,
+                }
+                for index, arg in enumerate(positional)
+            ] + [
+                {
+                    "name": arg.arg,
+                    "annotation": ast.unparse(arg.annotation) if arg.annotation else None,
+                    "has_default": default is not None,
+                }
+                for arg, default in zip(args.kwonlyargs, args.kw_defaults)
+            ]
+            tools.append({
+                "name": name,
+                "function": node.name,
+                "owner": ast.unparse(target.value),
+                "is_async": isinstance(node, ast.AsyncFunctionDef),
+                "lineno": node.lineno,
+                "end_lineno": node.end_lineno,
+                "parameters": parameters,
+                "returns": ast.unparse(node.returns) if node.returns else None,
+                "has_docstring": ast.get_docstring(node) is not None,
+                "source": ast.get_source_segment(source, node, padded=True) if source else None,
+            })
+            break
+    return tools
+
+
+def find_imported_modules(tree: ast.Module) -> Dict[str, int]:
+    """Top-level names of absolute imports anywhere in the module, mapped to their first line."""
+    modules: Dict[str, int] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                modules.setdefault(alias.name.split(".")[0], node.lineno)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.setdefault(node.module.split(".")[0], node.lineno)
+    return modules
+
+
+def is_guarded_import(tree: ast.Module, lineno: int) -> bool:
+    """True if the import on lineno sits in a try block handling ImportError (an optional dependency)."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and node.body and node.body[0].lineno <= lineno <= node.body[-1].end_lineno:
+            for handler in node.handlers:
+                names = [ast.unparse(handler.type)] if handler.type is not None else ["BaseException"]
+                if any(n in ("ImportError", "ModuleNotFoundError", "Exception", "BaseException") or "ImportError" in n for n in names):
+                    return True
+    return False
+
+
+def _local_module_names(search_dirs: Iterable[Path]) -> Set[str]:
+    names = set()
+    for directory in search_dirs:
+        if directory.is_dir():
+            for entry in directory.iterdir():
+                if entry.suffix == ".py":
+                    names.add(entry.stem)
+                elif entry.is_dir() and (entry / "__init__.py").exists():
+                    names.add(entry.name)
+    return names
+
+
+def find_missing_imports(tree: ast.Module, search_dirs: Iterable[Path] = ()) -> List[Dict[str, Any]]:
+    """
+    Third-party modules imported by the code that cannot be found in the current interpreter.
+    Standard library modules and modules next to the code (search_dirs) are ignored;
+    imports guarded by `except ImportError` are reported with optional=True.
+    """
+    local_names = _local_module_names(search_dirs)
+    missing = []
+    for module, lineno in sorted(find_imported_modules(tree).items(), key=lambda item: item[1]):
+        if module in sys.stdlib_module_names or module in local_names or module == "__future__":
+            continue
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except (ImportError, ValueError):
+            found = False
+        if found:
+            continue
+        missing.append({
+            "module": module,
+            "lineno": lineno,
+            "optional": is_guarded_import(tree, lineno),
+        })
+    return missing
+
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    """`if __name__ == "__main__":` blocks only start the server, they don't change tool behavior."""
+    return (
+        isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+        and isinstance(node.test.left, ast.Name) and node.test.left.id == "__name__"
+    )
+
+
+def _module_symbols(tree: ast.Module) -> Tuple[Dict[str, List[ast.stmt]], List[ast.stmt]]:
+    """
+    Module-level statements that bind names (defs, classes, assignments, imports), keyed by
+    name, and the remaining statements that every tool implicitly depends on.
+    """
+    symbols: Dict[str, List[ast.stmt]] = {}
+    shared: List[ast.stmt] = []
+    for node in tree.body:
+        names: List[str] = []
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [(alias.asname or alias.name).split(".")[0] for alias in node.names]
+        elif _is_main_guard(node) or (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)):
+            continue  # __main__ block or module docstring
+        if names:
+            for name in names:
+                symbols.setdefault(name, []).append(node)
+        else:
+            shared.append(node)
+    return symbols, shared
+
+
+def _referenced_names(node: ast.AST) -> Set[str]:
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+
+def tool_fingerprints(source: str) -> Dict[str, str]:
+    """
+    A hash per registered tool covering the tool function and, transitively, every
+    module-level function, class, constant and import it references, plus the module-level
+    statements that bind no name. Two versions of a server give a tool the same
+    fingerprint only if nothing its behavior depends on changed; comments and
+    formatting are ignored.
+    """
+    tree = ast.parse(source)
+    symbols, shared = _module_symbols(tree)
+    shared_dump = "\n".join(ast.dump(node) for node in shared)
+    tool_nodes = {
+        tool["name"]: node
+        for tool in extract_mcp_tools(tree)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == tool["function"] and node.lineno == tool["lineno"]
+    }
+
+    fingerprints = {}
+    for name, tool_node in tool_nodes.items():
+        seen: Set[int] = {id(tool_node)}
+        dumps = [ast.dump(tool_node)]
+        pending = list(_referenced_names(tool_node))
+        visited_names: Set[str] = set()
+        while pending:
+            symbol = pending.pop()
+            if symbol in visited_names:
+                continue
+            visited_names.add(symbol)
+            for node in symbols.get(symbol, []):
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                dumps.append(ast.dump(node))
+                pending.extend(_referenced_names(node))
+        digest = hashlib.sha256()
+        digest.update(shared_dump.encode("utf-8"))
+        for dump in sorted(dumps):
+            digest.update(b"\0" + dump.encode("utf-8"))
+        fingerprints[name] = digest.hexdigest()[:16]
+    return fingerprints
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from framwork.logger import logger
+
+
+class DiskLRUStore:
+    """
+    A small SQLite-backed key/value store with size-based LRU eviction.
+
+    SQLite is used (instead of one file per entry) so that several workflow
+    processes can share the same cache file safely.
+    Usage:
+        store = DiskLRUStore(Path("logs/cache/llm_cache.sqlite"), max_bytes=512 * 1024 * 1024)
+        store.set("key", b"value")
+        store.get("key")
+    """
+    def __init__(self, db_path: Path, max_bytes: int = 512 * 1024 * 1024, table: str = "entries"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table}(accessed_at)")
+            self._conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[bytes]:
+        """
+        Return the stored value and refresh its LRU position, or None on a miss.
+        Entries stored more than max_age seconds ago count as a miss (they are kept until evicted or replaced).
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if max_age is not None and row[1] < time.time() - max_age:
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        """Store a value and evict the least recently used entries if the store is over budget."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove a single entry."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def total_size(self) -> int:
+        """Total size in bytes of all stored values."""
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict_locked(self):
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} least recently used entries from cache '{self.db_path.name}'.")
+
+    def close(self):
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,167 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from framwork.logger import logger
+
+# ========== MCP Doc Retrieval ==========
+# resources/mcp-server-doc.md is split by section and indexed with BM25 (offline, no
+# embeddings). Prompts get the sections most relevant to the current request or failing test,
+# within a token budget, instead of the whole document on every turn.
+# - MCP_DOC_RETRIEVAL: 'false' renders the full document as before (default: true)
+# - MCP_DOC_TOP_K: maximum number of sections per prompt (default: 4)
+# - MCP_DOC_TOKEN_BUDGET: maximum estimated tokens of the selected sections (default: 2000)
+MCP_DOC_RETRIEVAL = os.getenv("MCP_DOC_RETRIEVAL", "true").lower() == "true"
+MCP_DOC_TOP_K = int(os.getenv("MCP_DOC_TOP_K", 4))
+MCP_DOC_TOKEN_BUDGET = int(os.getenv("MCP_DOC_TOKEN_BUDGET", 2000))
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "if", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "we", "with", "you", "your", "will", "can",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, like the scheduler's reservation estimate."""
+    return len(text) // 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords; snake_case and dotted names split into their parts."""
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def split_markdown_sections(text: str, max_level: int = 3) -> List[Dict[str, Any]]:
+    """
+    Splits markdown at headings of level <= max_level, ignoring '#' lines inside code fences.
+    Each section keeps its heading path (e.g. "MCP Core Components > 1. The FastMCP Class").
+    Identical section bodies (the doc repeats some of them in an appendix) are kept once.
+    """
+    sections: List[Dict[str, Any]] = []
+    path: List[str] = []
+    current_title, current_lines = "Introduction", []
+    in_fence = False
+
+    def flush():
+        body = "\n".join(current_lines).strip()
+        if body:
+            sections.append({"title": current_title, "text": body})
+
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        heading = None if in_fence else HEADING_PATTERN.match(line)
+        if heading and len(heading.group(1)) <= max_level:
+            flush()
+            level = len(heading.group(1))
+            path = path[:level - 1] + [heading.group(2).strip()]
+            current_title, current_lines = " > ".join(p for p in path if p), [line]
+        else:
+            current_lines.append(line)
+    flush()
+
+    unique, seen = [], set()
+    for section in sections:
+        body = "\n".join(section["text"].splitlines()[1:]).strip() or section["text"]
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            section["index"] = len(unique)
+            unique.append(section)
+    return unique
+
+
+class BM25Index:
+    """Okapi BM25 over a small list of documents (k1=1.5, b=0.75)."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        results = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+class DocSectionIndex:
+    """BM25 index over the sections of one markdown document."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.sections = split_markdown_sections(text)
+        # Titles count twice: a heading match is a strong relevance signal
+        self.index = BM25Index([f"{s['title']} {s['title']} {s['text']}" for s in self.sections])
+
+    def select(self, query: str, top_k: int, token_budget: int) -> List[Dict[str, Any]]:
+        """Best-scoring sections that fit in the budget, returned in document order."""
+        ranked = sorted(zip(self.index.scores(query), self.sections), key=lambda item: (-item[0], item[1]["index"]))
+        selected, used = [], 0
+        for score, section in ranked:
+            if len(selected) >= top_k or score <= 0:
+                break
+            tokens = estimate_tokens(section["text"])
+            if used + tokens > token_budget:
+                continue
+            selected.append({**section, "score": round(score, 3), "tokens": tokens})
+            used += tokens
+        return sorted(selected, key=lambda s: s["index"])
+
+
+_indexes: Dict[str, DocSectionIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_doc_index(text: str) -> DocSectionIndex:
+    """Index of a document, built once per distinct text and shared by all runs of the process."""
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = DocSectionIndex(text)
+        return index
+
+
+def select_mcp_doc(mcp_doc: Optional[str], query: str, agent_logger=None, purpose: str = "",
+                   top_k: Optional[int] = None, token_budget: Optional[int] = None) -> Optional[str]:
+    """
+    The sections of mcp_doc relevant to query, joined in document order. Returns the full
+    document when retrieval is disabled or nothing matches, and logs the selection.
+    """
+    if not mcp_doc or not MCP_DOC_RETRIEVAL:
+        return mcp_doc
+    index = get_doc_index(mcp_doc)
+    selected = index.select(query or "", top_k or MCP_DOC_TOP_K, token_budget or MCP_DOC_TOKEN_BUDGET)
+    if not selected:
+        logger.info(f"MCP doc retrieval ({purpose}): no section matched, using the full document.")
+        return mcp_doc
+
+    sliced = "\n\n".join(section["text"] for section in selected)
+    full_tokens, sliced_tokens = estimate_tokens(mcp_doc), estimate_tokens(sliced)
+    logger.info(f"MCP doc retrieval ({purpose}): {len(selected)}/{len(index.sections)} sections, "
+                f"~{sliced_tokens}/{full_tokens} tokens: {[s['title'] for s in selected]}")
+    if agent_logger:
+        agent_logger.log(event_type="mcp_doc_selection", purpose=purpose,
+                         sections=[{"title": s["title"], "score": s["score"], "tokens": s["tokens"]} for s in selected],
+                         selected_tokens=sliced_tokens, full_tokens=full_tokens)
+    return sliced
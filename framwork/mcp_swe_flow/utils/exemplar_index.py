@@ -0,0 +1,353 @@
+import ast
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from framwork.logger import logger
+from framwork.mcp_swe_flow.utils.code_analysis import extract_mcp_tools, find_imported_modules
+from framwork.mcp_swe_flow.utils.doc_retrieval import BM25Index
+
+# ========== Exemplar Index ==========
+# The human-written servers in workspace/public-mcp-servers and the generated ones in
+# workspace/pipeline-output-servers/<model>/<project> are indexed offline: tool signatures,
+# third-party imports and the benchmark score (`总分` of their detailed reports, or the pass rate
+# of their last pipeline test report). The planner gets the closest high-scoring servers as
+# context, so it rarely needs a web search to pick libraries and tool shapes.
+# - EXEMPLAR_INDEX_ENABLED: 'false' plans without exemplars (default: true)
+# - EXEMPLAR_INDEX_PATH: index file, built on first use if missing (framwork/build_exemplar_index.py rebuilds it)
+# - EXEMPLAR_TOP_K: exemplars per planning prompt (default: 2)
+# - EXEMPLAR_MIN_SCORE: servers scored below this (out of 100) are never suggested (default: 70)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+DEFAULT_EXEMPLAR_INDEX_PATH = PROJECT_ROOT / "logs" / "exemplar_index" / "exemplar_index.json"
+EXEMPLAR_INDEX_VERSION = 1
+
+EXEMPLAR_INDEX_ENABLED = os.getenv("EXEMPLAR_INDEX_ENABLED", "true").lower() == "true"
+EXEMPLAR_TOP_K = int(os.getenv("EXEMPLAR_TOP_K", 2))
+EXEMPLAR_MIN_SCORE = float(os.getenv("EXEMPLAR_MIN_SCORE", 70))
+
+# Benchmark reports scanned for scores, relative to the project root
+SCORE_REPORT_DIRS = ("data/raw_run_data", "results")
+TOTAL_SCORE_PATTERN = re.compile(r"总分:\s*(\d+(?:\.\d+)?)/100")
+TOTAL_TESTS_PATTERN = re.compile(r"Total Tests Executed:\*{0,2}\s*(\d+)")
+SUCCESSFUL_TESTS_PATTERN = re.compile(r"Successful Tests:\*{0,2}\s*(\d+)")
+SKIPPED_DIRS = {".git", ".venv", "venv", "env", "node_modules", "__pycache__", "tests", "test", "build", "dist", "site-packages"}
+# Every server imports these, they say nothing about the task
+IGNORED_IMPORTS = {"mcp", "fastmcp", "__future__", "dotenv", "pydantic", "typing_extensions"}
+MAX_TOOLS_IN_PROMPT = 12
+
+
+def _declared_tools(tree: ast.Module) -> List[Dict[str, Any]]:
+    """Tools of low-level servers, declared as `Tool(name="...", description="...", inputSchema={...})`."""
+    tools = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if (func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)) != "Tool":
+            continue
+        keywords = {k.arg: k.value for k in node.keywords if k.arg}
+        name = keywords.get("name")
+        if not (isinstance(name, ast.Constant) and isinstance(name.value, str)):
+            continue
+        description = keywords.get("description")
+        schema = keywords.get("inputSchema")
+        parameters = []
+        if isinstance(schema, ast.Dict):
+            for key, value in zip(schema.keys, schema.values):
+                if isinstance(key, ast.Constant) and key.value == "properties" and isinstance(value, ast.Dict):
+                    parameters = [{"name": k.value, "annotation": None, "has_default": False}
+                                  for k in value.keys if isinstance(k, ast.Constant) and isinstance(k.value, str)]
+        tools.append({
+            "name": name.value,
+            "parameters": parameters,
+            "returns": None,
+            "doc": description.value if isinstance(description, ast.Constant) and isinstance(description.value, str) else "",
+        })
+    return tools
+
+
+def _first_doc_line(text: Optional[str]) -> str:
+    return next((line.strip() for line in (text or "").strip().splitlines() if line.strip()), "")
+
+
+def _signature(tool: Dict[str, Any]) -> str:
+    params = ", ".join(
+        p["name"] + (f": {p['annotation']}" if p.get("annotation") else "") + (" = ..." if p.get("has_default") else "")
+        for p in tool.get("parameters", [])
+        if p["name"] not in ("self", "ctx", "context")
+    )
+    returns = f" -> {tool['returns']}" if tool.get("returns") else ""
+    return f"{tool['name']}({params}){returns}"
+
+
+def analyze_server_file(path: Path) -> Optional[Dict[str, Any]]:
+    """Tools (signature + first docstring line), third-party imports and module docstring of one server file."""
+    try:
+        source = path.read_text(encoding="utf-8")
+        tree = ast.parse(source)
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError):
+        return None
+
+    tools = []
+    for tool in extract_mcp_tools(tree, source):
+        function = next((n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+                         and n.name == tool["function"] and n.lineno == tool["lineno"]), None)
+        tools.append({**tool, "doc": _first_doc_line(ast.get_docstring(function) if function else None)})
+    if not tools:
+        tools = _declared_tools(tree)
+    if not tools:
+        return None
+
+    local_names = {p.stem for p in path.parent.glob("*.py")} | {p.name for p in path.parent.iterdir() if p.is_dir()}
+    imports = sorted(
+        module for module in find_imported_modules(tree)
+        if module not in sys.stdlib_module_names and module not in IGNORED_IMPORTS and module not in local_names
+    )
+    return {
+        "tools": [{"name": t["name"], "signature": _signature(t), "doc": t.get("doc", "")} for t in tools],
+        "imports": imports,
+        "docstring": _first_doc_line(ast.get_docstring(tree)),
+    }
+
+
+def _readme_summary(directory: Path) -> str:
+    """First prose paragraph of the README next to a server."""
+    readme = next((p for p in (directory / "README.md", directory / "readme.md") if p.exists()), None)
+    if readme is None:
+        return ""
+    try:
+        text = readme.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if paragraph and not paragraph.startswith(("#", "```", "[!", "![", "<", "|", "-", "*")):
+            return " ".join(paragraph.split())[:300]
+    return ""
+
+
+def _python_files(directory: Path) -> Iterable[Path]:
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS and not d.startswith(".")]
+        for name in files:
+            if name.endswith(".py"):
+                yield Path(root) / name
+
+
+def _report_name(server_file: Path) -> str:
+    """Name used by the benchmark for detailed_report_<name>.md of a server run from its file."""
+    return f"{server_file.parent.name}-server" if server_file.stem == "server" else server_file.stem
+
+
+def _pipeline_pass_rate(project_dir: Path) -> Optional[float]:
+    """Pass rate (0-100) of the last pipeline test report of a generated server."""
+    reports = list(project_dir.glob("refined/test_report_*.md")) or list(project_dir.glob("test_report_*.md"))
+    if not reports:
+        return None
+    try:
+        # Report names carry the API name, not a timestamp: the newest file is the last report
+        latest = max(reports, key=lambda report: report.stat().st_mtime)
+        text = latest.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return None
+    total, successful = TOTAL_TESTS_PATTERN.search(text), SUCCESSFUL_TESTS_PATTERN.search(text)
+    if not total or not successful or int(total.group(1)) == 0:
+        return None
+    return round(100.0 * int(successful.group(1)) / int(total.group(1)), 1)
+
+
+def collect_benchmark_scores(project_root: Path = PROJECT_ROOT) -> Dict[str, List[float]]:
+    """Total scores of every detailed benchmark report, keyed by the report name."""
+    scores: Dict[str, List[float]] = {}
+    for report_dir in SCORE_REPORT_DIRS:
+        for report in (project_root / report_dir).rglob("detailed_report_*.md"):
+            try:
+                match = TOTAL_SCORE_PATTERN.search(report.read_text(encoding="utf-8", errors="ignore"))
+            except OSError:
+                continue
+            if match:
+                scores.setdefault(report.stem[len("detailed_report_"):], []).append(float(match.group(1)))
+    return scores
+
+
+def _record(server_id: str, source: str, model: Optional[str], name: str, server_file: Path,
+            analysis: Dict[str, Any], description: str, report_names: List[str],
+            benchmark_scores: Dict[str, List[float]], pass_rate: Optional[float], project_root: Path) -> Dict[str, Any]:
+    runs = [score for report_name in report_names for score in benchmark_scores.get(report_name, [])]
+    if runs:
+        score, score_source = round(sum(runs) / len(runs), 1), f"benchmark ({len(runs)} runs)"
+    elif pass_rate is not None:
+        score, score_source = pass_rate, "pipeline test pass rate"
+    else:
+        score, score_source = None, None
+    try:
+        relative_path = str(server_file.resolve().relative_to(project_root.resolve()))
+    except ValueError:
+        relative_path = str(server_file)
+    return {
+        "id": server_id,
+        "source": source,
+        "model": model,
+        "name": name,
+        "path": relative_path,
+        "description": analysis["docstring"] or description,
+        "tools": analysis["tools"],
+        "imports": analysis["imports"],
+        "score": score,
+        "score_source": score_source,
+    }
+
+
+def build_exemplar_index(project_root: Path = PROJECT_ROOT) -> Dict[str, Any]:
+    """Scans the public and pipeline-generated servers and returns the index payload."""
+    workspace = project_root / "workspace"
+    benchmark_scores = collect_benchmark_scores(project_root)
+    records = []
+
+    public_dir = workspace / "public-mcp-servers"
+    for server_dir in sorted(p for p in public_dir.iterdir() if p.is_dir()) if public_dir.is_dir() else []:
+        analyses = [(path, analyze_server_file(path)) for path in _python_files(server_dir)]
+        analyses = [(path, analysis) for path, analysis in analyses if analysis]
+        if not analyses:
+            continue
+        # The file declaring the most tools is the server; helpers split across files add their imports
+        server_file, analysis = max(analyses, key=lambda item: len(item[1]["tools"]))
+        analysis = {**analysis, "imports": sorted({m for _, a in analyses for m in a["imports"]})}
+        records.append(_record(
+            f"public/{server_dir.name}", "public", None, server_dir.name, server_file, analysis,
+            _readme_summary(server_dir), [f"{server_dir.name}-server", _report_name(server_file)],
+            benchmark_scores, None, project_root
+        ))
+
+    pipeline_dir = workspace / "pipeline-output-servers"
+    for model_dir in sorted(p for p in pipeline_dir.iterdir() if p.is_dir()) if pipeline_dir.is_dir() else []:
+        for project_dir in sorted(p for p in model_dir.iterdir() if p.is_dir() and p.name != "__pycache__"):
+            candidates = [project_dir / "refined" / "server.py", project_dir / f"{project_dir.name}.py"]
+            server_file = next((p for p in candidates if p.exists()), None)
+            analysis = analyze_server_file(server_file) if server_file else None
+            if not analysis:
+                continue
+            readme_dir = project_dir / "refined" if (project_dir / "refined" / "README.md").exists() else project_dir
+            records.append(_record(
+                f"pipeline/{model_dir.name}/{project_dir.name}", "pipeline", model_dir.name, project_dir.name,
+                server_file, analysis, _readme_summary(readme_dir), [f"{model_dir.name}-{project_dir.name}"],
+                benchmark_scores, _pipeline_pass_rate(project_dir), project_root
+            ))
+
+    return {"version": EXEMPLAR_INDEX_VERSION, "built_at": time.time(), "records": records}
+
+
+def save_exemplar_index(payload: Dict[str, Any], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class ExemplarIndex:
+    """BM25 search over the indexed servers, weighted by their score."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.index = BM25Index([self._document(r) for r in records])
+
+    @staticmethod
+    def _document(record: Dict[str, Any]) -> str:
+        tools = " ".join(f"{t['name']} {t['doc']}" for t in record["tools"])
+        # Names count twice, like section titles in the doc index
+        return f"{record['name']} {record['name']} {record['description']} {tools} {' '.join(record['imports'])}"
+
+    def search(self, query: str, top_k: int = EXEMPLAR_TOP_K, min_score: float = EXEMPLAR_MIN_SCORE,
+               exclude_dirs: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        The top_k servers most relevant to query, ignoring those under exclude_dirs. Servers
+        scored below min_score are skipped; unscored ones are kept but ranked as mediocre.
+        """
+        excluded = tuple(os.path.join(d, "") for d in exclude_dirs)
+        ranked = []
+        for relevance, record in zip(self.index.scores(query), self.records):
+            if relevance <= 0 or (excluded and record["path"].startswith(excluded)):
+                continue
+            if record["score"] is not None and record["score"] < min_score:
+                continue
+            quality = record["score"] if record["score"] is not None else 50.0
+            ranked.append((relevance * (0.5 + quality / 200), relevance, record))
+        ranked.sort(key=lambda item: -item[0])
+        return [{**record, "relevance": round(relevance, 3)} for _, relevance, record in ranked[:top_k]]
+
+
+def format_exemplars(exemplars: List[Dict[str, Any]]) -> str:
+    """Markdown summary of the exemplars for a prompt: libraries and tool signatures, no code."""
+    blocks = []
+    for exemplar in exemplars:
+        origin = "human-written" if exemplar["source"] == "public" else f"generated by {exemplar['model']}"
+        score = f", score {exemplar['score']:g}/100" if exemplar["score"] is not None else ""
+        lines = [f"### {exemplar['name']} ({origin}{score})"]
+        if exemplar["description"]:
+            lines.append(exemplar["description"])
+        lines.append(f"- Libraries: {', '.join(exemplar['imports']) or 'standard library only'}")
+        lines.append("- Tools:")
+        for tool in exemplar["tools"][:MAX_TOOLS_IN_PROMPT]:
+            lines.append(f"  - `{tool['signature']}`" + (f": {tool['doc']}" if tool["doc"] else ""))
+        if len(exemplar["tools"]) > MAX_TOOLS_IN_PROMPT:
+            lines.append(f"  - ... and {len(exemplar['tools']) - MAX_TOOLS_IN_PROMPT} more")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+_exemplar_index: Optional[ExemplarIndex] = None
+_exemplar_index_loaded = False
+_exemplar_index_lock = threading.Lock()
+
+
+def get_exemplar_index() -> Optional[ExemplarIndex]:
+    """
+    The process-wide exemplar index, loaded from EXEMPLAR_INDEX_PATH (built and saved first if
+    the file is missing or from an older version). None if disabled or the build fails.
+    """
+    global _exemplar_index, _exemplar_index_loaded
+    with _exemplar_index_lock:
+        if _exemplar_index_loaded:
+            return _exemplar_index
+        _exemplar_index_loaded = True
+        if not EXEMPLAR_INDEX_ENABLED:
+            return None
+        path = Path(os.getenv("EXEMPLAR_INDEX_PATH", str(DEFAULT_EXEMPLAR_INDEX_PATH)))
+        payload = None
+        if path.exists():
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Could not read the exemplar index {path}: {e}. Rebuilding it.")
+            if payload and payload.get("version") != EXEMPLAR_INDEX_VERSION:
+                payload = None
+        if payload is None:
+            try:
+                start = time.time()
+                payload = build_exemplar_index()
+                save_exemplar_index(payload, path)
+                logger.info(f"Built the exemplar index ({len(payload['records'])} servers) in {time.time() - start:.1f}s: {path}")
+            except Exception as e:
+                logger.warning(f"Could not build the exemplar index: {e}. Planning without exemplars.")
+                return None
+        _exemplar_index = ExemplarIndex(payload["records"])
+        return _exemplar_index
+
+
+def find_exemplars(query: str, agent_logger=None, top_k: Optional[int] = None,
+                   exclude_dirs: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Closest high-scoring servers for a request, logged; an empty list when the index is unavailable."""
+    index = get_exemplar_index()
+    if index is None or not query:
+        return []
+    exemplars = index.search(query, top_k=top_k or EXEMPLAR_TOP_K, exclude_dirs=exclude_dirs)
+    logger.info(f"Exemplars for planning: {[(e['id'], e['score'], e['relevance']) for e in exemplars]}")
+    if agent_logger:
+        agent_logger.log(event_type="exemplars_selected",
+                         exemplars=[{"id": e["id"], "score": e["score"], "relevance": e["relevance"]} for e in exemplars])
+    return exemplars
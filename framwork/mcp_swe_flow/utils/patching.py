@@ -0,0 +1,208 @@
+import difflib
+import re
+from typing import List, Optional, Tuple
+
+# A single edit: (search, replace, hint_line). hint_line is the 1-based line number of the
+# search text in the original file when known (unified diff headers), otherwise None.
+Edit = Tuple[str, str, Optional[int]]
+
+SEARCH_REPLACE_PATTERN = re.compile(
+    r"<<<<<<<\s*SEARCH[^\n]*\n(.*?)^=======[^\n]*\n(.*?)^>>>>>>>\s*REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE
+)
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+# Minimum similarity for a block of lines to be accepted as the target of an edit
+FUZZY_MATCH_THRESHOLD = 0.9
+
+
+class PatchApplyError(ValueError):
+    """Raised when a patch cannot be parsed, located in the source, or yields invalid Python."""
+
+
+def parse_search_replace_blocks(text: str) -> List[Edit]:
+    """
+    Parses edits written as search/replace blocks: a '<<<<<<< SEARCH' line, the old lines,
+    a '=======' line, the new lines and a '>>>>>>> REPLACE' line.
+    """
+    edits = []
+    for match in SEARCH_REPLACE_PATTERN.finditer(text):
+        search, replace = match.group(1), match.group(2)
+        edits.append((search.rstrip("\n"), replace.rstrip("\n"), None))
+    return edits
+
+
+def parse_unified_diff(text: str) -> List[Edit]:
+    """Parses a unified diff into one edit per hunk; file headers are ignored."""
+    edits = []
+    search_lines, replace_lines, hint = None, None, None
+
+    def flush():
+        if search_lines is not None and (search_lines or replace_lines):
+            edits.append(("\n".join(search_lines), "\n".join(replace_lines), hint))
+
+    for line in text.splitlines():
+        header = HUNK_HEADER_PATTERN.match(line)
+        if header:
+            flush()
+            search_lines, replace_lines, hint = [], [], int(header.group(1))
+            continue
+        # Outside a hunk everything (file headers included) is skipped; inside one, "--- x" and
+        # "+++ x" are a removed "-- x" and an added "++ x"
+        if search_lines is None:
+            continue
+        if line.startswith("-"):
+            search_lines.append(line[1:])
+        elif line.startswith("+"):
+            replace_lines.append(line[1:])
+        elif line.startswith(" ") or line == "":
+            search_lines.append(line[1:])
+            replace_lines.append(line[1:])
+        elif line.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        else:
+            flush()
+            search_lines, replace_lines, hint = None, None, None
+    flush()
+    return edits
+
+
+def extract_edits(text: str) -> List[Edit]:
+    """Extracts edits from an LLM response, accepting search/replace blocks or a unified diff."""
+    edits = parse_search_replace_blocks(text)
+    if edits:
+        return edits
+    diff_match = re.search(r"```(?:diff|patch)\s*\n(.*?)```", text, re.DOTALL)
+    return parse_unified_diff(diff_match.group(1) if diff_match else text)
+
+
+def _indent_of(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _reindent(lines: List[str], source_indent: str, patch_indent: str) -> List[str]:
+    """Shifts replacement lines from the patch's indentation to the one found in the source."""
+    if source_indent == patch_indent:
+        return lines
+    shifted = []
+    for line in lines:
+        if not line.strip():
+            shifted.append(line)
+        elif line.startswith(patch_indent):
+            shifted.append(source_indent + line[len(patch_indent):])
+        else:
+            shifted.append(line)
+    return shifted
+
+
+def _find_block(source_lines: List[str], search_lines: List[str], hint_line: Optional[int]) -> Tuple[int, int]:
+    """
+    Locates search_lines in source_lines and returns the (start, end) slice to replace.
+    Tries, in order: whitespace-insensitive exact match, then the most similar block
+    above FUZZY_MATCH_THRESHOLD of which most lines match exactly (a near-identical line
+    such as `x = 10` for `x = 1` alone is never a match). Ambiguous matches are resolved
+    with hint_line.
+    """
+    size = len(search_lines)
+    normalized_search = [line.strip() for line in search_lines]
+    normalized_source = [line.strip() for line in source_lines]
+
+    candidates = [
+        start for start in range(len(source_lines) - size + 1)
+        if normalized_source[start:start + size] == normalized_search
+    ]
+    if not candidates:
+        best_ratio, candidates = 0.0, []
+        joined_search = "\n".join(normalized_search)
+        for start in range(len(source_lines) - size + 1):
+            exact_lines = sum(a == b for a, b in zip(normalized_source[start:start + size], normalized_search))
+            if exact_lines * 2 <= size:
+                continue
+            ratio = difflib.SequenceMatcher(None, joined_search, "\n".join(normalized_source[start:start + size])).ratio()
+            if ratio > best_ratio + 1e-9:
+                best_ratio, candidates = ratio, [start]
+            elif abs(ratio - best_ratio) <= 1e-9:
+                candidates.append(start)
+        if best_ratio < FUZZY_MATCH_THRESHOLD:
+            raise PatchApplyError(f"Could not locate the patch context in the source (best similarity {best_ratio:.2f}):\n{chr(10).join(search_lines[:5])}")
+
+    if len(candidates) > 1:
+        if hint_line is None:
+            raise PatchApplyError(f"Patch context is ambiguous, it matches {len(candidates)} places:\n{chr(10).join(search_lines[:5])}")
+        candidates.sort(key=lambda start: abs(start + 1 - hint_line))
+    start = candidates[0]
+    return start, start + size
+
+
+def _whole_line_match(source: str, search: str) -> Optional[int]:
+    """Offset of the only occurrence of search in source if it starts and ends on line boundaries, else None."""
+    if source.count(search) != 1:
+        return None
+    start = source.index(search)
+    end = start + len(search)
+    if (start == 0 or source[start - 1] == "\n") and (end == len(source) or source[end] == "\n"):
+        return start
+    return None
+
+
+def apply_edit(source: str, search: str, replace: str, hint_line: Optional[int] = None) -> str:
+    r"""
+    Applies a single edit to source, matching its context fuzzily if needed. The context
+    is matched as whole lines, never as part of a longer line:
+
+    >>> apply_edit("def f():\n    x = 10\n    x = 1\n", "    x = 1", "    x = 2")
+    'def f():\n    x = 10\n    x = 2\n'
+    """
+    if not search.strip():
+        # Pure insertion: use the diff position if known, otherwise append
+        source_lines = source.split("\n")
+        position = min(max((hint_line or len(source_lines) + 1) - 1, 0), len(source_lines))
+        return "\n".join(source_lines[:position] + replace.split("\n") + source_lines[position:])
+
+    start = _whole_line_match(source, search)
+    if start is not None:
+        return source[:start] + replace + source[start + len(search):]
+
+    source_lines = source.split("\n")
+    search_lines = search.split("\n")
+    # Leading/trailing blank lines in a hunk carry no context and only hurt matching
+    while search_lines and not search_lines[0].strip():
+        search_lines.pop(0)
+    while search_lines and not search_lines[-1].strip():
+        search_lines.pop()
+
+    start, end = _find_block(source_lines, search_lines, hint_line)
+    first_search_line = next(line for line in search_lines if line.strip())
+    replace_lines = _reindent(replace.split("\n"), _indent_of(source_lines[start]), _indent_of(first_search_line))
+    return "\n".join(source_lines[:start] + replace_lines + source_lines[end:])
+
+
+def validate_python(code: str, filename: str = "<patched>") -> None:
+    """Raises PatchApplyError if the code does not compile."""
+    try:
+        compile(code, filename, "exec")
+    except SyntaxError as e:
+        raise PatchApplyError(f"Patched code does not compile: {e.msg} (line {e.lineno})") from e
+
+
+def apply_patch(source: str, patch_text: str, filename: str = "<patched>") -> str:
+    """
+    Applies the edits contained in an LLM response (search/replace blocks or unified diff)
+    to source and validates the result with compile().
+
+    Raises:
+        PatchApplyError: No edits were found, an edit could not be located, or the result does not compile.
+    """
+    edits = extract_edits(patch_text)
+    if not edits:
+        raise PatchApplyError("No search/replace blocks or diff hunks found in the response.")
+
+    patched = source
+    for index, (search, replace, hint_line) in enumerate(edits, start=1):
+        try:
+            patched = apply_edit(patched, search, replace, hint_line)
+        except PatchApplyError as e:
+            raise PatchApplyError(f"Edit {index}/{len(edits)} failed: {e}") from e
+
+    validate_python(patched, filename)
+    return patched
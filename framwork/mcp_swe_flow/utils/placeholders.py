@@ -0,0 +1,198 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from framwork.logger import logger
+
+# Test plan parameters reference earlier results as "$outputs.step_id.json_path", with list
+# access as "[index]" and dotted keys resolved greedily ("$outputs.s1.a.b" matches a key "a.b"
+# before descending into "a"). Placeholders are compiled once when the plan is validated and
+# each step result is parsed at most once, however many placeholders reference it.
+PLACEHOLDER_PREFIX = "$outputs."
+
+STEP_ID_PATTERN = re.compile(r"[^.\[\"]+")
+INDEX_PATTERN = re.compile(r"\[(\d+)\]")
+KEY_SEGMENT_PATTERN = re.compile(r"[^\[\]]+")
+JSON_FENCE_PATTERN = re.compile(r"```json\s*([\s\S]*?)\s*```")
+
+
+class PlaceholderResolutionError(ValueError):
+    """Raised when a placeholder is malformed or its path does not exist in the referenced step's output."""
+
+    def __init__(self, placeholder: str, segment: str, reason: str):
+        self.placeholder = placeholder
+        self.segment = segment
+        self.reason = reason
+        super().__init__(f"{reason} (at '{segment}' in '{placeholder}')")
+
+
+class _IndexSegment:
+    __slots__ = ("index", "text")
+
+    def __init__(self, index: int, text: str):
+        self.index = index
+        self.text = text
+
+
+class _KeySegment:
+    """A dotted key run such as ".a.b.c"; candidate keys are joined once, longest first."""
+    __slots__ = ("parts", "candidates", "text")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = text[1:].split(".")
+        self.candidates = [
+            [(end, ".".join(self.parts[start:end])) for end in range(len(self.parts), start, -1)]
+            for start in range(len(self.parts))
+        ]
+
+
+class Placeholder:
+    """A compiled "$outputs.<step_id><path>" reference."""
+    __slots__ = ("text", "step_id", "segments", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.step_id: Optional[str] = None
+        self.segments: List[Union[_IndexSegment, _KeySegment]] = []
+        # Syntax errors are kept and raised on resolution, so only the steps using them fail
+        self.error: Optional[PlaceholderResolutionError] = None
+        try:
+            self._compile()
+        except PlaceholderResolutionError as e:
+            self.error = e
+
+    def _compile(self):
+        path = self.text[len(PLACEHOLDER_PREFIX):]
+        match = STEP_ID_PATTERN.match(path)
+        if not match:
+            raise PlaceholderResolutionError(self.text, path, "Could not extract a step_id")
+        self.step_id = match.group(0)
+        position = match.end()
+        while position < len(path):
+            index_match = INDEX_PATTERN.match(path, position)
+            if index_match:
+                self.segments.append(_IndexSegment(int(index_match.group(1)), index_match.group(0)))
+                position = index_match.end()
+                continue
+            if path[position] != ".":
+                raise PlaceholderResolutionError(self.text, path[position:], "Invalid path segment")
+            key_match = KEY_SEGMENT_PATTERN.match(path, position + 1)
+            if not key_match:
+                raise PlaceholderResolutionError(self.text, path[position:], "Empty key after '.'")
+            self.segments.append(_KeySegment(path[position:key_match.end()]))
+            position = key_match.end()
+
+    def resolve(self, outputs: "StepOutputs") -> Any:
+        if self.error:
+            raise self.error
+        if self.step_id not in outputs:
+            raise PlaceholderResolutionError(self.text, self.step_id, f"Step ID '{self.step_id}' not found in outputs")
+        value = outputs.value(self.step_id)
+        for segment in self.segments:
+            if isinstance(segment, _IndexSegment):
+                if not isinstance(value, list):
+                    raise PlaceholderResolutionError(self.text, segment.text, f"Cannot apply an index to a non-list value (type: {type(value).__name__})")
+                if segment.index >= len(value):
+                    raise PlaceholderResolutionError(self.text, segment.text, f"Index out of range for a list of {len(value)} item(s)")
+                value = value[segment.index]
+                continue
+            start = 0
+            while start < len(segment.parts):
+                if not isinstance(value, dict):
+                    raise PlaceholderResolutionError(self.text, ".".join(segment.parts[start:]), f"Cannot read a key from a non-object value (type: {type(value).__name__})")
+                for end, key in segment.candidates[start]:
+                    if key in value:
+                        value = value[key]
+                        start = end
+                        break
+                else:
+                    raise PlaceholderResolutionError(self.text, ".".join(segment.parts[start:]), "Key not found")
+        return value
+
+
+class StepOutputs:
+    """
+    Results of the executed steps ({"status", "result"} dicts, keyed by step_id).
+    The JSON value of a result (from a ```json fence or the whole string) is parsed on first use and memoized.
+    """
+
+    def __init__(self):
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._values: Dict[str, Any] = {}
+
+    def __setitem__(self, step_id: str, step_result: Dict[str, Any]):
+        self._results[step_id] = step_result
+        self._values.pop(step_id, None)
+
+    def __getitem__(self, step_id: str) -> Dict[str, Any]:
+        return self._results[step_id]
+
+    def __contains__(self, step_id: str) -> bool:
+        return step_id in self._results
+
+    def value(self, step_id: str) -> Any:
+        if step_id not in self._values:
+            value = self._results[step_id]["result"]
+            if isinstance(value, str):
+                json_match = JSON_FENCE_PATTERN.search(value)
+                str_to_parse = json_match.group(1).strip() if json_match else value
+                try:
+                    value = json.loads(str_to_parse)
+                except json.JSONDecodeError:
+                    logger.warning(f"Could not parse output from step '{step_id}' as JSON. Proceeding with raw string.")
+            self._values[step_id] = value
+        return self._values[step_id]
+
+
+def compile_parameters(params: Any) -> Any:
+    """Copy of a step's parameters with every "$outputs." string replaced by a compiled Placeholder."""
+    if isinstance(params, str) and params.startswith(PLACEHOLDER_PREFIX):
+        return Placeholder(params)
+    if isinstance(params, dict):
+        return {key: compile_parameters(value) for key, value in params.items()}
+    if isinstance(params, list):
+        return [compile_parameters(item) for item in params]
+    return params
+
+
+def placeholder_dependencies(compiled: Any) -> List[str]:
+    """step_ids referenced by the compiled parameters, in order of first appearance."""
+    dependencies: Dict[str, None] = {}
+
+    def walk(value: Any):
+        if isinstance(value, Placeholder):
+            if value.step_id is not None:
+                dependencies.setdefault(value.step_id)
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(compiled)
+    return list(dependencies)
+
+
+def resolve_parameters(compiled: Any, outputs: StepOutputs) -> Tuple[Any, List[PlaceholderResolutionError]]:
+    """
+    Resolves compiled parameters against the step outputs. Placeholders that cannot be
+    resolved become None; their errors are returned alongside the parameters.
+    """
+    errors: List[PlaceholderResolutionError] = []
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, Placeholder):
+            try:
+                return value.resolve(outputs)
+            except PlaceholderResolutionError as e:
+                errors.append(e)
+                return None
+        if isinstance(value, dict):
+            return {key: resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    return resolve(compiled), errors
@@ -0,0 +1,162 @@
+import ast
+import importlib.metadata
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from framwork.mcp_swe_flow.utils.code_analysis import _local_module_names, find_imported_modules
+
+# ========== Requirements Scan ==========
+# requirements.txt of a delivered server is derived from its imports: every third-party
+# top-level module is mapped to the distribution that provides it. The finalizer LLM is only
+# asked about modules that cannot be mapped.
+# - REQUIREMENTS_SCAN: 'false' generates the whole file with the LLM as before (default: true)
+REQUIREMENTS_SCAN = os.getenv("REQUIREMENTS_SCAN", "true").lower() == "true"
+
+BASE_REQUIREMENT = "mcp[cli]"
+
+# Import names that differ from the name of the distribution on PyPI
+MODULE_DISTRIBUTIONS = {
+    "PIL": "Pillow",
+    "bs4": "beautifulsoup4",
+    "yaml": "PyYAML",
+    "cv2": "opencv-python",
+    "docx": "python-docx",
+    "pptx": "python-pptx",
+    "fitz": "PyMuPDF",
+    "win32com": "pywin32",
+    "win32api": "pywin32",
+    "win32con": "pywin32",
+    "win32gui": "pywin32",
+    "pythoncom": "pywin32",
+    "pywintypes": "pywin32",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "multipart": "python-multipart",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "Crypto": "pycryptodome",
+    "OpenSSL": "pyOpenSSL",
+    "googleapiclient": "google-api-python-client",
+    "serial": "pyserial",
+    "usb": "pyusb",
+    "git": "GitPython",
+    "github": "PyGithub",
+    "telegram": "python-telegram-bot",
+    "discord": "discord.py",
+    "slugify": "python-slugify",
+    "Levenshtein": "python-Levenshtein",
+    "psycopg2": "psycopg2-binary",
+    "MySQLdb": "mysqlclient",
+    "mysql": "mysql-connector-python",
+    "ldap": "python-ldap",
+    "zmq": "pyzmq",
+    "attr": "attrs",
+    "pkg_resources": "setuptools",
+    "markdown": "Markdown",
+    "ffmpeg": "ffmpeg-python",
+    "speech_recognition": "SpeechRecognition",
+    "pyautogui": "PyAutoGUI",
+    "pygetwindow": "PyGetWindow",
+    "pdfminer": "pdfminer.six",
+    "pymupdf": "PyMuPDF",
+    "tavily": "tavily-python",
+    "kafka": "kafka-python",
+    "newspaper": "newspaper3k",
+    "whois": "python-whois",
+    "nmap": "python-nmap",
+    "dns": "dnspython",
+    "bson": "pymongo",
+    "crossref": "crossrefapi",
+}
+
+# Namespace packages shared by unrelated distributions (google.generativeai, google.cloud.storage,
+# google.protobuf, ...): the top-level name does not identify one, so they are left to the LLM
+NAMESPACE_PACKAGES = {"google"}
+
+# Common dependencies of generated servers whose import name is also the distribution name
+# (pip treats '_' and '-' in names alike)
+SAME_NAME_DISTRIBUTIONS = {
+    "httpx", "requests", "aiohttp", "pydantic", "pymongo", "motor", "redis", "numpy", "pandas",
+    "matplotlib", "scipy", "openai", "anthropic", "lxml", "mss", "feedparser", "tweepy",
+    "boto3", "botocore", "psutil", "selenium", "playwright", "uvicorn", "fastapi", "starlette",
+    "jinja2", "chardet", "tabulate", "rich", "click", "typer", "tqdm", "sqlalchemy", "aiofiles",
+    "aiosqlite", "websockets", "pytz", "tzlocal", "arrow", "pendulum", "markdownify",
+    "html2text", "trafilatura", "wikipedia", "qrcode", "pyperclip", "pynput", "keyboard",
+    "mouse", "paramiko", "docker", "kubernetes", "elasticsearch", "neo4j", "pika", "minio",
+    "geopy", "folium", "PyPDF2", "openpyxl", "networkx", "sympy", "nltk", "spacy",
+    "transformers", "torch", "tiktoken", "langchain", "xlrd", "xlsxwriter", "reportlab",
+    "pdfplumber", "pypdf", "pytesseract", "imageio", "moviepy", "pydub", "mutagen", "yfinance",
+    "ccxt", "stripe", "twilio", "slack_sdk", "notion_client", "httpcore", "anyio", "trio",
+    "orjson", "ujson", "toml", "tomli", "jsonschema", "validators", "emoji", "unidecode",
+    "regex", "fuzzywuzzy", "rapidfuzz", "cachetools", "tenacity", "loguru", "structlog",
+    "shodan", "scapy", "cryptography", "bcrypt", "passlib", "pyotp", "ics", "icalendar",
+    "caldav", "exchangelib", "imapclient", "pyexcel", "arxiv", "huggingface_hub", "markitdown",
+    "semanticscholar", "pyzotero", "duckduckgo_search", "duffel_api", "docx2pdf", "pdf2docx",
+    "statsmodels", "ydata_profiling", "seaborn", "aiomysql", "thefuzz", "urllib3",
+    "textdistance", "pyflightdata",
+}
+
+
+def _installed_distributions() -> Dict[str, List[str]]:
+    try:
+        return importlib.metadata.packages_distributions()
+    except Exception:
+        return {}
+
+
+def distribution_for_module(module: str, installed: Optional[Dict[str, List[str]]] = None) -> Optional[str]:
+    """The distribution providing a top-level module, or None if it is not known."""
+    if module == "mcp":
+        return BASE_REQUIREMENT
+    if module in NAMESPACE_PACKAGES:
+        return None
+    if module in MODULE_DISTRIBUTIONS:
+        return MODULE_DISTRIBUTIONS[module]
+    if module in SAME_NAME_DISTRIBUTIONS:
+        return module
+    distributions = (installed if installed is not None else _installed_distributions()).get(module)
+    return distributions[0] if distributions else None
+
+
+def scan_requirements(source: str, search_dirs: Iterable[Path] = ()) -> Tuple[List[str], List[str]]:
+    """
+    Requirements of a server from its imports, as (requirements, unknown_modules).
+    `mcp[cli]` always comes first; standard library modules and modules next to the server
+    (search_dirs) are skipped. Raises SyntaxError if the source does not parse.
+    """
+    tree = ast.parse(source)
+    local_names = _local_module_names(search_dirs)
+    installed = _installed_distributions()
+    requirements, unknown = [BASE_REQUIREMENT], []
+    for module, _ in sorted(find_imported_modules(tree).items(), key=lambda item: item[1]):
+        if module in sys.stdlib_module_names or module in local_names or module == "__future__":
+            continue
+        distribution = distribution_for_module(module, installed)
+        if distribution is None:
+            unknown.append(module)
+        elif distribution.lower() not in {r.lower() for r in requirements}:
+            requirements.append(distribution)
+    return requirements, unknown
+
+
+def merge_requirements(requirements: List[str], extra_lines: Iterable[str]) -> List[str]:
+    """Appends requirement lines (e.g. from the LLM) that are not already listed, ignoring fences and comments."""
+    merged = list(requirements)
+    seen = {r.lower() for r in merged}
+    for line in extra_lines:
+        line = line.strip()
+        if not line or line.startswith(("#", "```")):
+            continue
+        name = line.split(";")[0]
+        for separator in ("==", ">=", "<=", "~=", "!=", ">", "<", "["):
+            name = name.split(separator)[0]
+        name = name.strip().lower()
+        if name and name not in seen and f"{name}[cli]" not in seen:
+            seen.add(name)
+            merged.append(line)
+    return merged
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_chunk_to_message
+
+from framwork.logger import logger
+from framwork.mcp_swe_flow.config.llm_cache import get_llm_cache
+
+# Use astream for agent calls (per-call latency metrics, early code extraction). Disabled
+# automatically while the LLM response cache is active, since cached calls go through ainvoke.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+
+OnToolArgs = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def is_truncated(message: BaseMessage) -> bool:
+    """True if the provider stopped the generation because it hit the token limit."""
+    return (getattr(message, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+
+def check_syntax(code: str, filename: str = "<generated>") -> Optional[str]:
+    """Returns a short description of the first syntax error in code, or None if it compiles."""
+    try:
+        compile(code, filename, "exec")
+        return None
+    except SyntaxError as e:
+        return f"{e.msg} (line {e.lineno})"
+
+
+async def astream_with_metrics(
+    llm,
+    messages: List[BaseMessage],
+    agent_logger,
+    call_name: str,
+    on_tool_args: Optional[OnToolArgs] = None,
+) -> AIMessage:
+    """
+    Consumes an LLM call as a stream and returns the assembled AIMessage.
+
+    - Tool-call arguments are assembled incrementally; on_tool_args(name, args) is awaited
+      as soon as the arguments of a tool call form complete JSON. The arguments are only
+      parsed when a chunk could close them (it contains '}') and once more at the end.
+    - Time-to-first-token, tokens/sec and the finish reason are logged to the agent log as
+      an `llm_stream_metrics` event, and truncated generations are flagged.
+    """
+    if not LLM_STREAMING or get_llm_cache() is not None:
+        return await llm.ainvoke(messages)
+
+    started_at = time.perf_counter()
+    first_token_at = None
+    aggregated: Optional[AIMessageChunk] = None
+    completed_tool_calls = set()
+
+    async def emit_completed_tool_calls(indexes):
+        for tool_chunk in aggregated.tool_call_chunks:
+            index = tool_chunk.get("index")
+            if index not in indexes or index in completed_tool_calls or not tool_chunk.get("name"):
+                continue
+            try:
+                args = json.loads(tool_chunk.get("args") or "")
+            except json.JSONDecodeError:
+                continue
+            completed_tool_calls.add(index)
+            await on_tool_args(tool_chunk["name"], args)
+
+    async for chunk in llm.astream(messages):
+        if first_token_at is None and (chunk.content or chunk.tool_call_chunks):
+            first_token_at = time.perf_counter()
+        aggregated = chunk if aggregated is None else aggregated + chunk
+
+        if on_tool_args and chunk.tool_call_chunks:
+            # Re-parsing the aggregated arguments on every chunk would be quadratic in their size
+            closing = {tc.get("index") for tc in chunk.tool_call_chunks if "}" in (tc.get("args") or "")}
+            if closing:
+                await emit_completed_tool_calls(closing)
+
+    if on_tool_args and aggregated is not None:
+        await emit_completed_tool_calls({tc.get("index") for tc in aggregated.tool_call_chunks})
+
+    finished_at = time.perf_counter()
+    if aggregated is None:
+        aggregated = AIMessageChunk(content="")
+    message = message_chunk_to_message(aggregated)
+
+    usage = message.usage_metadata or {}
+    output_tokens = usage.get("output_tokens")
+    if not output_tokens:
+        # Providers that don't report usage on streams: estimate (~4 characters per token)
+        text = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+        args_text = "".join(tc.get("args") or "" for tc in aggregated.tool_call_chunks)
+        output_tokens = (len(text) + len(args_text)) // 4
+    generation_time = finished_at - (first_token_at or started_at)
+    finish_reason = message.response_metadata.get("finish_reason")
+    metrics = {
+        "call": call_name,
+        "model": message.response_metadata.get("model_name", "unknown"),
+        "time_to_first_token_s": round(first_token_at - started_at, 3) if first_token_at else None,
+        "total_time_s": round(finished_at - started_at, 3),
+        "output_tokens": output_tokens,
+        "tokens_per_second": round(output_tokens / generation_time, 2) if generation_time > 0 else None,
+        "finish_reason": finish_reason,
+    }
+    agent_logger.log(event_type="llm_stream_metrics", **metrics)
+    logger.info(f"[{call_name}] TTFT={metrics['time_to_first_token_s']}s, {metrics['tokens_per_second']} tok/s, finish_reason={finish_reason}")
+    if finish_reason == "length":
+        logger.warning(f"[{call_name}] Generation was truncated by the output token limit.")
+        agent_logger.log(event_type="llm_output_truncated", call=call_name, output_tokens=output_tokens)
+    return message
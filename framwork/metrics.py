@@ -0,0 +1,174 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# ========== Run Metrics ==========
+# In-memory counters and histograms for one workflow run, fed by AgentJsonlLogger events
+# (llm_invoke/llm_response, tool_call/tool_result/tool_error, llm_stream_metrics), so the
+# statistics node can render its report without re-reading the agent log files.
+
+
+class Histogram:
+    """Keeps every observation; runs make at most a few thousand calls."""
+
+    def __init__(self, values: Optional[Iterable[float]] = None):
+        self.values: List[float] = list(values or [])
+
+    def observe(self, value: Optional[float]):
+        if value is not None:
+            self.values.append(float(value))
+
+    def merge(self, other: "Histogram"):
+        self.values.extend(other.values)
+
+    def _percentile(self, sorted_values: List[float], q: float) -> float:
+        index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+        return sorted_values[index]
+
+    def summary(self, include_samples: bool = False) -> Dict[str, Any]:
+        if not self.values:
+            summary = {"count": 0}
+        else:
+            sorted_values = sorted(self.values)
+            summary = {
+                "count": len(sorted_values),
+                "sum": round(sum(sorted_values), 6),
+                "min": round(sorted_values[0], 6),
+                "max": round(sorted_values[-1], 6),
+                "mean": round(sum(sorted_values) / len(sorted_values), 6),
+                "p50": round(self._percentile(sorted_values, 0.5), 6),
+                "p95": round(self._percentile(sorted_values, 0.95), 6),
+            }
+        if include_samples:
+            summary["samples"] = list(self.values)
+        return summary
+
+
+def _new_llm_bucket() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+            "latency_s": Histogram(), "prompt_tokens_hist": Histogram(),
+            "completion_tokens_hist": Histogram(), "cost_hist": Histogram()}
+
+
+def _new_tool_bucket() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "duration_s": Histogram()}
+
+
+def _new_stream_bucket() -> Dict[str, Any]:
+    return {"time_to_first_token_s": Histogram(), "tokens_per_second": Histogram()}
+
+
+class RunMetrics:
+    """Thread-safe metrics of a single workflow run."""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id
+        # Set when the run resumed from a checkpoint written by another process: the
+        # nodes executed before the resume are missing from this registry.
+        self.partial = False
+        self.llm_by_model: Dict[str, Dict[str, Any]] = {}
+        self.llm_by_agent: Dict[str, Dict[str, Any]] = {}
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.streaming: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record_llm_call(self, agent: str, model: str, prompt_tokens: int, completion_tokens: int,
+                        cost: float, latency_s: Optional[float] = None):
+        with self._lock:
+            for bucket in (self.llm_by_model.setdefault(model, _new_llm_bucket()),
+                           self.llm_by_agent.setdefault(agent, _new_llm_bucket())):
+                bucket["calls"] += 1
+                bucket["prompt_tokens"] += prompt_tokens
+                bucket["completion_tokens"] += completion_tokens
+                bucket["cost"] += cost
+                bucket["latency_s"].observe(latency_s)
+                bucket["prompt_tokens_hist"].observe(prompt_tokens)
+                bucket["completion_tokens_hist"].observe(completion_tokens)
+                bucket["cost_hist"].observe(cost)
+
+    def record_tool_call(self, tool: str):
+        with self._lock:
+            self.tools.setdefault(tool, _new_tool_bucket())["calls"] += 1
+
+    def record_tool_finished(self, tool: str, duration_s: Optional[float], error: bool = False):
+        with self._lock:
+            bucket = self.tools.setdefault(tool, _new_tool_bucket())
+            bucket["duration_s"].observe(duration_s)
+            if error:
+                bucket["errors"] += 1
+
+    def record_stream(self, model: str, time_to_first_token_s: Optional[float], tokens_per_second: Optional[float]):
+        with self._lock:
+            bucket = self.streaming.setdefault(model, _new_stream_bucket())
+            bucket["time_to_first_token_s"].observe(time_to_first_token_s)
+            bucket["tokens_per_second"].observe(tokens_per_second)
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """Adds a snapshot taken with include_samples=True (e.g. a fan-out model run) to this registry."""
+        with self._lock:
+            for source, target, factory in (
+                (snapshot["llm"]["by_model"], self.llm_by_model, _new_llm_bucket),
+                (snapshot["llm"]["by_agent"], self.llm_by_agent, _new_llm_bucket),
+                (snapshot["tools"], self.tools, _new_tool_bucket),
+                (snapshot["streaming"], self.streaming, _new_stream_bucket),
+            ):
+                for name, values in source.items():
+                    bucket = target.setdefault(name, factory())
+                    for key, value in values.items():
+                        if isinstance(bucket.get(key), Histogram):
+                            bucket[key].merge(Histogram(value.get("samples", [])))
+                        elif key in bucket:
+                            bucket[key] += value
+            self.partial = self.partial or snapshot.get("partial", False)
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            prompt_tokens = sum(b["prompt_tokens"] for b in self.llm_by_model.values())
+            completion_tokens = sum(b["completion_tokens"] for b in self.llm_by_model.values())
+            return {
+                "llm_calls": sum(b["calls"] for b in self.llm_by_model.values()),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cost": sum(b["cost"] for b in self.llm_by_model.values()),
+                "tool_calls": sum(b["calls"] for b in self.tools.values()),
+                "tool_errors": sum(b["errors"] for b in self.tools.values()),
+            }
+
+    def snapshot(self, include_samples: bool = False) -> Dict[str, Any]:
+        """JSON-serializable view of the registry; histograms are rendered as summaries."""
+        def render(buckets: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+            return {
+                name: {key: value.summary(include_samples) if isinstance(value, Histogram) else value
+                       for key, value in bucket.items()}
+                for name, bucket in sorted(buckets.items())
+            }
+
+        totals = self.totals()
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "partial": self.partial,
+                "totals": totals,
+                "llm": {"by_model": render(self.llm_by_model), "by_agent": render(self.llm_by_agent)},
+                "tools": render(self.tools),
+                "streaming": render(self.streaming),
+            }
+
+
+_run_metrics: Dict[Optional[str], RunMetrics] = {}
+_run_metrics_lock = threading.Lock()
+
+
+def get_run_metrics(run_id: Optional[str] = None) -> RunMetrics:
+    """Get or create the metrics registry of a run (None: runs that are not scoped, e.g. a single CLI run)."""
+    with _run_metrics_lock:
+        metrics = _run_metrics.get(run_id)
+        if metrics is None:
+            metrics = _run_metrics[run_id] = RunMetrics(run_id)
+        return metrics
+
+
+def drop_run_metrics(run_id: Optional[str]):
+    """Forget a finished run, so long-lived processes don't accumulate registries."""
+    with _run_metrics_lock:
+        _run_metrics.pop(run_id, None)
@@ -14,8 +14,9 @@ os.chdir(project_root)
 load_dotenv()
 
 from framwork.mcp_swe_flow.graph import create_mcp_swe_workflow
+from framwork.mcp_swe_flow.checkpointing import open_checkpointer, invoke_with_checkpoint, new_run_id
 from framwork.mcp_swe_flow.state import MCPWorkflowState
-from framwork.mcp_swe_flow.config import llm
+from framwork.mcp_swe_flow.config import llm, aclose_llm_clients
 from framwork.logger import logger
 
 async def main():
@@ -48,40 +49,70 @@ async def main():
         default=os.getenv("SWE_AGENT_MODEL", "gpt-4o"),
         help="指定SWE-Agent要使用的LLM模型名称 (例如: gpt-4o, qwen-max, claude-sonnet-4-20250514)"
     )
+    parser.add_argument(
+        "--swe-models",
+        type=str,
+        default=None,
+        help="Comma-separated SWE models to compare in one run (fan-out mode, always non-interactive), e.g. gpt-4o,qwen-max-latest,deepseek-v3"
+    )
+    parser.add_argument(
+        "--fanout-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of model runs in flight in fan-out mode (default: FANOUT_CONCURRENCY or all models)"
+    )
+    parser.add_argument(
+        "--full-retest",
+        action="store_true",
+        help="Re-plan and re-run the tests of every tool after each refinement, instead of only the tools whose code changed"
+    )
+    parser.add_argument(
+        "--run-id",
+        type=str,
+        default=None,
+        help="Identifier of this run in the checkpoint store (default: generated)"
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        metavar="RUN_ID",
+        help="Resume a previous run from its last completed node"
+    )
     # Add other arguments if needed (e.g., --output-dir, --llm-model)
     args = parser.parse_args()
     
-    # Handle interactive flags
-    interactive_mode = args.interactive and not args.non_interactive
+    swe_models = [m.strip() for m in args.swe_models.split(",") if m.strip()] if args.swe_models else []
+
+    # Handle interactive flags (concurrent model runs can't pause for confirmation)
+    interactive_mode = args.interactive and not args.non_interactive and not swe_models
     
-    # At least one input method must be provided
-    if not args.api and not args.user_input:
-        parser.error("Must provide either --api or --user-input parameter")
+    # At least one input method must be provided (a resumed run already has its inputs)
+    if not args.api and not args.user_input and not args.resume:
+        parser.error("Must provide either --api, --user-input or --resume parameter")
         sys.exit(1)
         
     # If both inputs are provided, api mode takes priority
-    mode = "api" if args.api else "user_input"
+    mode = "api" if args.api else "user_input" if args.user_input else "resume"
     logger.info(f"Starting MCP Agent Workflow in {mode} mode")
     logger.info(f"Interactive mode: {'Enabled' if interactive_mode else 'Disabled'}")
-    logger.info(f"Using SWE model: {args.swe_model}")
+    if swe_models:
+        logger.info(f"Fan-out mode, comparing SWE models: {swe_models}")
+    else:
+        logger.info(f"Using SWE model: {args.swe_model}")
     
     if mode == "api":
         logger.info(f"Processing API: {args.api}")
-    else:
+    elif mode == "user_input":
         logger.info(f"Processing user input: {args.user_input[:50]}...")
+    else:
+        logger.info(f"Resuming run: {args.resume}")
 
     # Ensure the workspace directory exists, mirroring the tool's assumption
     workspace_dir = project_root / "workspace"
     workspace_dir.mkdir(exist_ok=True)
     logger.info(f"Ensured workspace directory exists: {workspace_dir}")
 
-    # Create the workflow application
-    try:
-        app = create_mcp_swe_workflow()
-    except Exception as e:
-        logger.error(f"Failed to create the workflow graph: {e}")
-        sys.exit(1)
-
     # Define the initial state
     initial_state = {
         "interactive_mode": interactive_mode,  # Add interactive mode setting
@@ -93,19 +124,33 @@ async def main():
     os.environ["SWE_AGENT_MODEL"] = args.swe_model
     logger.info(f"Temporarily overriding SWE_AGENT_MODEL environment variable: {original_env_value} -> {args.swe_model}")
     
+    if swe_models:
+        initial_state["swe_models"] = swe_models
+        if args.fanout_concurrency:
+            initial_state["fanout_concurrency"] = args.fanout_concurrency
+    if args.full_retest:
+        initial_state["full_retest"] = True
     if args.api:
         initial_state["api_name"] = args.api
     if args.user_input:
         initial_state["user_input"] = args.user_input
     # Directory paths will be set by load_input_node using defaults for now
 
+    run_id = args.resume or args.run_id or new_run_id()
+    logger.info(f"Run ID: {run_id} (resume with --resume {run_id})")
     logger.info(f"Invoking workflow with initial state: {initial_state}")
 
     # Invoke the workflow
     try:
-        # Configuration for streaming, debugging, etc.
-        # config = {"recursion_limit": 10} # Example config
-        final_state = await app.ainvoke(initial_state) #, config=config)
+        async with open_checkpointer() as checkpointer:
+            # Create the workflow application
+            try:
+                app = create_mcp_swe_workflow(checkpointer=checkpointer)
+            except Exception as e:
+                logger.error(f"Failed to create the workflow graph: {e}")
+                sys.exit(1)
+
+            final_state = await invoke_with_checkpoint(app, run_id, initial_state, resume=bool(args.resume))
         
         logger.info("Workflow invocation complete.")
 
@@ -114,10 +159,16 @@ async def main():
         if final_state.get("error"):
             print(f"Status: FAILED")
             print(f"Error: {final_state['error']}")
+            print(f"Resume with: --resume {run_id}")
         else:
             print(f"Status: SUCCESS")
-            print(f"Generated Server: {final_state.get('server_file_path')}")
-            print(f"Test Report:      {final_state.get('test_report_path')}")
+            if final_state.get("model_runs"):
+                for model, run in final_state["model_runs"].items():
+                    print(f"[{model}] {run['status']}: {run.get('server_file_path') or run.get('error')}")
+                print(f"Statistics:       {final_state.get('project_dir')}")
+            else:
+                print(f"Generated Server: {final_state.get('server_file_path')}")
+                print(f"Test Report:      {final_state.get('test_report_path')}")
         print("-------------------------")
         
         # Optionally print the full final state for debugging
@@ -126,9 +177,10 @@ async def main():
 
     except Exception as e:
         logger.error(f"An error occurred during workflow execution: {e}", exc_info=True)
-        print(f"\n--- Workflow FAILED --- \nError: {e}\n-------------------------")
+        print(f"\n--- Workflow FAILED --- \nError: {e}\nResume with: --resume {run_id}\n-------------------------")
         sys.exit(1)
     finally:
+        await aclose_llm_clients()
         # Restore original environment variable
         if original_env_value:
             os.environ["SWE_AGENT_MODEL"] = original_env_value
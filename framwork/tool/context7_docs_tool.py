@@ -7,6 +7,8 @@ from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from framwork.logger import logger
+from framwork.mcp_swe_flow.config.http_clients import get_async_http_client
+from framwork.tool.tool_cache import cached_tool_call, ToolCacheMissError, CONTEXT7_CACHE_TTL, CONTEXT7_LIBRARY_ID_TTL
 
 class Context7DocsToolInput(BaseModel):
     """Input for the Context7 Docs tool."""
@@ -14,6 +16,9 @@ class Context7DocsToolInput(BaseModel):
     topic: Optional[str] = Field(None, description="Optional specific topic to narrow down the documentation, e.g., 'hooks', 'routing'.")
     tokens: Optional[int] = Field(3000, description="The maximum number of tokens to return, defaults to 3000.")
 
+class Context7LookupError(RuntimeError):
+    """Raised when a library can't be resolved or its documentation can't be fetched; never cached."""
+
 class Context7DocsTool(BaseTool):
     """
     A tool for fetching high-quality, up-to-date technical documentation for software libraries and frameworks.
@@ -34,37 +39,38 @@ class Context7DocsTool(BaseTool):
     async def _resolve_library_id(self, client: httpx.AsyncClient, library_name: str) -> str:
         """
         Asynchronously resolves a library name to a Context7-compatible ID.
+        Raises Context7LookupError when the name can't be resolved.
         """
-        try:
-            if library_name.startswith('/') and '/' in library_name[1:]:
-                return library_name
+        if library_name.startswith('/') and '/' in library_name[1:]:
+            return library_name
 
+        try:
             search_url = f"{self.api_base_url}/search"
             params = {"query": library_name}
-            response = await client.get(search_url, params=params)
+            response = await client.get(search_url, params=params, follow_redirects=True, timeout=30.0)
             response.raise_for_status()
             search_results = response.json()
+        except httpx.HTTPStatusError as e:
+            raise Context7LookupError(f"HTTP error while resolving library ID: {e.response.status_code}") from e
+        except Exception as e:
+            raise Context7LookupError(f"An unexpected error occurred while resolving library ID: {e}") from e
 
-            results: List[Dict[str, Any]] = search_results.get("results")
-            if not results:
-                return f"Unable to resolve any library for '{library_name}'."
+        results: List[Dict[str, Any]] = search_results.get("results")
+        if not results:
+            raise Context7LookupError(f"Unable to resolve any library for '{library_name}'.")
 
-            best_match = results[0]
-            library_id = best_match.get("id")
+        best_match = results[0]
+        library_id = best_match.get("id")
 
-            if not library_id:
-                return f"Could not extract library ID for '{library_name}' from search results."
+        if not library_id:
+            raise Context7LookupError(f"Could not extract library ID for '{library_name}' from search results.")
 
-            return f"/{library_id}"
-
-        except httpx.HTTPStatusError as e:
-            return f"HTTP error while resolving library ID: {e.response.status_code}"
-        except Exception as e:
-            return f"An unexpected error occurred while resolving library ID: {e}"
+        return f"/{library_id}"
 
     async def _get_library_docs(self, client: httpx.AsyncClient, library_id: str, topic: Optional[str], tokens: int) -> str:
         """
         Asynchronously fetches library documentation from the Context7 API.
+        Raises Context7LookupError on HTTP errors.
         """
         try:
             if library_id.startswith("/"):
@@ -78,19 +84,18 @@ class Context7DocsTool(BaseTool):
                 params["tokens"] = str(tokens)
 
             headers = {"X-Context7-Source": "mcp-server"}
-            response = await client.get(docs_url, params=params, headers=headers)
+            response = await client.get(docs_url, params=params, headers=headers, follow_redirects=True, timeout=30.0)
             response.raise_for_status()
-
-            doc_text = response.text
-            if not doc_text or doc_text in ("No content available", "No context data available"):
-                return "No documentation content is available for the specified library or topic."
-
-            return doc_text
-
         except httpx.HTTPStatusError as e:
-            return f"HTTP error while fetching documentation: {e.response.status_code}"
+            raise Context7LookupError(f"HTTP error while fetching documentation: {e.response.status_code}") from e
         except Exception as e:
-            return f"An unexpected error occurred while fetching documentation: {e}"
+            raise Context7LookupError(f"An unexpected error occurred while fetching documentation: {e}") from e
+
+        doc_text = response.text
+        if not doc_text or doc_text in ("No content available", "No context data available"):
+            return "No documentation content is available for the specified library or topic."
+
+        return doc_text
     
     def _run(self, library_name: str, topic: Optional[str] = None, tokens: int = 3000, **kwargs: Any) -> str:
         """Synchronously wraps the async _arun method."""
@@ -101,55 +106,61 @@ class Context7DocsTool(BaseTool):
             return asyncio.run(self._arun(library_name=library_name, topic=topic, tokens=tokens, **kwargs))
         
     async def _arun(self, library_name: str, topic: Optional[str] = None, tokens: int = 3000, **kwargs: Any) -> str:
-        """Asynchronously executes the tool to fetch documentation."""
+        """Asynchronously executes the tool to fetch documentation, served from the tool cache when possible."""
         logger.info(f"Running Context7 Docs Tool for library: '{library_name}', topic: '{topic}'")
         try:
-            async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-                library_id = await self._resolve_library_id(client, library_name)
-                if not library_id.startswith("/"):
-                    logger.warning(f"Could not resolve library ID for '{library_name}': {library_id}")
-                    return library_id[:4000]
-
-                docs = await self._get_library_docs(client, library_id, topic, tokens)
-                
-                # Regex to find all documentation sections with language and code
-                pattern = re.compile(
-                    r"TITLE:(.*?)"
-                    r"DESCRIPTION:(.*?)"
-                    r"SOURCE:(.*?)"
-                    r"LANGUAGE: (.*?)\n"
-                    r"CODE:\n```(.*?)```", 
-                    re.DOTALL | re.IGNORECASE
-                )
-                
-                matches = pattern.finditer(docs)
-                python_docs = []
-                
-                for match in matches:
-                    language = match.group(4).strip().lower()
-                    if language.lower() == "python":
-                        # Reconstruct the documentation block for Python code
-                        title = match.group(1).strip()
-                        description = match.group(2).strip()
-                        source = match.group(3).strip()
-                        code = match.group(5).strip()
-                        
-                        python_doc_block = (
-                            f"TITLE: {title}\n"
-                            f"DESCRIPTION: {description}\n"
-                            f"SOURCE: {source}\n"
-                            f"LANGUAGE: python\n"
-                            f"CODE:\n```{code}```"
-                        )
-                        python_docs.append(python_doc_block)
-
-                if not python_docs:
-                    logger.info(f"No Python code snippets found for '{library_name}'. Returning a notification.")
-                    return "No Python-specific documentation or code examples were found in the results."
-
-                logger.info(f"Successfully filtered and found {len(python_docs)} Python code snippets for '{library_name}'.")
-                return "\n\n----------------------------------------\n\n".join(python_docs)[:4000]
-                
+            # Keep-alive client shared by all calls on this event loop
+            client = get_async_http_client(self.api_base_url)
+            library_id = await cached_tool_call(
+                f"{self.name}.library_id", {"library_name": library_name}, CONTEXT7_LIBRARY_ID_TTL,
+                lambda: self._resolve_library_id(client, library_name)
+            )
+            docs = await cached_tool_call(
+                f"{self.name}.docs", {"library_id": library_id, "topic": topic, "tokens": tokens}, CONTEXT7_CACHE_TTL,
+                lambda: self._get_library_docs(client, library_id, topic, tokens)
+            )
+            
+            # Regex to find all documentation sections with language and code
+            pattern = re.compile(
+                r"TITLE:(.*?)"
+                r"DESCRIPTION:(.*?)"
+                r"SOURCE:(.*?)"
+                r"LANGUAGE: (.*?)\n"
+                r"CODE:\n```(.*?)```", 
+                re.DOTALL | re.IGNORECASE
+            )
+            
+            matches = pattern.finditer(docs)
+            python_docs = []
+            
+            for match in matches:
+                language = match.group(4).strip().lower()
+                if language.lower() == "python":
+                    # Reconstruct the documentation block for Python code
+                    title = match.group(1).strip()
+                    description = match.group(2).strip()
+                    source = match.group(3).strip()
+                    code = match.group(5).strip()
+                    
+                    python_doc_block = (
+                        f"TITLE: {title}\n"
+                        f"DESCRIPTION: {description}\n"
+                        f"SOURCE: {source}\n"
+                        f"LANGUAGE: python\n"
+                        f"CODE:\n```{code}```"
+                    )
+                    python_docs.append(python_doc_block)
+
+            if not python_docs:
+                logger.info(f"No Python code snippets found for '{library_name}'. Returning a notification.")
+                return "No Python-specific documentation or code examples were found in the results."
+
+            logger.info(f"Successfully filtered and found {len(python_docs)} Python code snippets for '{library_name}'.")
+            return "\n\n----------------------------------------\n\n".join(python_docs)[:4000]
+            
+        except (Context7LookupError, ToolCacheMissError) as e:
+            logger.warning(f"Could not fetch documentation for '{library_name}': {e}")
+            return str(e)[:4000]
         except Exception as e:
             error_msg = f"An unexpected error occurred in Context7DocsTool: {e}"
             logger.error(error_msg, exc_info=True)
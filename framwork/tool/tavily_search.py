@@ -1,11 +1,13 @@
+import asyncio
 import os
 from typing import Type, Any, Literal, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from langchain_core.tools import BaseTool
 from tavily import TavilyClient, InvalidAPIKeyError, UsageLimitExceededError
 
 from framwork.logger import logger
+from framwork.tool.tool_cache import cached_tool_call, cached_tool_call_sync, ToolCacheMissError, TAVILY_CACHE_TTL
 
 class TavilySearchInput(BaseModel):
     """Input schema for the Tavily Search tool."""
@@ -43,6 +45,7 @@ class TavilySearchTool(BaseTool):
     args_schema: Type[BaseModel] = TavilySearchInput
 
     api_key: Optional[str] = None
+    _tavily_client: Optional[TavilyClient] = PrivateAttr(default=None)
 
     def __init__(self, **data: Any):
         super().__init__(**data)
@@ -70,23 +73,45 @@ class TavilySearchTool(BaseTool):
 
         return "\n".join(output)
 
+    def _client(self) -> TavilyClient:
+        # One client per tool instance, reused across calls
+        if self._tavily_client is None:
+            self._tavily_client = TavilyClient(api_key=self.api_key)
+        return self._tavily_client
+
+    def _search(self, query: str, search_depth: str, max_results: int, include_domains: Optional[List[str]], exclude_domains: Optional[List[str]]) -> str:
+        """Blocking Tavily request; raises on API errors so they are not cached."""
+        # Use include_answer=True to get a direct answer if possible
+        response = self._client().search(
+            query=query,
+            search_depth=search_depth,
+            max_results=max_results,
+            include_domains=include_domains or [],
+            exclude_domains=exclude_domains or [],
+            include_answer=True,
+        )
+        return self._format_results(response)[:4000]
+
+    @staticmethod
+    def _cache_params(query: str, search_depth: str, max_results: int, include_domains: Optional[List[str]], exclude_domains: Optional[List[str]]) -> dict:
+        return {"query": query, "search_depth": search_depth, "max_results": max_results,
+                "include_domains": include_domains or [], "exclude_domains": exclude_domains or []}
+
     def _run(self, query: str, search_depth: str = "basic", max_results: int = 5, include_domains: Optional[List[str]] = None, exclude_domains: Optional[List[str]] = None, **kwargs: Any) -> str:
-        """Synchronously perform a Tavily search."""
+        """Synchronously perform a Tavily search, served from the tool cache when possible."""
         logger.info(f"Performing synchronous Tavily search for: '{query}'")
         try:
-            client = TavilyClient(api_key=self.api_key)
-            # Use include_answer=True to get a direct answer if possible
-            response = client.search(
-                query=query,
-                search_depth=search_depth,
-                max_results=max_results,
-                include_domains=include_domains or [],
-                exclude_domains=exclude_domains or [],
-                include_answer=True,
+            formatted_results = cached_tool_call_sync(
+                self.name,
+                self._cache_params(query, search_depth, max_results, include_domains, exclude_domains),
+                TAVILY_CACHE_TTL,
+                lambda: self._search(query, search_depth, max_results, include_domains, exclude_domains)
             )
-            formatted_results = self._format_results(response)
             logger.info("Tavily search successful. Returning formatted results.")
-            return formatted_results[:4000]
+            return formatted_results
+        except ToolCacheMissError as e:
+            logger.warning(str(e))
+            return str(e)[:4000]
         except (InvalidAPIKeyError, UsageLimitExceededError) as e:
             error_msg = f"Tavily API error: {e}"
             logger.error(error_msg)
@@ -97,9 +122,30 @@ class TavilySearchTool(BaseTool):
             return error_msg[:4000]
 
     async def _arun(self, query: str, search_depth: str = "basic", max_results: int = 5, include_domains: Optional[List[str]] = None, exclude_domains: Optional[List[str]] = None, **kwargs: Any) -> str:
-        """Asynchronously perform a Tavily search."""
+        """Asynchronously perform a Tavily search, served from the tool cache when possible."""
         logger.info(f"Performing asynchronous Tavily search for: '{query}'")
-        # The Tavily Python SDK v0.3.3 does not have a native async client.
-        # We will call the synchronous method here, which is a common practice in LangChain tools
-        # for libraries that do not provide an async interface.
-        return self._run(query, search_depth, max_results, include_domains, exclude_domains, **kwargs) 
\ No newline at end of file
+
+        async def search() -> str:
+            # The Tavily SDK has no async client: run the blocking request in a worker thread
+            return await asyncio.to_thread(self._search, query, search_depth, max_results, include_domains, exclude_domains)
+
+        try:
+            formatted_results = await cached_tool_call(
+                self.name,
+                self._cache_params(query, search_depth, max_results, include_domains, exclude_domains),
+                TAVILY_CACHE_TTL,
+                search
+            )
+            logger.info("Tavily search successful. Returning formatted results.")
+            return formatted_results
+        except ToolCacheMissError as e:
+            logger.warning(str(e))
+            return str(e)[:4000]
+        except (InvalidAPIKeyError, UsageLimitExceededError) as e:
+            error_msg = f"Tavily API error: {e}"
+            logger.error(error_msg)
+            return error_msg[:4000]
+        except Exception as e:
+            error_msg = f"An unexpected error occurred during Tavily search: {e}"
+            logger.error(error_msg, exc_info=True)
+            return error_msg[:4000]
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from framwork.logger import logger
+from framwork.mcp_swe_flow.utils.disk_cache import DiskLRUStore
+
+# --- Tool Result Cache ---
+# Planning and refinement agents of every run ask the search/docs tools the same questions
+# ("fastmcp tool decorator", "pymongo find"). Successful results are kept in one SQLite file,
+# shared by concurrent runs and batch workers, keyed by the tool and its normalized parameters.
+# - TOOL_CACHE_ENABLED: 'false' disables the cache (default: true)
+# - TOOL_CACHE_OFFLINE: serve cached results only, stale ones included; a miss returns a notice instead of calling the API
+# - TOOL_CACHE_PATH / TOOL_CACHE_MAX_MB: cache file and its size budget
+# - TAVILY_CACHE_TTL / CONTEXT7_CACHE_TTL / CONTEXT7_LIBRARY_ID_TTL: seconds before an entry is refreshed
+DEFAULT_TOOL_CACHE_PATH = Path(__file__).parent.parent.parent / "logs" / "tool_cache" / "tool_cache.sqlite"
+
+TOOL_CACHE_OFFLINE = os.getenv("TOOL_CACHE_OFFLINE", "false").lower() == "true"
+TAVILY_CACHE_TTL = float(os.getenv("TAVILY_CACHE_TTL", 3 * 24 * 3600))
+CONTEXT7_CACHE_TTL = float(os.getenv("CONTEXT7_CACHE_TTL", 7 * 24 * 3600))
+CONTEXT7_LIBRARY_ID_TTL = float(os.getenv("CONTEXT7_LIBRARY_ID_TTL", 30 * 24 * 3600))
+
+
+def _normalize(value: Any) -> Any:
+    """Case/whitespace-insensitive strings, order-insensitive lists, so equivalent requests share an entry."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_normalize(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if item is not None}
+    return value
+
+
+def make_tool_cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"namespace": namespace, "params": _normalize(params)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolCacheMissError(RuntimeError):
+    """Raised in offline mode when a tool request has no cached result."""
+
+
+class ToolResultCache:
+    """TTL cache of tool results (strings) on top of a DiskLRUStore."""
+
+    def __init__(self, store: DiskLRUStore, offline: bool = False):
+        self.store = store
+        self.offline = offline
+
+    def get(self, namespace: str, params: Dict[str, Any], ttl: Optional[float]) -> Optional[str]:
+        key = make_tool_cache_key(namespace, params)
+        # Offline, a stale answer is better than none
+        raw = self.store.get(key, max_age=None if self.offline else ttl)
+        if raw is None:
+            return None
+        logger.info(f"Tool cache hit for {namespace} (key={key[:12]}).")
+        return raw.decode("utf-8")
+
+    def set(self, namespace: str, params: Dict[str, Any], value: str):
+        try:
+            self.store.set(make_tool_cache_key(namespace, params), value.encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Failed to store {namespace} result in the tool cache: {e}")
+
+    def _get_or_miss(self, namespace: str, params: Dict[str, Any], ttl: Optional[float]) -> Optional[str]:
+        cached = self.get(namespace, params, ttl)
+        if cached is None and self.offline:
+            raise ToolCacheMissError(f"Offline mode (TOOL_CACHE_OFFLINE=true): no cached {namespace} result for {json.dumps(params, ensure_ascii=False)}.")
+        return cached
+
+    async def aget_or_compute(self, namespace: str, params: Dict[str, Any], ttl: Optional[float],
+                              compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Cached value, or the result of compute() which is then stored. compute() signals a failure
+        by raising, so errors are never cached. Offline, a miss raises ToolCacheMissError.
+        """
+        cached = self._get_or_miss(namespace, params, ttl)
+        if cached is not None:
+            return cached
+        value = await compute()
+        self.set(namespace, params, value)
+        return value
+
+    def get_or_compute(self, namespace: str, params: Dict[str, Any], ttl: Optional[float],
+                       compute: Callable[[], str]) -> str:
+        """Blocking variant of aget_or_compute() for the tools' synchronous _run paths."""
+        cached = self._get_or_miss(namespace, params, ttl)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.set(namespace, params, value)
+        return value
+
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_initialized = False
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> Optional[ToolResultCache]:
+    """Process-wide tool cache, or None if TOOL_CACHE_ENABLED=false (offline mode always uses it)."""
+    global _tool_cache, _tool_cache_initialized
+    with _tool_cache_lock:
+        if not _tool_cache_initialized:
+            _tool_cache_initialized = True
+            if os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true" or TOOL_CACHE_OFFLINE:
+                cache_path = Path(os.getenv("TOOL_CACHE_PATH", str(DEFAULT_TOOL_CACHE_PATH)))
+                try:
+                    max_mb = int(os.getenv("TOOL_CACHE_MAX_MB", 256))
+                except ValueError:
+                    max_mb = 256
+                _tool_cache = ToolResultCache(DiskLRUStore(cache_path, max_bytes=max_mb * 1024 * 1024), offline=TOOL_CACHE_OFFLINE)
+                logger.info(f"Tool result cache at {cache_path} (offline={TOOL_CACHE_OFFLINE}).")
+        return _tool_cache
+
+
+async def cached_tool_call(namespace: str, params: Dict[str, Any], ttl: Optional[float],
+                           compute: Callable[[], Awaitable[str]]) -> str:
+    """aget_or_compute on the process-wide cache, or compute() directly when the cache is disabled."""
+    cache = get_tool_cache()
+    if cache is None:
+        return await compute()
+    return await cache.aget_or_compute(namespace, params, ttl, compute)
+
+
+def cached_tool_call_sync(namespace: str, params: Dict[str, Any], ttl: Optional[float],
+                          compute: Callable[[], str]) -> str:
+    """Blocking variant of cached_tool_call()."""
+    cache = get_tool_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(namespace, params, ttl, compute)
@@ -0,0 +1,12 @@
+# ========== Tool Hints ==========
+# Fallback for MCP tools that don't declare the readOnlyHint annotation: a tool whose name starts
+# with one of these verbs (get_weather, searchPapers, ...) is assumed to have no side effects.
+# Shared by the pipeline tester (which steps may run concurrently) and the benchmark load test
+# (which tools may be called repeatedly), so both agree on what counts as read-only.
+# Kept free of third-party imports so the benchmark can use it without the workflow dependencies.
+READ_ONLY_TOOL_VERBS = {
+    "get", "list", "search", "read", "query", "fetch", "find", "lookup", "describe", "show",
+    "view", "count", "check", "validate", "analyze", "analyse", "calculate", "compute", "extract",
+    "parse", "summarize", "inspect", "stat", "stats", "info", "status", "preview", "retrieve",
+    "scan", "compare", "detect", "recognize", "estimate", "explain",
+}
@@ -1,5 +1,5 @@
 import os
-import re
+import sys
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List
@@ -10,11 +10,13 @@ PROJECT_ROOT = Path(__file__).parent.parent
 SUMMARY_DATA_DIR = PROJECT_ROOT / "data" / "summary_data"
 WORKSPACE_DIR = PROJECT_ROOT / "workspace"
 
-PIPELINE_OUTPUT_DIR = WORKSPACE_DIR / "pipeline-output-servers"
 PIPELINE_MAPPING_PATH = WORKSPACE_DIR / "pipeline_mapping.json"
-OLD_VERSION_REPORT = SUMMARY_DATA_DIR / "old_version_token_consumption_report.md"
 OUTPUT_CSV = SUMMARY_DATA_DIR / "average_costs.csv"
-RMB_TO_USD_RATE = 7.2
+# qwen-max: the old framework version; the others: pipeline-output-servers
+COST_MODELS = ['qwen-max', 'gpt-4o', 'qwen-plus', 'gemini-2.5-pro']
+
+sys.path.append(str(PROJECT_ROOT))
+from testSystem.results_store import open_results_store
 
 # --- Utility Functions ---
 
@@ -79,72 +81,30 @@ def _simplify_name(name: str, mapping: Dict[str, str]) -> str:
     # Fallback to the original name if no mapping is found
     return name.strip()
 
-# --- Data Parsing Functions ---
+# --- Data Loading Functions ---
 
-def parse_qwen_max_costs(report_path: Path, mapping: Dict[str, str]) -> List[Dict]:
-    """Parses the old Qwen-Max cost report and converts cost to USD."""
-    print("\n--- (1/3) Parsing Qwen-MAX Cost Report ---")
-    if not report_path.exists():
-        print(f"  - 警告: Qwen-MAX报告未找到于: {report_path}")
+def load_generation_costs(mapping: Dict[str, str]) -> List[Dict]:
+    """
+    Loads the generation tokens and cost (USD) of every server of COST_MODELS from the results store.
+    Costs are added to the store with import_results.py.
+    """
+    try:
+        # Query only: the store is never created or migrated from here
+        store = open_results_store(read_only=True)
+    except FileNotFoundError as e:
+        print(f"  - 警告: {e}")
         return []
-    with open(report_path, 'r', encoding='utf-8') as f: content = f.read()
-    data, project_sections = [], re.split(r'## Project: `', content)[1:]
-    for section in project_sections:
-        project_name = re.match(r'(.+?)`', section).group(1)
-        simplified_name = _simplify_name(project_name, mapping)
-        total_line = re.search(r'\|\s*\*\*Project Total\*\*.*?\|.*?([\d,]+)\*\*.*?\*\*¥\s*([\d,.]+)\*\*', section, re.DOTALL)
-        if total_line:
-            tokens, cost_rmb = int(total_line.group(1).replace(',', '')), float(total_line.group(2).replace(',', ''))
-            cost_usd = cost_rmb / RMB_TO_USD_RATE
-            data.append({'Model': 'qwen-max', 'Server Name': simplified_name, 'Total Tokens': tokens, 'Total Cost (USD)': cost_usd})
-            print(f"  - 找到 Qwen-MAX for '{simplified_name}': {tokens} tokens, ¥{cost_rmb:.4f} -> ${cost_usd:.4f}")
-    return data
-
-def parse_pipeline_costs(base_dir: Path, mapping: Dict[str, str]) -> List[Dict]:
-    """Parses pipeline output directories and converts cost to USD."""
-    print(f"\n--- (2/3) Parsing Pipeline Cost Reports from {base_dir} ---")
-    data = []
-    models = ['gpt-4o', 'qwen-plus', 'gemini-2.5-pro']
-    for model in models:
-        model_path = base_dir / model
-        if not model_path.is_dir(): continue
-        print(f"  - Processing model: {model.upper()}")
-        for project_dir in model_path.iterdir():
-            if not project_dir.is_dir(): continue
-            
-            report_path = None
-            if (project_dir / "statistics_report.md").exists():
-                report_path = project_dir / "statistics_report.md"
-            elif (project_dir / "refined" / "statistics_report.md").exists():
-                report_path = project_dir / "refined" / "statistics_report.md"
-            
-            if report_path:
-                simplified_name = _simplify_name(project_dir.name, mapping)
-                with open(report_path, 'r', encoding='utf-8') as f: content = f.read()
-                
-                matches = re.findall(r"模型: `(.+?)`.*?总成本\s*\(RMB\)\*\*\s*\|\s*\*\*¥([\d,.]+)\*\*.*?总 Token\s*\|\s*([\d,]+)", content, re.DOTALL)
-                
-                if matches:
-                    total_tokens = 0
-                    total_cost_usd = 0.0
-                    
-                    # 细化成本计算逻辑：逐个模型处理
-                    for model_name_from_report, cost_str, tokens_str in matches:
-                        tokens = int(tokens_str.replace(',', ''))
-                        cost_val = float(cost_str.replace(',', ''))
-                        
-                        # 关键修正：Gemini 的成本单位是美元，其他模型是人民币
-                        if 'gemini-2.5-pro' in model_name_from_report:
-                            cost_in_usd = cost_val  # 直接视为美元
-                        else:
-                            cost_in_usd = cost_val / RMB_TO_USD_RATE  # 从人民币转换为美元
-                            
-                        total_tokens += tokens
-                        total_cost_usd += cost_in_usd
-                    
-                    data.append({'Model': model, 'Server Name': simplified_name, 'Total Tokens': total_tokens, 'Total Cost (USD)': total_cost_usd})
-                    print(f"    - 找到 {model.upper()} for '{simplified_name}': {total_tokens} tokens, ${total_cost_usd:.4f}")
-    return data
+    rows = store.query(
+        f"SELECT subject, project_name, total_tokens, cost_usd FROM generation_costs "
+        f"WHERE subject IN ({', '.join('?' for _ in COST_MODELS)}) ORDER BY cost_id",
+        COST_MODELS
+    )
+    store.close()
+    return [
+        {'Model': row['subject'], 'Server Name': _simplify_name(row['project_name'], mapping),
+         'Total Tokens': row['total_tokens'], 'Total Cost (USD)': row['cost_usd']}
+        for row in rows
+    ]
 
 # --- Main Execution ---
 def main():
@@ -154,18 +114,15 @@ def main():
     print("开始整合所有Token与成本数据 (统一为USD)...")
     server_mapping = _get_simplified_server_mapping()
     
-    qwen_max_data = parse_qwen_max_costs(OLD_VERSION_REPORT, server_mapping)
-    pipeline_data = parse_pipeline_costs(PIPELINE_OUTPUT_DIR, server_mapping)
-    
-    print("\n--- (3/4) Consolidating all data ---")
-    all_data = qwen_max_data + pipeline_data
+    print("\n--- (1/2) Loading costs from the results store ---")
+    all_data = load_generation_costs(server_mapping)
     if not all_data:
-        print("\n错误: 未能收集到任何成本数据。请检查路径和报告文件。")
+        print("\n错误: 结果库中没有成本数据。请先运行 import_results.py 导入成本报告。")
         return
         
     df = pd.DataFrame(all_data)
     
-    print("\n--- (4/4) Filtering, Reshaping, and Saving Data ---")
+    print("\n--- (2/2) Filtering, Reshaping, and Saving Data ---")
     
     # 1. 过滤掉非标准服务器名称的行
     valid_server_names = set(server_mapping.values())
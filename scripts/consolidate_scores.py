@@ -1,6 +1,5 @@
 import os
-import re
-import glob
+import sys
 import json
 import pandas as pd
 import warnings
@@ -13,37 +12,15 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 # --- Path Configuration ---
 SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else os.getcwd()
 PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
-RAW_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'raw_run_data')
 SUMMARY_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'summary_data')
 WORKSPACE_DIR = os.path.join(PROJECT_ROOT, 'workspace')
 
+sys.path.append(PROJECT_ROOT)
+from testSystem.results_store import open_results_store
+
 # Define output file
 OUTPUT_CSV = os.path.join(SUMMARY_DATA_DIR, "raw_scores_collection.csv")
 
-# Define input directories for all runs
-QWEN_MAX_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250630_214742", "run_20250701_155804", "run_20250701_181915",
-    "run_20250630_201054", "run_20250630_185156", "run_20250630_163324",
-    "run_20250630_003147"
-]]
-PIPELINE_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250711_204700", "run_20250712_203413", "run_20250713_004043",
-    "run_20250713_024028", "run_20250713_034721"
-]]
-METAGPT_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250713_223534", "run_20250713_225157", "run_20250713_225853",
-    "run_20250713_230819", "run_20250713_231639", "run_20250714_104334",
-    "run_20250714_110732"
-]]
-QWEN_MAX_LATEST_PIPELINE_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250714_202550", "run_20250714_205741", "run_20250714_211504",
-    "run_20250714_213332", "run_20250714_215025"
-]]
-DEEPSEEK_V3_PIPELINE_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250716_101039", "run_20250716_103208", "run_20250716_105214",
-    "run_20250716_115725", "run_20250716_111320"
-]]
-
 # --- Utility Functions ---
 
 def _get_simplified_server_mapping() -> Dict[str, str]:
@@ -93,300 +70,39 @@ def _get_metagpt_reverse_mapping() -> Dict[Tuple[str, str], str]:
                 
     return reverse_mapping
 
-# --- Data Parsing Functions ---
-
-def parse_qwen_max_runs(run_dirs: List[str], mapping: Dict[str, str]) -> List[Dict]:
-    """
-    Parses the 7 old Qwen-Max runs by reading the summary table from *comparison_report.md files.
-    This logic is adapted from old_compare-all.py.
-    """
-    all_data = []
-    # Regex to capture the full data row from the markdown table
-    table_pattern = re.compile(r'\|\s*([a-zA-Z-].*?)\s*\|\s*([\d\.]+)\s*\|(.*?)\|\s*([\d\.]+)\s*\|.*')
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        report_file_path = glob.glob(os.path.join(run_dir, "*comparison_report.md"))
-        if not report_file_path:
-            print(f"  - 警告: 在 {run_name} 中未找到 comparison_report.md。")
-            continue
-        
-        print(f"正在处理 Qwen-MAX 运行: {run_name}")
-        public_scores = {'Test Subject': 'Public Baseline', 'Run Source': run_name}
-        qwen_max_scores = {'Test Subject': 'qwen-max', 'Run Source': run_name}
-
-        with open(report_file_path[0], 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        matches = table_pattern.findall(content)
-        for row in matches:
-            public_server, public_score, _, refined_score = row
-            simplified_name = _simplify_name(public_server, mapping)
-            public_scores[simplified_name] = float(public_score)
-            qwen_max_scores[simplified_name] = float(refined_score)
-        
-        if len(public_scores) > 2: # Check if any scores were actually added
-            all_data.append(public_scores)
-            all_data.append(qwen_max_scores)
-        else:
-            print(f"  - 警告: 在 {os.path.basename(report_file_path[0])} 中未解析到任何有效分数。")
-
-    return all_data
-
-def parse_pipeline_runs(run_dirs: List[str], mapping: Dict[str, str]) -> List[Dict]:
-    """
-    Parses the 5 new pipeline runs by reading pipeline_detailed_scores.csv from each run directory.
-    This logic is adapted from final_analysis.py.
-    """
-    all_data = []
-    dim_cols = ["功能性", "健壮性", "安全性", "性能", "透明性"]
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        csv_path = os.path.join(run_dir, "pipeline_detailed_scores.csv")
-        
-        if not os.path.exists(csv_path):
-            print(f"  - 警告: 在 {run_name} 中未找到 pipeline_detailed_scores.csv。")
-            continue
-            
-        print(f"正在处理 Pipeline 运行: {run_name}")
-        df_run = pd.read_csv(csv_path)
-        
-        # Calculate total score from dimensions
-        df_run['total_score'] = df_run[dim_cols].sum(axis=1)
-        
-        # Pivot table to get scores for each model
-        pivot = df_run.pivot_table(index='model', columns='public_server_name', values='total_score')
-        
-        for model_name, scores in pivot.iterrows():
-            record = {'Test Subject': model_name, 'Run Source': run_name}
-            for server_name, score in scores.items():
-                simplified_name = _simplify_name(server_name, mapping)
-                record[simplified_name] = score
-            all_data.append(record)
-            
-    return all_data
-
-def parse_metagpt_runs(run_dirs: List[str], reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
-    """
-    Parses the new MetaGPT runs by reading detailed_report_*.md files and extracting the total score.
-    """
-    all_data = []
-    # Regex to find the total score in the <SCORES> block
-    score_pattern = re.compile(r"总分:\s*(\d+)/100")
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        print(f"正在处理 MetaGPT 运行: {run_name}")
-
-        base_path = os.path.join(run_dir, "metaGPT-servers")
-        if not os.path.exists(base_path):
-            print(f"  - 警告: 在 {run_name} 中未找到 metaGPT-servers 目录。")
-            continue
-        
-        # This dict will hold scores for one run, keyed by the model name (e.g., 'metaGPT-qwen-plus')
-        run_scores_by_model = {}
-
-        # Find all model directories within the run, e.g., .../metaGPT-servers/metaGPT-qwen-plus
-        model_dirs = [d for d in glob.glob(os.path.join(base_path, "*")) if os.path.isdir(d)]
-        
-        for model_dir in model_dirs:
-            model_name = os.path.basename(model_dir)
-            if model_name not in run_scores_by_model:
-                run_scores_by_model[model_name] = {'Test Subject': model_name, 'Run Source': run_name}
-
-            # Find all detailed report files within the model's directory
-            report_files = glob.glob(os.path.join(model_dir, "detailed_report_*.md"))
-
-            for report_path in report_files:
-                filename = os.path.basename(report_path)
-                
-                # Extract raw project name from filename
-                # e.g., "detailed_report_metaGPT-qwen-plus-financial_data_mcp_server.md"
-                # -> we need "financial_data_mcp_server"
-                prefix_to_remove = f"detailed_report_{model_name}-"
-                if filename.startswith(prefix_to_remove):
-                     project_name_raw = filename[len(prefix_to_remove):].replace('.md', '')
-                else:
-                    print(f"  - 警告: 无法从文件名 {filename} 解析项目名称")
-                    continue
-                
-                # Find public server name from reverse mapping
-                public_server_name = reverse_mapping.get((model_name, project_name_raw))
-                if not public_server_name:
-                     print(f"  - 警告: 在映射中未找到项目 ({model_name}, {project_name_raw})")
-                     continue
-                
-                simplified_name = _simplify_name(public_server_name, simplified_name_mapping)
-
-                # Extract score from file content
-                with open(report_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                match = score_pattern.search(content)
-                if match:
-                    score = float(match.group(1))
-                    run_scores_by_model[model_name][simplified_name] = score
-                else:
-                    print(f"  - 警告: 在 {filename} 中未找到总分。")
-        
-        # Add the collected scores for this run to the final list
-        for model_data in run_scores_by_model.values():
-            if len(model_data) > 2: # Ensure some scores were actually added
-                all_data.append(model_data)
-
-    return all_data
+# --- Data Loading Functions ---
 
-def parse_qwen_max_latest_pipeline_runs(run_dirs: List[str], reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
+def load_total_scores(reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
     """
-    Parses the new qwen-max-latest pipeline runs by reading detailed_report_*.md files.
+    Loads the total score of every server test from the results store, as one record per
+    (run, test subject) with a column per simplified server name.
+    Runs recorded before the store existed are added with import_results.py.
     """
-    all_data = []
-    score_pattern = re.compile(r"总分:\s*(\d+)/100")
-    model_name = "qwen-max-latest"  # The model is fixed for these runs
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        print(f"正在处理 qwen-max-latest Pipeline 运行: {run_name}")
-
-        base_path = os.path.join(run_dir, "pipeline_server_tests", model_name)
-        if not os.path.exists(base_path):
-            print(f"  - 警告: 在 {run_name} 中未找到 {base_path} 目录。")
+    try:
+        # Query only: the store is never created or migrated from here
+        store = open_results_store(read_only=True)
+    except FileNotFoundError as e:
+        print(f"  - 警告: {e}")
+        return []
+    runs_data = {}
+
+    for row in store.server_results():
+        if row['total_score'] is None:
             continue
-        
-        # This dict will hold scores for this single model in this single run
-        run_scores = {'Test Subject': model_name, 'Run Source': run_name}
-
-        report_files = glob.glob(os.path.join(base_path, "detailed_report_*.md"))
-
-        for report_path in report_files:
-            filename = os.path.basename(report_path)
-            
-            # Extract raw project name from filename
-            # e.g., "detailed_report_qwen-max-latest-mcp_data_explorer_analyzer.md"
-            prefix_to_remove = f"detailed_report_{model_name}-"
-            if filename.startswith(prefix_to_remove):
-                 project_name_raw = filename[len(prefix_to_remove):].replace('.md', '')
-            else:
-                print(f"  - 警告: 无法从文件名 {filename} 解析项目名称")
-                continue
-            
-            # Find public server name from reverse mapping
-            # The key for reverse_mapping is (model_name, project_raw_name)
-            # The project_name_raw for qwen-max-latest has been changed in main.py, so we need to match it
-            
-            # First, find the corresponding public server entry
-            matched_public_server = None
-            for key, pub_name in reverse_mapping.items():
-                # key is a tuple: (model, project_name)
-                if key[0] == model_name and key[1] in project_name_raw:
-                    matched_public_server = pub_name
-                    break
-            
-            if not matched_public_server:
-                # Fallback for cases where the project name might be slightly different
-                # This part needs careful adjustment based on actual naming conventions
-                # Let's try a simpler direct lookup first.
-                public_server_name = reverse_mapping.get((model_name, project_name_raw))
-                if not public_server_name:
-                    print(f"  - 警告: 在映射中未找到项目 ({model_name}, {project_name_raw})")
-                    continue
-            else:
-                public_server_name = matched_public_server
-
-            simplified_name = _simplify_name(public_server_name, simplified_name_mapping)
-
-            # Extract score from file content
-            with open(report_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            match = score_pattern.search(content)
-            if match:
-                score = float(match.group(1))
-                run_scores[simplified_name] = score
-            else:
-                print(f"  - 警告: 在 {filename} 中未找到总分。")
-        
-        # Add the collected scores for this run to the final list
-        if len(run_scores) > 2: # Ensure some scores were actually added
-            all_data.append(run_scores)
-
-    return all_data
-
-def parse_deepseek_v3_pipeline_runs(run_dirs: List[str], reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
-    """
-    Parses the new deepseek-v3 pipeline runs by reading detailed_report_*.md files.
-    """
-    all_data = []
-    score_pattern = re.compile(r"总分:\s*(\d+)/100")
-    model_name = "deepseek-v3"  # The model is fixed for these runs
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        print(f"正在处理 deepseek-v3 Pipeline 运行: {run_name}")
-
-        base_path = os.path.join(run_dir, "pipeline_server_tests", model_name)
-        if not os.path.exists(base_path):
-            print(f"  - 警告: 在 {run_name} 中未找到 {base_path} 目录。")
+        # MetaGPT results are stored by project: find their public server through the mapping
+        public_server_name = row['public_server_name'] or reverse_mapping.get((row['subject'], row['project_name']))
+        if not public_server_name:
+            print(f"  - 警告: 在映射中未找到项目 ({row['subject']}, {row['project_name']})")
             continue
-        
-        # This dict will hold scores for this single model in this single run
-        run_scores = {'Test Subject': model_name, 'Run Source': run_name}
 
-        report_files = glob.glob(os.path.join(base_path, "detailed_report_*.md"))
+        record = runs_data.setdefault(
+            (row['run_id'], row['subject']),
+            {'Test Subject': row['subject'], 'Run Source': row['run_id']}
+        )
+        record[_simplify_name(public_server_name, simplified_name_mapping)] = row['total_score']
 
-        for report_path in report_files:
-            filename = os.path.basename(report_path)
-            
-            # Extract raw project name from filename
-            # e.g., "detailed_report_deepseek-v3-mcp_data_explorer_analyzer.md"
-            prefix_to_remove = f"detailed_report_{model_name}-"
-            if filename.startswith(prefix_to_remove):
-                 project_name_raw = filename[len(prefix_to_remove):].replace('.md', '')
-            else:
-                print(f"  - 警告: 无法从文件名 {filename} 解析项目名称")
-                continue
-            
-            # Find public server name from reverse mapping
-            # The key for reverse_mapping is (model_name, project_raw_name)
-            
-            # First, find the corresponding public server entry
-            matched_public_server = None
-            for key, pub_name in reverse_mapping.items():
-                # key is a tuple: (model, project_name)
-                if key[0] == model_name and key[1] in project_name_raw:
-                    matched_public_server = pub_name
-                    break
-            
-            if not matched_public_server:
-                # Fallback for cases where the project name might be slightly different
-                # This part needs careful adjustment based on actual naming conventions
-                # Let's try a simpler direct lookup first.
-                public_server_name = reverse_mapping.get((model_name, project_name_raw))
-                if not public_server_name:
-                    print(f"  - 警告: 在映射中未找到项目 ({model_name}, {project_name_raw})")
-                    continue
-            else:
-                public_server_name = matched_public_server
-
-            simplified_name = _simplify_name(public_server_name, simplified_name_mapping)
-
-            # Extract score from file content
-            with open(report_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            match = score_pattern.search(content)
-            if match:
-                score = float(match.group(1))
-                run_scores[simplified_name] = score
-            else:
-                print(f"  - 警告: 在 {filename} 中未找到总分。")
-        
-        # Add the collected scores for this run to the final list
-        if len(run_scores) > 2: # Ensure some scores were actually added
-            all_data.append(run_scores)
-
-    return all_data
+    store.close()
+    return list(runs_data.values())
 
 
 # --- Main Execution ---
@@ -397,33 +113,18 @@ def main():
     server_mapping = _get_simplified_server_mapping()
     score_columns = sorted(list(server_mapping.values()))
     
-    print("\n--- (1/3) 解析 Qwen-MAX (旧版) 运行... ---")
-    qwen_max_data = parse_qwen_max_runs(QWEN_MAX_RUNS, server_mapping)
-    
-    print("\n--- (2/3) 解析 Pipeline (新版) 运行... ---")
-    pipeline_data = parse_pipeline_runs(PIPELINE_RUNS, server_mapping)
-    
-    print("\n--- (3/3) 解析 MetaGPT (新版) 运行... ---")
+    print("\n--- (1/2) 从结果库读取总分... ---")
     metagpt_reverse_mapping = _get_metagpt_reverse_mapping()
-    metagpt_data = parse_metagpt_runs(METAGPT_RUNS, metagpt_reverse_mapping, server_mapping)
-    
-    print("\n--- (4/4) 解析 qwen-max-latest Pipeline 运行... ---")
-    qwen_latest_data = parse_qwen_max_latest_pipeline_runs(QWEN_MAX_LATEST_PIPELINE_RUNS, metagpt_reverse_mapping, server_mapping)
-
-    print("\n--- (5/5) 解析 deepseek-v3 Pipeline 运行... ---")
-    deepseek_v3_data = parse_deepseek_v3_pipeline_runs(DEEPSEEK_V3_PIPELINE_RUNS, metagpt_reverse_mapping, server_mapping)
-
-
-    all_run_data = qwen_max_data + pipeline_data + metagpt_data + qwen_latest_data + deepseek_v3_data
+    all_run_data = load_total_scores(metagpt_reverse_mapping, server_mapping)
     
     if not all_run_data:
-        print("\n错误: 未能从任何来源收集到有效数据。请检查路径和文件格式。")
+        print("\n错误: 结果库中没有有效数据。请先运行 import_results.py 导入历史运行。")
         return
         
     df = pd.DataFrame(all_run_data)
     
     # --- 新增统计分析 ---
-    print("\n--- (5/5) 计算统计数据... ---")
+    print("\n--- (2/2) 计算统计数据... ---")
 
     # 1. 标准化列并填充缺失值
     base_columns = ['Test Subject', 'Run Source']
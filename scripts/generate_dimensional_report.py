@@ -1,6 +1,5 @@
 import os
-import re
-import glob
+import sys
 import json
 import pandas as pd
 from pathlib import Path
@@ -15,7 +14,6 @@ plt.rcParams['axes.unicode_minus'] = False  # 修正负号显示问题
 # --- Path Configuration ---
 SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else os.getcwd()
 PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
-RAW_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'raw_run_data')
 SUMMARY_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'summary_data')
 RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
 WORKSPACE_DIR = os.path.join(PROJECT_ROOT, 'workspace')
@@ -24,25 +22,8 @@ OUTPUT_EXCEL = os.path.join(SUMMARY_DATA_DIR, "dimensional_scores_collection.xls
 OUTPUT_CSV = os.path.join(SUMMARY_DATA_DIR, "dimensional_scores_collection.csv")
 OUTPUT_RADAR_CHART = os.path.join(RESULTS_DIR, "dimensional_radar_chart.png")
 
-# Define input directories for all runs
-QWEN_MAX_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250630_214742", "run_20250701_155804", "run_20250701_181915",
-    "run_20250630_201054", "run_20250630_185156", "run_20250630_163324",
-    "run_20250630_003147"
-]]
-PIPELINE_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250711_204700", "run_20250712_203413", "run_20250713_004043",
-    "run_20250713_024028", "run_20250713_034721",
-    "run_20250714_202550", "run_20250714_205741", "run_20250714_211504",
-    "run_20250714_213332", "run_20250714_215025",
-    "run_20250716_101039", "run_20250716_103208", "run_20250716_105214",
-    "run_20250716_115725", "run_20250716_111320"
-]]
-METAGPT_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
-    "run_20250713_223534", "run_20250713_225157", "run_20250713_225853",
-    "run_20250713_230819", "run_20250713_231639", "run_20250714_104334",
-    "run_20250714_110732"
-]]
+sys.path.append(PROJECT_ROOT)
+from testSystem.results_store import DIMENSION_COLUMNS, open_results_store
 
 # --- Mappings & Definitions ---
 DIMENSIONS = ["Functionality", "Robustness", "Security", "Performance", "Transparency"]
@@ -110,128 +91,42 @@ def _get_metagpt_reverse_mapping() -> Dict[Tuple[str, str], str]:
                 reverse_mapping[(model, project_name)] = public_name
     return reverse_mapping
 
-# --- Data Parsing Functions ---
+# --- Data Loading Functions ---
 
-def parse_dimensional_scores_from_string(detail_str: str) -> Dict[str, float]:
-    """Parses a string like '功能性: 20, 健壮性: 18' into a dict of scores."""
-    scores = {}
-    if not isinstance(detail_str, str):
-        return {dim: 0.0 for dim in DIMENSIONS}
-    
-    for key_cn, key_en in DIMENSIONS_CN_MAP.items():
-        match = re.search(f"{key_cn}:\s*([\d\.]+)", detail_str)
-        if match:
-            scores[key_en] = float(match.group(1))
-        else:
-            scores[key_en] = 0.0
-    return scores
-
-def parse_qwen_max_runs_detailed(run_dirs: List[str], mapping: Dict[str, str]) -> List[Dict]:
+def load_dimensional_scores(reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
     """
-    Parses the old Qwen-Max runs for detailed dimensional scores, 
-    but NOW ONLY extracts Public Baseline data.
+    Loads the five dimension scores of every server test from the results store, as one record
+    per (run, test subject) with a '<server>:<Dimension>' column per simplified server name.
+    Of the old Qwen-MAX comparison runs only the Public Baseline is used, and qwen-max-latest
+    pipeline results are reported as qwen-max.
     """
-    all_data = []
-    # This regex now only needs to find the public server and its details column.
-    table_pattern = re.compile(r'\|\s*([a-zA-Z-].*?)\s*\|.*?\|.*?\|.*?\|.*?\|\s*(.*?)\s*\|')
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        report_file_path = glob.glob(os.path.join(run_dir, "*comparison_report.md"))
-        if not report_file_path:
+    try:
+        # Query only: the store is never created or migrated from here
+        store = open_results_store(read_only=True)
+    except FileNotFoundError as e:
+        print(f"  - 警告: {e}")
+        return []
+    runs_data = {}
+
+    for row in store.server_results():
+        if row['suite'] == 'refinement_server_tests':
+            continue
+        public_server_name = row['public_server_name'] or reverse_mapping.get((row['subject'], row['project_name']))
+        if not public_server_name:
             continue
-        
-        print(f"正在处理 Public Baseline (来自旧运行): {run_name}")
-        with open(report_file_path[0], 'r', encoding='utf-8') as f:
-            content = f.read()
 
-        public_run_data = {'Test Subject': 'Public Baseline', 'Run Source': run_name}
-        
-        matches = table_pattern.findall(content)
-        for row in matches:
-            if '---' in row[0] or 'Public Server' in row[0]: continue
-            
-            # The regex captures two groups: server name and the first detail string.
-            public_server, public_details_str = row[0], row[1] 
-            simplified_name = _simplify_name(public_server, mapping)
-            
-            public_scores = parse_dimensional_scores_from_string(public_details_str)
-            for dim, score in public_scores.items():
-                public_run_data[f"{simplified_name}:{dim}"] = score
-        
-        if len(public_run_data) > 2: all_data.append(public_run_data)
-            
-    return all_data
-
-def parse_pipeline_runs_detailed(run_dirs: List[str], mapping: Dict[str, str]) -> List[Dict]:
-    """Parses the new pipeline runs for detailed dimensional scores."""
-    all_data = []
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        csv_path = os.path.join(run_dir, "pipeline_detailed_scores.csv")
-        if not os.path.exists(csv_path): continue
-            
-        print(f"正在处理 Pipeline (详细) 运行: {run_name}")
-        df_run = pd.read_csv(csv_path)
-        # Rename 'qwen-max-latest' to 'qwen-max' to standardize model names
-        df_run['model'] = df_run['model'].replace('qwen-max-latest', 'qwen-max')
-        
-        for model_name, group in df_run.groupby('model'):
-            model_run_data = {'Test Subject': model_name, 'Run Source': run_name}
-            for _, row in group.iterrows():
-                simplified_name = _simplify_name(row['public_server_name'], mapping)
-                for dim_cn, dim_en in DIMENSIONS_CN_MAP.items():
-                    score = row.get(dim_cn, 0.0)
-                    model_run_data[f"{simplified_name}:{dim_en}"] = score
-            all_data.append(model_run_data)
-            
-    return all_data
-
-def parse_metagpt_runs_detailed(run_dirs: List[str], reverse_mapping: Dict, simplified_name_mapping: Dict) -> List[Dict]:
-    """Parses the new MetaGPT runs for detailed dimensional scores."""
-    all_data = []
-    score_pattern = re.compile(r"(\w+):\s*(\d+)\/\d+")
-
-    for run_dir in run_dirs:
-        run_name = os.path.basename(run_dir)
-        print(f"正在处理 MetaGPT (详细) 运行: {run_name}")
-        base_path = os.path.join(run_dir, "metaGPT-servers")
-        if not os.path.exists(base_path): continue
-
-        model_dirs = [d for d in glob.glob(os.path.join(base_path, "*")) if os.path.isdir(d)]
-        for model_dir in model_dirs:
-            model_name = os.path.basename(model_dir)
-            model_run_data = {'Test Subject': model_name, 'Run Source': run_name}
-            report_files = glob.glob(os.path.join(model_dir, "detailed_report_*.md"))
-
-            for report_path in report_files:
-                filename = os.path.basename(report_path)
-                prefix_to_remove = f"detailed_report_{model_name}-"
-                if not filename.startswith(prefix_to_remove): continue
-                
-                project_name_raw = filename[len(prefix_to_remove):].replace('.md', '')
-                public_server_name = reverse_mapping.get((model_name, project_name_raw))
-                if not public_server_name: continue
-                
-                simplified_name = _simplify_name(public_server_name, simplified_name_mapping)
-                with open(report_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                matches = score_pattern.findall(content)
-                dim_scores_found = {}
-                for dim_cn, score_str in matches:
-                    if dim_cn in DIMENSIONS_CN_MAP:
-                        dim_en = DIMENSIONS_CN_MAP[dim_cn]
-                        dim_scores_found[dim_en] = float(score_str)
-
-                # Ensure all dims are present, filling with 0 if not found
-                for dim in DIMENSIONS:
-                    model_run_data[f"{simplified_name}:{dim}"] = dim_scores_found.get(dim, 0.0)
-
-            if len(model_run_data) > 2:
-                all_data.append(model_run_data)
-                
-    return all_data
+        model_name = 'qwen-max' if row['subject'] == 'qwen-max-latest' else row['subject']
+        record = runs_data.setdefault(
+            (row['run_id'], model_name),
+            {'Test Subject': model_name, 'Run Source': row['run_id']}
+        )
+        simplified_name = _simplify_name(public_server_name, simplified_name_mapping)
+        for dim_cn, dim_en in DIMENSIONS_CN_MAP.items():
+            score = row[DIMENSION_COLUMNS[dim_cn]]
+            record[f"{simplified_name}:{dim_en}"] = score if score is not None else 0.0
+
+    store.close()
+    return list(runs_data.values())
 
 # --- Analysis Functions ---
 
@@ -595,20 +490,12 @@ def main():
     print("开始整合所有详细的五维分数数据...")
     server_mapping = _get_simplified_server_mapping()
     
-    print("\n--- (1/3) 解析 Public Baseline (来自旧运行) 的详细数据... ---")
-    baseline_data = parse_qwen_max_runs_detailed(QWEN_MAX_RUNS, server_mapping)
-    
-    print("\n--- (2/3) 解析 Pipeline (详细) 运行... ---")
-    pipeline_data = parse_pipeline_runs_detailed(PIPELINE_RUNS, server_mapping)
-    
-    print("\n--- (3/3) 解析 MetaGPT (详细) 运行... ---")
+    print("\n--- 从结果库读取五维分数... ---")
     metagpt_reverse_mapping = _get_metagpt_reverse_mapping()
-    metagpt_data = parse_metagpt_runs_detailed(METAGPT_RUNS, metagpt_reverse_mapping, server_mapping)
-    
-    all_run_data = baseline_data + pipeline_data + metagpt_data
+    all_run_data = load_dimensional_scores(metagpt_reverse_mapping, server_mapping)
     
     if not all_run_data:
-        print("\n错误: 未能从任何来源收集到有效数据。")
+        print("\n错误: 结果库中没有有效数据。请先运行 import_results.py 导入历史运行。")
         return
         
     df = pd.DataFrame(all_run_data).fillna(0)
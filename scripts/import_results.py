@@ -0,0 +1,321 @@
+import os
+import re
+import csv
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# --- Path Configuration ---
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else os.getcwd()
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+RAW_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'raw_run_data')
+SUMMARY_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'summary_data')
+WORKSPACE_DIR = os.path.join(PROJECT_ROOT, 'workspace')
+PIPELINE_OUTPUT_DIR = os.path.join(WORKSPACE_DIR, 'pipeline-output-servers')
+OLD_VERSION_REPORT = os.path.join(SUMMARY_DATA_DIR, 'old_version_token_consumption_report.md')
+RMB_TO_USD_RATE = 7.2
+
+sys.path.append(PROJECT_ROOT)
+from testSystem.results_store import SOURCE_BACKFILL, open_results_store
+
+# One-time backfill of the results store (data/results.sqlite) from the runs that were recorded
+# before the store existed. These are the runs the analysis scripts used to crawl; runs made
+# since are recorded by testSystem itself. Re-running the importer skips what is already stored.
+BACKFILL_RUNS = [os.path.join(RAW_DATA_DIR, d) for d in [
+    # Qwen-MAX comparison runs (comparison_report.md): Public Baseline and qwen-max
+    "run_20250630_214742", "run_20250701_155804", "run_20250701_181915",
+    "run_20250630_201054", "run_20250630_185156", "run_20250630_163324",
+    "run_20250630_003147",
+    # Pipeline runs (pipeline_detailed_scores.csv): gemini-2.5-pro, gpt-4o, qwen-plus
+    "run_20250711_204700", "run_20250712_203413", "run_20250713_004043",
+    "run_20250713_024028", "run_20250713_034721",
+    # MetaGPT runs (metaGPT-servers/<model>/detailed_report_*.md)
+    "run_20250713_223534", "run_20250713_225157", "run_20250713_225853",
+    "run_20250713_230819", "run_20250713_231639", "run_20250714_104334",
+    "run_20250714_110732",
+    # qwen-max-latest pipeline runs
+    "run_20250714_202550", "run_20250714_205741", "run_20250714_211504",
+    "run_20250714_213332", "run_20250714_215025",
+    # deepseek-v3 pipeline runs
+    "run_20250716_101039", "run_20250716_103208", "run_20250716_105214",
+    "run_20250716_115725", "run_20250716_111320",
+]]
+
+DIMENSIONS_CN = ["功能性", "健壮性", "安全性", "性能", "透明性"]
+
+# --- Utility Functions ---
+
+def _load_pipeline_mapping() -> List[Dict]:
+    mapping_file = os.path.join(WORKSPACE_DIR, 'pipeline_mapping.json')
+    if not os.path.exists(mapping_file):
+        print(f"  - 警告: pipeline_mapping.json not found at {mapping_file}")
+        return []
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _get_metagpt_reverse_mapping(pipeline_mapping: List[Dict]) -> Dict[Tuple[str, str], str]:
+    """Creates a reverse lookup map from (model, project) to public_server_name."""
+    reverse_mapping = {}
+    for item in pipeline_mapping:
+        public_name = item.get('public_server_name')
+        if not public_name: continue
+        for model, server_info in item.get('generated_servers', {}).items():
+            if server_info and 'project_name' in server_info:
+                reverse_mapping[(model, server_info['project_name'])] = public_name
+    return reverse_mapping
+
+def _find_public_server(reverse_mapping: Dict, model_name: str, project_name_raw: str) -> Optional[str]:
+    """Exact (model, project) lookup; pipeline projects renamed by main.py are matched by the mapped project name they contain."""
+    public_server_name = reverse_mapping.get((model_name, project_name_raw))
+    if public_server_name:
+        return public_server_name
+    for (model, project), public_name in reverse_mapping.items():
+        if model == model_name and project in project_name_raw:
+            return public_name
+    return None
+
+def _run_started_at(run_name: str) -> Optional[str]:
+    """run_20250713_004043 -> 2025-07-13T00:40:43"""
+    try:
+        return datetime.strptime(run_name, "run_%Y%m%d_%H%M%S").isoformat()
+    except ValueError:
+        return None
+
+def _relative(path: str) -> str:
+    return os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/')
+
+def parse_dimensional_scores_from_string(detail_str: str) -> Dict[str, float]:
+    """Parses a string like '功能性: 20, 健壮性: 18' into a dict of scores."""
+    scores = {}
+    for dim in DIMENSIONS_CN:
+        match = re.search(rf"{dim}:\s*([\d\.]+)", detail_str)
+        scores[dim] = float(match.group(1)) if match else 0.0
+    return scores
+
+# --- Data Parsing Functions ---
+
+def parse_comparison_report(report_path: str) -> List[Dict]:
+    """
+    Parses the summary table of an old Qwen-MAX *comparison_report.md: one result for the public
+    server (Public Baseline) and one for its refined counterpart (qwen-max) per row.
+    """
+    results = []
+    with open(report_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    for line in content.splitlines():
+        cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+        # | Public Server | Public Score | Refined Server | Refined Score | Improvement | Public Details | Refined Details |
+        if len(cells) < 7 or not re.fullmatch(r'[\d\.]+', cells[1]) or not re.fullmatch(r'[\d\.]+', cells[3]):
+            continue
+        public_server, public_score, refined_server, refined_score, _, public_details, refined_details = cells[:7]
+        results.append({
+            'suite': 'public_server_tests', 'subject': 'Public Baseline', 'report_name': public_server,
+            'project_name': public_server, 'public_server_name': public_server,
+            'scores': parse_dimensional_scores_from_string(public_details), 'total_score': float(public_score),
+        })
+        results.append({
+            'suite': 'refinement_server_tests', 'subject': 'qwen-max', 'report_name': refined_server,
+            'project_name': refined_server, 'public_server_name': public_server,
+            'scores': parse_dimensional_scores_from_string(refined_details), 'total_score': float(refined_score),
+        })
+    return results
+
+def parse_pipeline_scores_csv(csv_path: str) -> List[Dict]:
+    """Parses pipeline_detailed_scores.csv (public_server_name, model, five dimensions); the total is their sum."""
+    results = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            scores = {dim: float(row[dim]) if row.get(dim) not in (None, '') else 0.0 for dim in DIMENSIONS_CN}
+            results.append({
+                'suite': 'pipeline_server_tests', 'subject': row['model'], 'report_name': None,
+                'project_name': None, 'public_server_name': row['public_server_name'],
+                'scores': scores, 'total_score': sum(scores.values()),
+            })
+    return results
+
+def parse_detailed_reports(model_dir: str, suite: str, reverse_mapping: Dict) -> List[Dict]:
+    """Parses the <SCORES> block of every detailed_report_<model>-<project>.md in a model's report directory."""
+    results = []
+    model_name = os.path.basename(model_dir)
+    dimension_pattern = re.compile(r"(\w+):\s*(\d+)\/\d+")
+    total_pattern = re.compile(r"总分:\s*(\d+)/100")
+
+    for report_path in sorted(glob.glob(os.path.join(model_dir, "detailed_report_*.md"))):
+        filename = os.path.basename(report_path)
+        prefix_to_remove = f"detailed_report_{model_name}-"
+        if not filename.startswith(prefix_to_remove):
+            print(f"  - 警告: 无法从文件名 {filename} 解析项目名称")
+            continue
+        project_name_raw = filename[len(prefix_to_remove):].replace('.md', '')
+        public_server_name = _find_public_server(reverse_mapping, model_name, project_name_raw)
+        if not public_server_name:
+            print(f"  - 警告: 在映射中未找到项目 ({model_name}, {project_name_raw})")
+
+        with open(report_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        scores = {dim: float(score) for dim, score in dimension_pattern.findall(content) if dim in DIMENSIONS_CN}
+        total_match = total_pattern.search(content)
+        if not total_match:
+            print(f"  - 警告: 在 {filename} 中未找到总分。")
+
+        results.append({
+            'suite': suite, 'subject': model_name, 'report_name': f"{model_name}-{project_name_raw}",
+            'project_name': project_name_raw, 'public_server_name': public_server_name,
+            'scores': scores, 'total_score': float(total_match.group(1)) if total_match else None,
+        })
+    return results
+
+def parse_pipeline_run(run_dir: str, reverse_mapping: Dict, simplified_names: Dict[str, str]) -> List[Dict]:
+    """
+    Dimension scores from pipeline_detailed_scores.csv. The total score, report and project
+    name come from the matching detailed report, as the tester records them; without one the
+    total is the sum of the dimensions.
+    """
+    results = parse_pipeline_scores_csv(os.path.join(run_dir, "pipeline_detailed_scores.csv"))
+    reports = {}
+    for model_dir in glob.glob(os.path.join(run_dir, "pipeline_server_tests", "*")):
+        if not os.path.isdir(model_dir): continue
+        for report in parse_detailed_reports(model_dir, "pipeline_server_tests", reverse_mapping):
+            if report['public_server_name']:
+                simplified_name = simplified_names.get(report['public_server_name'], report['public_server_name'])
+                reports[(report['subject'], simplified_name.lower())] = report
+
+    for result in results:
+        report = reports.get((result['subject'], result['public_server_name'].lower()))
+        if not report: continue
+        result['report_name'], result['project_name'] = report['report_name'], report['project_name']
+        if report['total_score'] is not None:
+            result['total_score'] = report['total_score']
+    return results
+
+def parse_run(run_dir: str, reverse_mapping: Dict, simplified_names: Dict[str, str]) -> Tuple[str, List[Dict]]:
+    """Results of a run directory from the best source it has, and the name of that source."""
+    comparison_reports = glob.glob(os.path.join(run_dir, "*comparison_report.md"))
+    comparison_reports = [p for p in comparison_reports if not os.path.basename(p).startswith("pipeline_")]
+    if comparison_reports:
+        return os.path.basename(comparison_reports[0]), parse_comparison_report(comparison_reports[0])
+
+    if os.path.exists(os.path.join(run_dir, "pipeline_detailed_scores.csv")):
+        return "pipeline_detailed_scores.csv", parse_pipeline_run(run_dir, reverse_mapping, simplified_names)
+
+    results = []
+    for suite in ["metaGPT-servers", "pipeline_server_tests"]:
+        base_path = os.path.join(run_dir, suite)
+        if not os.path.isdir(base_path):
+            continue
+        for model_dir in sorted(d for d in glob.glob(os.path.join(base_path, "*")) if os.path.isdir(d)):
+            results.extend(parse_detailed_reports(model_dir, suite, reverse_mapping))
+        if results:
+            return f"{suite}/*/detailed_report_*.md", results
+    return "", []
+
+def parse_old_version_costs(report_path: str) -> List[Dict]:
+    """Parses the old Qwen-Max cost report (RMB) into per-project tokens and USD cost."""
+    if not os.path.exists(report_path):
+        print(f"  - 警告: Qwen-MAX报告未找到于: {report_path}")
+        return []
+    with open(report_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    data = []
+    for section in re.split(r'## Project: `', content)[1:]:
+        project_name = re.match(r'(.+?)`', section).group(1)
+        total_line = re.search(r'\|\s*\*\*Project Total\*\*.*?\|.*?([\d,]+)\*\*.*?\*\*¥\s*([\d,.]+)\*\*', section, re.DOTALL)
+        if total_line:
+            tokens, cost_rmb = int(total_line.group(1).replace(',', '')), float(total_line.group(2).replace(',', ''))
+            data.append({'subject': 'qwen-max', 'project_name': project_name, 'total_tokens': tokens,
+                         'cost_usd': cost_rmb / RMB_TO_USD_RATE,
+                         'source_file': f"{_relative(report_path)}#{project_name}"})
+    return data
+
+def parse_pipeline_costs(base_dir: str) -> List[Dict]:
+    """Parses the statistics_report.md of every generated project; Gemini costs are already in USD, the others in RMB."""
+    data = []
+    if not os.path.isdir(base_dir):
+        return data
+    for model in sorted(os.listdir(base_dir)):
+        model_path = os.path.join(base_dir, model)
+        if not os.path.isdir(model_path): continue
+        for project in os.listdir(model_path):
+            project_dir = os.path.join(model_path, project)
+            if not os.path.isdir(project_dir): continue
+
+            report_path = os.path.join(project_dir, "statistics_report.md")
+            if not os.path.exists(report_path):
+                report_path = os.path.join(project_dir, "refined", "statistics_report.md")
+                if not os.path.exists(report_path): continue
+
+            with open(report_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            matches = re.findall(r"模型: `(.+?)`.*?总成本\s*\(RMB\)\*\*\s*\|\s*\*\*¥([\d,.]+)\*\*.*?总 Token\s*\|\s*([\d,]+)", content, re.DOTALL)
+            if not matches: continue
+
+            total_tokens, total_cost_usd = 0, 0.0
+            for model_name_from_report, cost_str, tokens_str in matches:
+                cost_val = float(cost_str.replace(',', ''))
+                total_tokens += int(tokens_str.replace(',', ''))
+                total_cost_usd += cost_val if 'gemini-2.5-pro' in model_name_from_report else cost_val / RMB_TO_USD_RATE
+            data.append({'subject': model, 'project_name': project, 'total_tokens': total_tokens,
+                         'cost_usd': total_cost_usd, 'source_file': _relative(report_path)})
+    return data
+
+# --- Main Execution ---
+
+def main():
+    parser = argparse.ArgumentParser(description="将历史运行结果一次性导入结果库 (data/results.sqlite)")
+    parser.add_argument("run_dirs", nargs="*", help="要导入的运行目录 (默认: 分析脚本使用的全部历史运行)")
+    parser.add_argument("--db", default=None, help="结果库路径 (默认: RESULTS_DB_PATH 或 data/results.sqlite)")
+    parser.add_argument("--skip-costs", action="store_true", help="不导入生成成本")
+    args = parser.parse_args()
+
+    store = open_results_store(args.db)
+    print(f"结果库: {store.db_path}")
+    pipeline_mapping = _load_pipeline_mapping()
+    reverse_mapping = _get_metagpt_reverse_mapping(pipeline_mapping)
+    simplified_names = {item['public_server_name']: item['simplified_name'] for item in pipeline_mapping
+                        if item.get('public_server_name') and item.get('simplified_name')}
+
+    print("\n--- (1/2) 导入测试结果... ---")
+    imported_runs, imported_results = 0, 0
+    for run_dir in args.run_dirs or BACKFILL_RUNS:
+        run_name = os.path.basename(os.path.normpath(run_dir))
+        if not os.path.isdir(run_dir):
+            print(f"  - 警告: 运行目录不存在, 跳过: {run_name}")
+            continue
+        if store.has_run(run_name):
+            print(f"  - 已导入, 跳过: {run_name}")
+            continue
+
+        source, results = parse_run(run_dir, reverse_mapping, simplified_names)
+        if not results:
+            print(f"  - 警告: 在 {run_name} 中未找到可导入的分数。")
+            continue
+
+        store.record_run(run_name, started_at=_run_started_at(run_name), source=SOURCE_BACKFILL,
+                         metadata={"run_dir": _relative(run_dir), "imported_from": source})
+        for result in results:
+            store.record_scores(run_name, result['suite'], result['subject'], result['scores'],
+                                total_score=result['total_score'], report_name=result['report_name'],
+                                project_name=result['project_name'], public_server_name=result['public_server_name'])
+        imported_runs += 1
+        imported_results += len(results)
+        print(f"  - {run_name}: {len(results)} 条结果 (来自 {source})")
+
+    imported_costs = 0
+    if not args.skip_costs:
+        print("\n--- (2/2) 导入生成成本... ---")
+        for cost in parse_old_version_costs(OLD_VERSION_REPORT) + parse_pipeline_costs(PIPELINE_OUTPUT_DIR):
+            if store.has_generation_cost(cost['source_file']):
+                continue
+            store.record_generation_cost(cost['subject'], cost['project_name'], cost['total_tokens'],
+                                         cost['cost_usd'], source_file=cost['source_file'])
+            imported_costs += 1
+
+    print(f"\n导入完成！新增 {imported_runs} 个运行, {imported_results} 条测试结果, {imported_costs} 条成本记录。")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ import httpx
 from pathlib import Path
 import importlib.util
 import asyncio
+import contextlib
 
 # Ensure we can import other modules from the project by adding the project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -23,6 +24,12 @@ from langchain_core.messages import HumanMessage
 from testSystem.prompts.utils import load_prompt
 # Import custom timeout exception
 from testSystem.exceptions import ToolTimeoutError
+from testSystem.load_test import (
+    LOAD_TEST, LOAD_TEST_CONCURRENCY, LOAD_TEST_DURATION, run_load_test, select_load_samples, skipped_load_test
+)
+from testSystem.test_case_cache import (
+    get_test_case_cache, make_test_case_key, add_test_case_cache_arguments, apply_test_case_cache_arguments
+)
 
 # MCP相关导入
 from mcp import ClientSession, StdioServerParameters
@@ -48,6 +55,8 @@ try:
     from framwork.tool.langchain_file_reader import LangchainFileReaderTool
     # Import custom tool manager class, not instance
     from framwork.mcp_swe_flow.adapters.tool_manager import MCPToolManager
+    # Forks servers from a warm interpreter when MCP_ZYGOTE is enabled
+    from framwork.mcp_swe_flow.adapters.zygote import stdio_server_params
 
 except ImportError:
     print("Warning: Unable to import framwork modules, will run with basic functionality")
@@ -55,6 +64,7 @@ except ImportError:
     logger = None
     get_agent_logger = None
     LangchainFileReaderTool = None
+    stdio_server_params = None
 
 class MCPIntelligentTester:
     """MCP server intelligent testing tool that dynamically constructs test requests based on tool descriptions"""
@@ -69,6 +79,10 @@ class MCPIntelligentTester:
                 - project_name_override: Project name override
                 - tool_timeout: Tool execution timeout (seconds), default 40 seconds
                 - max_consecutive_timeouts: Maximum consecutive timeout count, default 3
+                - generation_concurrency: Concurrent test case generation calls, default TEST_GENERATION_CONCURRENCY or 4
+                - load_test: Whether to load test the read-only tools, default LOAD_TEST or True
+                - load_test_concurrency: Concurrent load test workers, default LOAD_TEST_CONCURRENCY or 4
+                - load_test_duration: Load test duration (seconds), default LOAD_TEST_DURATION or 10
         """
         self.output_dir = output_dir
         self.test_files_dir = test_files_dir
@@ -80,6 +94,12 @@ class MCPIntelligentTester:
         # Configure timeout parameters
         self.tool_timeout = kwargs.get("tool_timeout", 40.0)  # Default 40 seconds
         self.max_consecutive_timeouts = kwargs.get("max_consecutive_timeouts", 3)  # Default 3 times
+        # Tools beyond the first two (the context tools) get their test cases generated concurrently
+        self.generation_concurrency = max(1, kwargs.get("generation_concurrency", int(os.getenv("TEST_GENERATION_CONCURRENCY", 4))))
+        # Measured performance: read-only tools are put under load after the functional tests
+        self.load_test = kwargs.get("load_test", LOAD_TEST)
+        self.load_test_concurrency = max(1, kwargs.get("load_test_concurrency", LOAD_TEST_CONCURRENCY))
+        self.load_test_duration = kwargs.get("load_test_duration", LOAD_TEST_DURATION)
         
         # Initialize LLM and logger (will be moved to execution stage)
         self.llm = None
@@ -139,12 +159,15 @@ class MCPIntelligentTester:
             server_dir = os.path.dirname(abs_server_file)
             
             # Use StdioServerParameters to execute file directly instead of as module
-            server_params = StdioServerParameters(
-                command=sys.executable,  # Python interpreter
-                args=[abs_server_file],  # Execute file directly instead of as module
-                cwd=server_dir,  # Set working directory to server file directory
-                env=os.environ.copy()
-            )
+            if stdio_server_params is not None:
+                server_params = stdio_server_params([abs_server_file], cwd=server_dir, env=os.environ.copy())
+            else:
+                server_params = StdioServerParameters(
+                    command=sys.executable,  # Python interpreter
+                    args=[abs_server_file],  # Execute file directly instead of as module
+                    cwd=server_dir,  # Set working directory to server file directory
+                    env=os.environ.copy()
+                )
             
             # Use tool manager to initialize connection and get tools, add 60-second timeout
             try:
@@ -214,6 +237,52 @@ class MCPIntelligentTester:
             result = {"result": result}
             
         return result, execution_time
+
+    async def run_load_test_async(self, results: Dict) -> Dict:
+        """Load test the read-only tools of the connected server by replaying their successful functional test cases
+        
+        Args:
+            results: Test results of the suite (tools and test_results)
+            
+        Returns:
+            Load test summary (see testSystem/load_test.py), or a skipped entry with the reason
+        """
+        if not self.load_test:
+            return skipped_load_test("disabled")
+        if results.get("abnormal_termination"):
+            return skipped_load_test(f"functional tests terminated abnormally: {results['abnormal_termination']}")
+        samples = select_load_samples(self.tools, results["test_results"])
+        if not samples:
+            return skipped_load_test("no read-only tool with a successful functional test case")
+
+        tool_names = sorted({name for name, _ in samples})
+        print(f"\nLoad testing {tool_names} with {self.load_test_concurrency} workers for {self.load_test_duration}s...")
+        try:
+            # Bounded by the duration plus one call that started just before its end
+            summary = await asyncio.wait_for(
+                run_load_test(self.tool_manager.invoke_tool, samples,
+                              concurrency=self.load_test_concurrency,
+                              duration=self.load_test_duration,
+                              call_timeout=self.tool_timeout),
+                timeout=self.load_test_duration + self.tool_timeout + 10.0
+            )
+        except asyncio.TimeoutError:
+            return skipped_load_test("load test did not finish in time")
+
+        print(f"  Throughput: {summary['throughput']} req/s, p50/p95/p99: "
+              f"{summary['p50']}/{summary['p95']}/{summary['p99']}s, error rate: {summary['error_rate']}")
+        if self.agent_logger:
+            self.agent_logger.log(event_type="load_test_completed",
+                                  tools=tool_names,
+                                  concurrency=summary["concurrency"],
+                                  duration=summary["duration"],
+                                  requests=summary["requests"],
+                                  throughput=summary["throughput"],
+                                  p50=summary["p50"],
+                                  p95=summary["p95"],
+                                  p99=summary["p99"],
+                                  error_rate=summary["error_rate"])
+        return summary
      
     def get_test_files(self) -> List[str]:
         """Get test area file list
@@ -243,14 +312,26 @@ class MCPIntelligentTester:
         # Parse response, extract JSON part
         import re
         import json
+        # Get test area file list
+        test_files = self.get_test_files()
+        
+        # Tools with the same schema get the same cases across servers, models and runs
+        cache = get_test_case_cache()
+        cache_key = make_test_case_key(tool, test_files) if cache else None
+        if cache:
+            cached_cases = cache.get(cache_key)
+            if cached_cases:
+                print(f"  Using {len(cached_cases)} cached test cases for tool '{tool['name']}'")
+                if self.agent_logger:
+                    self.agent_logger.log(event_type="test_cases_cache_hit", tool_name=tool["name"],
+                                          cache_key=cache_key, test_count=len(cached_cases))
+                return cached_cases
+        
         # If no LLM, return empty list directly
         if self.llm is None:
             logger.error("LLM not available for test generation. Skipping.")
             return []
         
-        # Get test area file list
-        test_files = self.get_test_files()
-        
         # Prepare tool description and parameter information
         tool_name = tool["name"]
         tool_description = tool["description"]
@@ -353,6 +434,9 @@ class MCPIntelligentTester:
             if not test_cases:
                 logger.warning("Unable to parse any test cases from LLM response, will skip testing this tool.")
                 return []
+            
+            if cache:
+                cache.set(cache_key, test_cases)
                 
             return test_cases
             
@@ -362,6 +446,41 @@ class MCPIntelligentTester:
                 logger.error(f"LLM response: {response.content}")
             return []
             
+    async def generate_tool_test_cases(self, tool: Dict, test_results: Dict,
+                                       semaphore: Optional[asyncio.Semaphore] = None) -> Optional[List[Dict]]:
+        """Generate a tool's test cases with the 10-minute generation timeout
+        
+        Args:
+            tool: Tool definition dictionary
+            test_results: Results of the context tools
+            semaphore: Bounds concurrent generation calls, if given
+            
+        Returns:
+            Test case list, or None if the tool should be skipped
+        """
+        tool_name = tool["name"]
+        async with semaphore or contextlib.nullcontext():
+            tool_generate_start_time = time.time()
+            print(f"\nGenerating test cases for tool '{tool_name}'...")
+            try:
+                generate_task = self.analyze_tool_and_generate_tests(tool, test_results)
+                cases = await asyncio.wait_for(generate_task, timeout=600.0)  # 10-minute generation timeout
+                print(f"  Generated {len(cases)} test cases for tool '{tool_name}'")
+            except asyncio.TimeoutError:
+                print(f"  Warning: Test case generation timeout (10 minutes) for tool '{tool_name}', skipping this tool")
+                return None
+            except Exception as e:
+                print(f"  Error generating test cases for tool '{tool_name}': {str(e)}, skipping this tool")
+                return None
+
+        tool_generate_time = time.time() - tool_generate_start_time
+        if self.agent_logger:
+            self.agent_logger.log(event_type="llm_test_case_generated", 
+                                  tool_name=tool_name,
+                                  case_generate_time=tool_generate_time,
+                                  test_cases_count=len(cases))
+        return cases
+
     def extract_valid_test_cases(self, json_text: str) -> List[Dict]:
         """Extract valid test cases from JSON text that may contain errors
         
@@ -600,162 +719,162 @@ class MCPIntelligentTester:
             
             # Flag for detecting consecutive timeouts
             last_tool_timed_out = False
+
+            # To save tokens, only pass test results from the first two tools as context
+            context_tool_names = tool_order[:2]
+            generation_tasks = {}
+
+            def context_test_results() -> Dict:
+                return {name: results["test_results"][name] for name in context_tool_names if name in results["test_results"]}
             
             # Process each tool in order
-            for tool_name in tool_order:
-                # Check if overall test has timed out
-                if time.time() - test_phase_start > test_phase_timeout:
-                    print(f"Warning: Overall test phase has timed out ({test_phase_timeout} seconds), aborting remaining tests")
-                    results["abnormal_termination"] = f"Test phase timeout after {test_phase_timeout} seconds"
-                    break
-                    
-                tool = next((t for t in results["tools"] if t["name"] == tool_name), None)
-                if not tool:
-                    continue
-                    
-                tool_generate_start_time = time.time()
-                    
-                print(f"\nGenerating test cases for tool '{tool_name}'...")
-                
-                
-                # To save tokens, only pass test results from the first two tools as context
-                limited_test_results = {}
-                # Get names of the first two tools in the predetermined order
-                context_tool_names = tool_order[:2]
-                # Filter out results of these two tools from already executed test results
-                for ctx_tool_name in context_tool_names:
-                    if ctx_tool_name in results["test_results"]:
-                        limited_test_results[ctx_tool_name] = results["test_results"][ctx_tool_name]
-
-                # Call LLM to generate test cases, add timeout control
-                try:
-                    generate_task = self.analyze_tool_and_generate_tests(tool, limited_test_results)
-                    cases = await asyncio.wait_for(generate_task, timeout=600.0)  # 10-minute generation timeout
-                    print(f"  Generated {len(cases)} test cases")
-                except asyncio.TimeoutError:
-                    print(f"  Warning: Test case generation timeout (10 minutes) for tool '{tool_name}', skipping this tool")
-                    continue
-                except Exception as e:
-                    print(f"  Error generating test cases for tool '{tool_name}': {str(e)}, skipping this tool")
-                    continue
-                    
-                tool_generate_time = time.time() - tool_generate_start_time
-                if self.agent_logger:
-                    self.agent_logger.log(event_type="llm_test_case_generated", 
-                                          tool_name=tool_name,
-                                          case_generate_time=tool_generate_time,
-                                          test_cases_count=len(cases))
-
-                
-                # Initialize current tool's test result list
-                results["test_results"][tool_name] = []
-                
-                current_tool_had_timeout = False
-                consecutive_timeouts_count = 0  # Add consecutive timeout counter
-                max_consecutive_timeouts = self.max_consecutive_timeouts  # Use configured timeout count
-                
-                tool_all_cases_start_time = time.time()
-                # Immediately execute all test cases for this tool
-                for case in cases:
+            try:
+                for tool_name in tool_order:
                     # Check if overall test has timed out
                     if time.time() - test_phase_start > test_phase_timeout:
                         print(f"Warning: Overall test phase has timed out ({test_phase_timeout} seconds), aborting remaining tests")
                         results["abnormal_termination"] = f"Test phase timeout after {test_phase_timeout} seconds"
                         break
+                    
+                    tool = next((t for t in results["tools"] if t["name"] == tool_name), None)
+                    if not tool:
+                        continue
+                    
+                    if tool_name in context_tool_names:
+                        # Context tools are generated and executed one by one: each sees the results before it
+                        cases = await self.generate_tool_test_cases(tool, context_test_results())
+                    else:
+                        if not generation_tasks:
+                            # The context is final now: generate the cases of all remaining tools concurrently
+                            limited_test_results = context_test_results()
+                            generation_semaphore = asyncio.Semaphore(self.generation_concurrency)
+                            for remaining_name in tool_order:
+                                remaining_tool = next((t for t in results["tools"] if t["name"] == remaining_name), None)
+                                if remaining_name not in context_tool_names and remaining_tool:
+                                    generation_tasks[remaining_name] = asyncio.create_task(
+                                        self.generate_tool_test_cases(remaining_tool, limited_test_results, generation_semaphore)
+                                    )
+                        # Execution stays in tool order and starts as soon as this tool's cases arrive
+                        cases = await generation_tasks[tool_name]
+                    if cases is None:
+                        continue
+
+                    # Initialize current tool's test result list
+                    results["test_results"][tool_name] = []
+                
+                    current_tool_had_timeout = False
+                    consecutive_timeouts_count = 0  # Add consecutive timeout counter
+                    max_consecutive_timeouts = self.max_consecutive_timeouts  # Use configured timeout count
+                
+                    tool_all_cases_start_time = time.time()
+                    # Immediately execute all test cases for this tool
+                    for case in cases:
+                        # Check if overall test has timed out
+                        if time.time() - test_phase_start > test_phase_timeout:
+                            print(f"Warning: Overall test phase has timed out ({test_phase_timeout} seconds), aborting remaining tests")
+                            results["abnormal_termination"] = f"Test phase timeout after {test_phase_timeout} seconds"
+                            break
                         
-                    case_execute_start_time = time.time()
-                    case_name = case["name"]
-                    case_args = case["args"]
-                    is_functional_test = case.get("is_functional_test", False)
+                        case_execute_start_time = time.time()
+                        case_name = case["name"]
+                        case_args = case["args"]
+                        is_functional_test = case.get("is_functional_test", False)
                     
-                    print(f"  Executing test: {case_name}")
+                        print(f"  Executing test: {case_name}")
                     
-                    response, exec_time = None, 0.0
-                    is_timeout = False
+                        response, exec_time = None, 0.0
+                        is_timeout = False
                     
-                    try:
-                        # Execute single test case, timeout here should be slightly longer than internal timeout as a safeguard
-                        response, exec_time = await asyncio.wait_for(
-                            self.test_tool_async(tool_name, case_args),
-                            timeout=self.tool_timeout + 10.0
-                        )
-                    except ToolTimeoutError as e:
-                        # Catch our custom timeout exception
-                        print(f"    Warning: Test case '{case_name}' execution timed out.")
-                        is_timeout = True
-                        response = {"error": str(e)}
-                        exec_time = self.tool_timeout # Use preset timeout time as execution time
-                    except asyncio.TimeoutError:
-                        # Catch hard timeout (if test_tool_async itself hangs)
-                        print(f"    Warning: Test case '{case_name}' execution hard timeout ({self.tool_timeout + 10} seconds)")
-                        is_timeout = True
-                        response = {"error": f"Test case execution hard-timed out after {self.tool_timeout + 10.0} seconds"}
-                        exec_time = self.tool_timeout + 10.0
-                    except Exception as e:
-                        print(f"    Test case '{case_name}' execution error: {str(e)}")
-                        response = {"error": str(e)}
-                        exec_time = time.time() - case_execute_start_time
+                        try:
+                            # Execute single test case, timeout here should be slightly longer than internal timeout as a safeguard
+                            response, exec_time = await asyncio.wait_for(
+                                self.test_tool_async(tool_name, case_args),
+                                timeout=self.tool_timeout + 10.0
+                            )
+                        except ToolTimeoutError as e:
+                            # Catch our custom timeout exception
+                            print(f"    Warning: Test case '{case_name}' execution timed out.")
+                            is_timeout = True
+                            response = {"error": str(e)}
+                            exec_time = self.tool_timeout # Use preset timeout time as execution time
+                        except asyncio.TimeoutError:
+                            # Catch hard timeout (if test_tool_async itself hangs)
+                            print(f"    Warning: Test case '{case_name}' execution hard timeout ({self.tool_timeout + 10} seconds)")
+                            is_timeout = True
+                            response = {"error": f"Test case execution hard-timed out after {self.tool_timeout + 10.0} seconds"}
+                            exec_time = self.tool_timeout + 10.0
+                        except Exception as e:
+                            print(f"    Test case '{case_name}' execution error: {str(e)}")
+                            response = {"error": str(e)}
+                            exec_time = time.time() - case_execute_start_time
 
 
-                    if self.agent_logger:
-                        self.agent_logger.log(event_type="llm_test_case_executed", 
-                                              tool_name=tool_name,
-                                              case_name=case_name,
-                                              case_args=case_args,
-                                              response=response,
-                                              execution_time=exec_time)
+                        if self.agent_logger:
+                            self.agent_logger.log(event_type="llm_test_case_executed", 
+                                                  tool_name=tool_name,
+                                                  case_name=case_name,
+                                                  case_args=case_args,
+                                                  response=response,
+                                                  execution_time=exec_time)
                     
-                    # Check if timeout occurred, handle all timeout situations uniformly
-                    if is_timeout:
-                        current_tool_had_timeout = True
-                        consecutive_timeouts_count += 1
-                        print(f"    Warning: Test case '{case_name}' execution timeout ({consecutive_timeouts_count}/{max_consecutive_timeouts})")
+                        # Check if timeout occurred, handle all timeout situations uniformly
+                        if is_timeout:
+                            current_tool_had_timeout = True
+                            consecutive_timeouts_count += 1
+                            print(f"    Warning: Test case '{case_name}' execution timeout ({consecutive_timeouts_count}/{max_consecutive_timeouts})")
                         
-                        # If consecutive timeout count reaches threshold, skip remaining test cases for this tool
-                        if consecutive_timeouts_count >= max_consecutive_timeouts:
-                            print(f"    Warning: {max_consecutive_timeouts} consecutive test cases timed out, skipping remaining test cases for tool '{tool_name}'")
-                            break
-                    else:
-                        # Any success resets the counter
-                        consecutive_timeouts_count = 0
+                            # If consecutive timeout count reaches threshold, skip remaining test cases for this tool
+                            if consecutive_timeouts_count >= max_consecutive_timeouts:
+                                print(f"    Warning: {max_consecutive_timeouts} consecutive test cases timed out, skipping remaining test cases for tool '{tool_name}'")
+                                break
+                        else:
+                            # Any success resets the counter
+                            consecutive_timeouts_count = 0
                     
-                    total_count += 1
-                    total_response_time += exec_time
+                        total_count += 1
+                        total_response_time += exec_time
                     
-                    # Add test result to current tool's result list
-                    results["test_results"][tool_name].append({
-                        "case_name": case_name,
-                        "purpose": case.get("purpose", ""),
-                        "args": case_args,
-                        "response": response,
-                        "execution_time": exec_time,
-                        "is_functional_test": is_functional_test
-                    })
+                        # Add test result to current tool's result list
+                        results["test_results"][tool_name].append({
+                            "case_name": case_name,
+                            "purpose": case.get("purpose", ""),
+                            "args": case_args,
+                            "response": response,
+                            "execution_time": exec_time,
+                            "is_functional_test": is_functional_test
+                        })
                     
-                    print(f"    Execution time: {exec_time:.2f}s")
+                        print(f"    Execution time: {exec_time:.2f}s")
                 
-                # Record tool total execution time
-                tool_execute_time = time.time() - tool_all_cases_start_time
-                if self.agent_logger:
-                    self.agent_logger.log(
-                        event_type="tool_execution_summary",
-                        tool_name=tool_name,
-                        tool_all_case_execute_time=tool_execute_time,
-                        test_cases_count=len(cases),
-                        timeout_cases_count=consecutive_timeouts_count if current_tool_had_timeout else 0
-                    )
-
-                # Check for consecutive timeouts
-                if last_tool_timed_out and current_tool_had_timeout:
-                    print(f"Warning: Tool '{tool_name}' timed out, and the previous tool also timed out. Aborting test.")
-                    results["abnormal_termination"] = "Consecutive tool timeouts indicate a server issue."
-                    break  # Break tool loop
+                    # Record tool total execution time
+                    tool_execute_time = time.time() - tool_all_cases_start_time
+                    if self.agent_logger:
+                        self.agent_logger.log(
+                            event_type="tool_execution_summary",
+                            tool_name=tool_name,
+                            tool_all_case_execute_time=tool_execute_time,
+                            test_cases_count=len(cases),
+                            timeout_cases_count=consecutive_timeouts_count if current_tool_had_timeout else 0
+                        )
+
+                    # Check for consecutive timeouts
+                    if last_tool_timed_out and current_tool_had_timeout:
+                        print(f"Warning: Tool '{tool_name}' timed out, and the previous tool also timed out. Aborting test.")
+                        results["abnormal_termination"] = "Consecutive tool timeouts indicate a server issue."
+                        break  # Break tool loop
                 
-                last_tool_timed_out = current_tool_had_timeout
+                    last_tool_timed_out = current_tool_had_timeout
+            finally:
+                # Aborted runs must not leave generation calls running
+                for task in generation_tasks.values():
+                    task.cancel()
 
             # Update total test case count
             results["total_cases"] = total_count
             
+            # Measure performance under load before the report is scored
+            results["load_test"] = await self.run_load_test_async(results)
+            
             # Save results
             self.benchmark_results[report_name] = results
             
@@ -896,11 +1015,41 @@ def parse_args():
         help="Maximum consecutive timeout count, default 3"
     )
     
+    parser.add_argument(
+        "--generation-concurrency",
+        type=int,
+        default=int(os.getenv("TEST_GENERATION_CONCURRENCY", 4)),
+        help="Concurrent test case generation calls after the first two tools, default 4"
+    )
+    
+    parser.add_argument(
+        "--load-test-concurrency",
+        type=int,
+        default=LOAD_TEST_CONCURRENCY,
+        help="Concurrent workers of the load test of read-only tools, default 4"
+    )
+    
+    parser.add_argument(
+        "--load-test-duration",
+        type=float,
+        default=LOAD_TEST_DURATION,
+        help="Load test duration (seconds), default 10 seconds"
+    )
+    
+    parser.add_argument(
+        "--no-load-test",
+        action="store_true",
+        help="Skip the load test; performance is then judged from the test case execution times"
+    )
+    
+    add_test_case_cache_arguments(parser)
+    
     return parser.parse_args()
 
 def main():
     """Main function"""
     args = parse_args()
+    apply_test_case_cache_arguments(args)
     
     # Check if server file exists
     server_file = args.server_file
@@ -913,7 +1062,11 @@ def main():
         output_dir=args.output_dir, 
         test_files_dir=args.test_files_dir,
         tool_timeout=args.tool_timeout,
-        max_consecutive_timeouts=args.max_consecutive_timeouts
+        max_consecutive_timeouts=args.max_consecutive_timeouts,
+        generation_concurrency=args.generation_concurrency,
+        load_test=LOAD_TEST and not args.no_load_test,
+        load_test_concurrency=args.load_test_concurrency,
+        load_test_duration=args.load_test_duration
     )
     
     if server_file:
@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from framwork.tool_hints import READ_ONLY_TOOL_VERBS
+
+# ========== Load Test ==========
+# After the functional tests, the read-only tools of the server are driven by concurrent workers
+# for a fixed time over the tester's MCP session. Every call replays the arguments of a
+# functional test case of that tool that succeeded, so the load only consists of requests the
+# server is known to answer. Throughput, p50/p95/p99 latency and error rate are added to the
+# results as "load_test", given to the report LLM as the basis of the performance score and
+# stored in the results store. Tools that may change state (write/delete/send/...) are never
+# put under load.
+# - LOAD_TEST: 'false' skips the load test (default: true)
+# - LOAD_TEST_CONCURRENCY: concurrent workers (default: 4)
+# - LOAD_TEST_DURATION: seconds of load per server (default: 10)
+# - LOAD_TEST_MAX_REQUESTS: requests per server at most, protecting rate-limited APIs (default: 200)
+LOAD_TEST = os.getenv("LOAD_TEST", "true").lower() == "true"
+LOAD_TEST_CONCURRENCY = int(os.getenv("LOAD_TEST_CONCURRENCY", 4))
+LOAD_TEST_DURATION = float(os.getenv("LOAD_TEST_DURATION", 10))
+LOAD_TEST_MAX_REQUESTS = int(os.getenv("LOAD_TEST_MAX_REQUESTS", 200))
+
+# Without a readOnlyHint, a tool is read-only if the first word of its name is one of the shared
+# READ_ONLY_TOOL_VERBS and, as load repeats every call, no word of its name is a write verb
+WRITE_VERBS = {
+    "write", "delete", "remove", "create", "update", "send", "post", "put", "set", "move", "rename",
+    "upload", "download", "save", "insert", "drop", "execute", "exec", "run", "kill", "install",
+    "click", "type", "press", "copy", "append", "modify", "edit", "publish", "submit", "book", "pay",
+    "order", "close", "open", "launch", "start", "stop", "add", "clear", "reset", "cancel", "import",
+    "export", "generate", "convert", "merge", "split", "compress", "reply",
+}
+
+STATUS_COMPLETED = "completed"
+STATUS_SKIPPED = "skipped"
+
+
+def _name_words(tool_name: str) -> List[str]:
+    """snake_case, kebab-case and camelCase names as lower-case words."""
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", tool_name)
+    return [word for word in re.split(r"[^A-Za-z0-9]+", spaced.lower()) if word]
+
+
+def is_read_only_tool(tool: Any) -> bool:
+    """
+    Whether a tool can be called repeatedly without side effects. The server's readOnlyHint
+    annotation decides when declared: MCPToolAdapter.read_only_hint, else the annotations that
+    langchain_mcp_adapters puts in the tool metadata. Otherwise the tool name does.
+    """
+    if isinstance(tool, dict):
+        hint, metadata, name = None, tool.get("metadata"), tool.get("name", "")
+    else:
+        hint, metadata, name = getattr(tool, "read_only_hint", None), getattr(tool, "metadata", None), getattr(tool, "name", "")
+    if hint is None and isinstance(metadata, dict):
+        hint = metadata.get("readOnlyHint")
+    if isinstance(hint, bool):
+        return hint
+    words = _name_words(name)
+    return bool(words) and words[0] in READ_ONLY_TOOL_VERBS and not any(word in WRITE_VERBS for word in words)
+
+
+def _is_error_response(response: Any) -> bool:
+    return isinstance(response, dict) and "error" in response
+
+
+def select_load_samples(tools: List[Any], test_results: Dict[str, List[Dict]]) -> List[Tuple[str, Dict]]:
+    """(tool name, args) of the successful functional test cases of the read-only tools, without duplicates."""
+    samples, seen = [], set()
+    for tool in tools:
+        name = tool.get("name") if isinstance(tool, dict) else getattr(tool, "name", None)
+        if not name or not is_read_only_tool(tool):
+            continue
+        for case in test_results.get(name, []):
+            if not case.get("is_functional_test") or _is_error_response(case.get("response")):
+                continue
+            key = (name, repr(case.get("args")))
+            if key not in seen:
+                seen.add(key)
+                samples.append((name, case.get("args") or {}))
+    return samples
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of already sorted values."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))  # ceil(n * q / 100)
+    return round(sorted_values[int(rank) - 1], 4)
+
+
+def summarize_latencies(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles (of successful calls, in seconds) and error rate of a set of calls."""
+    latencies = sorted(latencies)
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else None,
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+async def run_load_test(invoke: Callable[[str, Dict], Awaitable[Any]], samples: List[Tuple[str, Dict]],
+                        concurrency: int = LOAD_TEST_CONCURRENCY, duration: float = LOAD_TEST_DURATION,
+                        call_timeout: float = 40.0, max_requests: int = LOAD_TEST_MAX_REQUESTS) -> Dict[str, Any]:
+    """
+    Drives the samples round-robin with `concurrency` workers until `duration` seconds have passed
+    or `max_requests` calls were started. A call fails if it raises, times out or returns an error dict.
+
+    Args:
+        invoke: Coroutine function calling a tool, e.g. MCPToolManager.invoke_tool
+        samples: (tool name, args) pairs to replay
+        concurrency: Number of concurrent workers
+        duration: Seconds of load
+        call_timeout: Timeout of one call in seconds
+        max_requests: Maximum number of calls
+
+    Returns:
+        Summary of all calls (see summarize_latencies) with a "per_tool" breakdown
+    """
+    if not samples:
+        raise ValueError("Load test needs at least one (tool, args) sample")
+    next_sample = itertools.cycle(samples).__next__
+    calls: List[Tuple[str, Optional[float]]] = []  # (tool name, latency or None for a failed call)
+    started = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker():
+        nonlocal started
+        while time.perf_counter() < deadline and started < max_requests:
+            started += 1
+            tool_name, args = next_sample()
+            call_start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(invoke(tool_name, dict(args)), timeout=call_timeout)
+                failed = _is_error_response(response)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failed = True
+            calls.append((tool_name, None if failed else time.perf_counter() - call_start))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+
+    def summarize(tool_calls: List[Tuple[str, Optional[float]]]) -> Dict[str, Any]:
+        latencies = [latency for _, latency in tool_calls if latency is not None]
+        return summarize_latencies(latencies, len(tool_calls) - len(latencies), elapsed)
+
+    summary = summarize(calls)
+    summary.update({
+        "status": STATUS_COMPLETED,
+        "concurrency": max(1, concurrency),
+        "duration": round(elapsed, 3),
+        "per_tool": {name: summarize([call for call in calls if call[0] == name])
+                     for name in sorted({name for name, _ in samples})},
+    })
+    return summary
+
+
+def skipped_load_test(reason: str) -> Dict[str, Any]:
+    return {"status": STATUS_SKIPPED, "reason": reason}
@@ -9,15 +9,14 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import numpy as np
 import matplotlib.pyplot as plt
-import concurrent.futures
 
 # Ensure other modules can be imported
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import testing modules
 from testSystem.log_analyzer import LogAnalyzer
-from testSystem.intelligent_benchmark import MCPIntelligentTester
-from testSystem.reporting import SCORE_WEIGHTS, SCORE_DIMENSIONS
+from testSystem.scheduler import run_benchmark_tasks
+from testSystem.test_case_cache import add_test_case_cache_arguments, apply_test_case_cache_arguments
 from testSystem.utils.utils import load_server_mapping, PIPELINE_MODELS
 from testSystem.utils.report_generator import (
     generate_pipeline_comparison_report,
@@ -42,6 +41,13 @@ def parse_args():
         default=1,
         help="Number of concurrent tests (default is 1, i.e., serial)"
     )
+
+    parser.add_argument(
+        "--task-timeout",
+        type=float,
+        default=None,
+        help="Deadline of a single server test in seconds; the test's process tree is killed when it expires (default: BENCHMARK_TASK_TIMEOUT or 1800)"
+    )
     
     parser.add_argument(
         "--log-dir",
@@ -85,6 +91,8 @@ def parse_args():
         help="Report output directory"
     )
     
+    add_test_case_cache_arguments(parser)
+    
     return parser.parse_args()
 
 def run_log_analysis(log_dir, output_dir, log_files=None):
@@ -151,7 +159,7 @@ def run_log_analysis(log_dir, output_dir, log_files=None):
     
     return report
 
-def run_batch_tests(servers_dir: str, output_dir_name: str, output_dir: str, log_dir: str, concurrency: int) -> Dict:
+def run_batch_tests(servers_dir: str, output_dir_name: str, output_dir: str, log_dir: str, concurrency: int, task_timeout: Optional[float] = None) -> Dict:
     """Concurrently test MCP servers in specified directory
     
     Args:
@@ -160,6 +168,7 @@ def run_batch_tests(servers_dir: str, output_dir_name: str, output_dir: str, log
         output_dir: Report output directory
         log_dir: Agent log directory path
         concurrency: Number of concurrent tests
+        task_timeout: Deadline of a single server test in seconds (default: BENCHMARK_TASK_TIMEOUT)
         
     Returns:
         Test results dictionary
@@ -199,25 +208,8 @@ def run_batch_tests(servers_dir: str, output_dir_name: str, output_dir: str, log
     
     print(f"Found {len(server_files)} server files to test: {[Path(sf).parent.name for sf in server_files]}")
     
-    final_benchmark_results = {}
-
-    # Use ThreadPoolExecutor for true parallel testing
-    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
-        # Submit all test tasks
-        future_to_server = {executor.submit(run_single_test_worker, sf, Path(sf).parent.name, output_dir, output_dir_name): sf for sf in server_files}
-        
-        for future in concurrent.futures.as_completed(future_to_server):
-            server_file = future_to_server[future]
-            project_name = Path(server_file).parent.name
-            try:
-                # Get result of single test
-                result = future.result()
-                if result:
-                    final_benchmark_results.update(result)
-            except Exception as exc:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test generated critical error: {project_name} - {exc}")
-                import traceback
-                traceback.print_exc()
+    tasks = [{"path": sf, "name": Path(sf).parent.name, "model": None} for sf in server_files]
+    final_benchmark_results = run_benchmark_tasks(tasks, output_dir, output_dir_name, concurrency, task_timeout)
 
     # After all tests complete, uniformly perform log analysis
     all_benchmark_reports = analyze_all_logs(final_benchmark_results, log_dir, output_dir, output_dir_name)
@@ -228,116 +220,6 @@ def run_batch_tests(servers_dir: str, output_dir_name: str, output_dir: str, log
 
     return final_benchmark_results
 
-def run_single_test_worker(server_file: str, project_name: str, output_dir: str, output_dir_name: str, model_name: Optional[str] = None) -> Dict:
-    """
-    Single test task worker unit, executed in independent thread.
-    """
-    import threading
-    import signal
-    import time
-    from functools import partial
-
-    report_base_dir = os.path.join(output_dir, output_dir_name)
-    if model_name:
-        report_base_dir = os.path.join(report_base_dir, model_name)
-    os.makedirs(report_base_dir, exist_ok=True) # Ensure directory exists
-
-    # Set timeout (30 minutes)
-    task_timeout = 30 * 60  # seconds
-    results = {}
-    task_completed = threading.Event()
-    task_terminated = threading.Event()
-    
-    # Define test task
-    def test_task():
-        nonlocal results
-        try:
-            tester = MCPIntelligentTester(
-                output_dir=report_base_dir, 
-                project_name_override=project_name,
-                # Set stricter tool timeout and consecutive timeout count
-                tool_timeout=50.0,  # 50 second tool timeout
-                max_consecutive_timeouts=2  # Skip after 2 consecutive timeouts
-            )
-            
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] >> Starting test: {project_name}")
-            
-            # Execute test
-            task_results = tester.execute_test_suite(server_file)
-            
-            if task_results and "total_score" in task_results:
-                score = task_results.get("total_score", "N/A")
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Test completed: {project_name} | Score: {score}")
-            else:
-                error_msg = task_results.get("error", "Unknown error") if task_results else "No result returned"
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Test completed but no valid score: {project_name} - {error_msg}")
-            
-            # Save results
-            results = tester.benchmark_results
-            
-        except Exception as e:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test error: {project_name} - {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # Mark task completion
-            if not task_terminated.is_set():
-                task_completed.set()
-    
-    # Define timeout handler function
-    def timeout_handler():
-        if not task_completed.is_set():
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Test task timeout ({task_timeout} seconds): {project_name}")
-            task_terminated.set()
-            
-            # Create basic timeout result
-            timeout_result_name = f"{project_name}"
-            results = {
-                timeout_result_name: {
-                    "server_name": os.path.basename(server_file).replace('.py', ''),
-                    "parent_dir": os.path.basename(os.path.dirname(os.path.abspath(server_file))),
-                    "report_name": timeout_result_name,
-                    "server_path": server_file,
-                    "timestamp": datetime.now().isoformat(),
-                    "error": "Test task timeout (30 minutes)",
-                    "abnormal_termination": "Task timeout after 30 minutes",
-                    "tools": [],
-                    "test_results": {},
-                    "total_cases": 0,
-                    "total_score": 0,
-                    "scores": {dim: 0 for dim in SCORE_DIMENSIONS}
-                }
-            }
-            
-            # Create simple timeout report file
-            try:
-                timeout_report_path = os.path.join(report_base_dir, f"test_report_{timeout_result_name}.json")
-                with open(timeout_report_path, 'w', encoding='utf-8') as f:
-                    json.dump(results, f, ensure_ascii=False, indent=2)
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Timeout report created: {timeout_report_path}")
-            except Exception as e:
-                print(f"Failed to create timeout report: {e}")
-
-    # Start test thread
-    test_thread = threading.Thread(target=test_task)
-    test_thread.daemon = True
-    test_thread.start()
-    
-    # Start timeout monitoring thread
-    timer_thread = threading.Thread(target=lambda: (time.sleep(task_timeout), timeout_handler()))
-    timer_thread.daemon = True
-    timer_thread.start()
-    
-    # Wait for test completion or timeout
-    while not (task_completed.is_set() or task_terminated.is_set()):
-        time.sleep(1)  # Check status every second
-        
-    # If terminated due to timeout, wait for timeout handling to complete
-    if task_terminated.is_set():
-        time.sleep(2)
-
-    return results
-
 def analyze_all_logs(benchmark_results: Dict, log_dir: str, output_dir: str, output_dir_name: str, report_to_model_map: Optional[Dict[str, str]] = None) -> List[Dict]:
     """
     Analyze all log files generated by test runs.
@@ -408,7 +290,7 @@ def analyze_all_logs(benchmark_results: Dict, log_dir: str, output_dir: str, out
                 all_benchmark_reports.append(benchmark_report)
     return all_benchmark_reports
 
-def run_pipeline_tests(pipeline_mapping_file: str, output_dir: str, log_dir: str, concurrency: int) -> Dict:
+def run_pipeline_tests(pipeline_mapping_file: str, output_dir: str, log_dir: str, concurrency: int, task_timeout: Optional[float] = None) -> Dict:
     """Concurrently test servers generated by AI models defined in pipeline_mapping.json"""
     print(f"\n====== Starting Pipeline Mode Testing (Concurrency: {concurrency}) ======")
     output_dir_name = "pipeline_server_tests"
@@ -443,7 +325,8 @@ def run_pipeline_tests(pipeline_mapping_file: str, output_dir: str, log_dir: str
                     project_name_raw = generated_server['project_name']
                     # Build unique project name, format: <model_name>-<project_name>
                     project_name = f"{model_name}-{project_name_raw}"
-                    task = {"path": server_path, "name": project_name, "model": model_name}
+                    task = {"path": server_path, "name": project_name, "model": model_name,
+                            "public_server_name": server_info.get("public_server_name")}
                     
                     # Classify by priority based on project name
                     if "word_document_automation" in project_name_raw:
@@ -468,26 +351,8 @@ def run_pipeline_tests(pipeline_mapping_file: str, output_dir: str, log_dir: str
         print(f"  - {task['name']}")
 
     # 3. Execute concurrent testing
-    final_benchmark_results = {}
-    report_to_model_map = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
-        future_to_task = {
-            executor.submit(run_single_test_worker, task['path'], task['name'], output_dir, output_dir_name, task.get('model')): task
-            for task in tasks_to_run
-        }
-
-        for future in concurrent.futures.as_completed(future_to_task):
-            task = future_to_task[future]
-            project_name = task['name']
-            report_to_model_map[project_name] = task.get('model')
-            try:
-                result = future.result()
-                if result:
-                    final_benchmark_results.update(result)
-            except Exception as exc:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test generated critical error: {project_name} - {exc}")
-                import traceback
-                traceback.print_exc()
+    final_benchmark_results = run_benchmark_tasks(tasks_to_run, output_dir, output_dir_name, concurrency, task_timeout)
+    report_to_model_map = {task['name']: task.get('model') for task in tasks_to_run}
 
     # 4. Analyze logs and generate reports
     all_benchmark_reports = analyze_all_logs(final_benchmark_results, log_dir, output_dir, output_dir_name, report_to_model_map)
@@ -538,7 +403,7 @@ def run_pipeline_tests(pipeline_mapping_file: str, output_dir: str, log_dir: str
 
     return final_benchmark_results
 
-def run_metagpt_tests(metagpt_servers_dir: str, output_dir: str, log_dir: str, concurrency: int):
+def run_metagpt_tests(metagpt_servers_dir: str, output_dir: str, log_dir: str, concurrency: int, task_timeout: Optional[float] = None):
     """Concurrently test servers in metaGPT-servers directory"""
     print(f"\n====== Starting MetaGPT Mode Testing (Concurrency: {concurrency}) ======")
     
@@ -583,26 +448,8 @@ def run_metagpt_tests(metagpt_servers_dir: str, output_dir: str, log_dir: str, c
         print(f"  - {task['name']}")
 
     # 2. Execute concurrent testing
-    final_benchmark_results = {}
-    report_to_model_map = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
-        future_to_task = {
-            executor.submit(run_single_test_worker, task['path'], task['name'], output_dir, output_dir_name, task.get('model')): task
-            for task in tasks_to_run
-        }
-
-        for future in concurrent.futures.as_completed(future_to_task):
-            task = future_to_task[future]
-            project_name = task['name']
-            report_to_model_map[project_name] = task.get('model')
-            try:
-                result = future.result()
-                if result:
-                    final_benchmark_results.update(result)
-            except Exception as exc:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test generated critical error: {project_name} - {exc}")
-                import traceback
-                traceback.print_exc()
+    final_benchmark_results = run_benchmark_tasks(tasks_to_run, output_dir, output_dir_name, concurrency, task_timeout)
+    report_to_model_map = {task['name']: task.get('model') for task in tasks_to_run}
 
     # 3. Analyze logs and generate reports
     all_benchmark_reports = analyze_all_logs(final_benchmark_results, log_dir, output_dir, output_dir_name, report_to_model_map)
@@ -612,99 +459,10 @@ def run_metagpt_tests(metagpt_servers_dir: str, output_dir: str, log_dir: str, c
 
     return final_benchmark_results
 
-async def main():
-    """Main function"""
-    args = parse_args()
-    
-    # Create dedicated report directory for this run
-    run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    run_output_dir = os.path.join(args.output_dir, f"run_{run_timestamp}")
-    os.makedirs(run_output_dir, exist_ok=True)
-    print(f"Reports for this run will be saved to: {os.path.abspath(run_output_dir)}")
-    
-    if args.mode == "log":
-        run_log_analysis(args.log_dir, run_output_dir)
-        
-    elif args.mode == "public":
-        run_batch_tests(
-            servers_dir=args.public_servers_dir,
-            output_dir_name="public_server_tests",
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-
-    elif args.mode == "refinement":
-        run_batch_tests(
-            servers_dir=args.refinement_servers_dir,
-            output_dir_name="refinement_server_tests",
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-
-    elif args.mode == "compare":
-        # 1. Test public servers
-        public_results = run_batch_tests(
-            servers_dir=args.public_servers_dir,
-            output_dir_name="public_server_tests",
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-        
-        # 2. Test optimized servers
-        refinement_results = run_batch_tests(
-            servers_dir=args.refinement_servers_dir,
-            output_dir_name="refinement_server_tests",
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-
-        # 3. Load mapping and generate comparison report
-        if public_results and refinement_results:
-            mapping = load_server_mapping(args.mapping_file)
-            if mapping:
-                generate_comparison_report(public_results, refinement_results, mapping, run_output_dir)
-            else:
-                print("Failed to load server mapping relationships, cannot generate comparison report.")
-        else:
-            print("Failed to successfully complete testing of both server groups, cannot perform comparison.")
-
-    elif args.mode == "analyze-benchmark":
-        all_logs = glob.glob(os.path.join(args.log_dir, "BenchmarkTester-Agent-*.jsonl"))
-        if not all_logs:
-            print(f"No Benchmark log files found in {args.log_dir}")
-            return
-
-        latest_files = sorted(all_logs, key=os.path.getctime, reverse=True)
-        # Assume maximum 100 concurrent per run
-        latest_run_logs = latest_files[:100]
-        
-        print(f"Will analyze the latest {len(latest_run_logs)} Benchmark log files...")
-        
-        run_log_analysis(args.log_dir, run_output_dir, log_files=[os.path.basename(f) for f in latest_run_logs])
-
-    elif args.mode == "pipeline":
-        run_pipeline_tests(
-            pipeline_mapping_file=args.pipeline_mapping_file,
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-    
-    elif args.mode == "metagpt":
-        run_metagpt_tests(
-            metagpt_servers_dir=args.metagpt_servers_dir,
-            output_dir=run_output_dir,
-            log_dir=args.log_dir,
-            concurrency=args.concurrency
-        )
-
 def main_sync():
     """Synchronous execution Main function entry"""
     args = parse_args()
+    apply_test_case_cache_arguments(args)
     
     # Create dedicated report directory for this run
     run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -721,7 +479,8 @@ def main_sync():
             output_dir_name="public_server_tests",
             output_dir=run_output_dir, 
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
         
     elif args.mode == "refinement":
@@ -730,7 +489,8 @@ def main_sync():
             output_dir_name="refinement_server_tests",
             output_dir=run_output_dir,
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
         
     elif args.mode == "compare":
@@ -740,7 +500,8 @@ def main_sync():
             output_dir_name="public_server_tests",
             output_dir=run_output_dir,
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
         
         # 2. Test optimized servers
@@ -749,7 +510,8 @@ def main_sync():
             output_dir_name="refinement_server_tests",
             output_dir=run_output_dir,
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
 
         # 3. Load mapping and generate comparison report
@@ -781,7 +543,8 @@ def main_sync():
             pipeline_mapping_file=args.pipeline_mapping_file,
             output_dir=run_output_dir,
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
 
     elif args.mode == "metagpt":
@@ -789,7 +552,8 @@ def main_sync():
             metagpt_servers_dir=args.metagpt_servers_dir,
             output_dir=run_output_dir,
             log_dir=args.log_dir,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout
         )
 
 if __name__ == "__main__":
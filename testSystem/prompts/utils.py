@@ -1,27 +1,65 @@
+import threading
 from pathlib import Path
+from typing import Dict, Tuple
+
+# This file is in testSystem/prompts/utils.py
+# PROMPTS_DIR is testSystem/prompts
+PROMPTS_DIR = Path(__file__).resolve().parent
+
+# Same convention as the framework prompts: a `{# dynamic #}` line separates the static
+# instructions (first, so repeated calls share a cacheable prefix) from the per-call data.
+# The marker line is removed before the template is returned for str.format.
+DYNAMIC_MARKER = "{# dynamic #}"
+
+_prompts: Dict[str, Tuple[str, str]] = {}
+_prompts_loaded = False
+_prompts_lock = threading.Lock()
+
+
+def _load_all_prompts():
+    """Reads every *.prompt file once, split into (static, dynamic) parts."""
+    global _prompts_loaded
+    with _prompts_lock:
+        if _prompts_loaded:
+            return
+        for path in sorted(PROMPTS_DIR.rglob("*.prompt")):
+            content = path.read_text(encoding="utf-8")
+            static, marker, dynamic = content.partition(DYNAMIC_MARKER)
+            if not marker:
+                static, dynamic = "", content
+            _prompts[path.relative_to(PROMPTS_DIR).as_posix()] = (static, dynamic.removeprefix("\n"))
+        _prompts_loaded = True
+
+
+def load_prompt_parts(prompt_path: str) -> Tuple[str, str]:
+    """The static prefix and dynamic suffix of a prompt template (the prefix is empty without a marker)."""
+    _load_all_prompts()
+    name = Path(prompt_path).as_posix()
+    if name not in _prompts:
+        full_path = PROMPTS_DIR / prompt_path
+        # In a real app, you'd use a logger. For now, raising is clear.
+        print(f"Error: Prompt file not found at: {full_path}")
+        raise FileNotFoundError(f"Prompt file not found at: {full_path}")
+    return _prompts[name]
+
 
 def load_prompt(prompt_path: str) -> str:
     """
     Loads a prompt from the specified path within the testSystem prompts directory.
-    
+    All prompt files are read once, on the first call, and served from memory afterwards.
+
     Args:
         prompt_path: The relative path to the prompt file from the 'testSystem/prompts' directory.
                      e.g., 'reporting/detailed_report.prompt'
-        
+
     Returns:
-        The content of the prompt file as a string.
+        The content of the prompt file as a string (without the dynamic marker line).
     """
-    # This file is in testSystem/prompts/utils.py
-    # PROMPTS_DIR is testSystem/prompts
-    PROMPTS_DIR = Path(__file__).resolve().parent
-    full_path = PROMPTS_DIR / prompt_path
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return "".join(load_prompt_parts(prompt_path))
     except FileNotFoundError:
-        # In a real app, you'd use a logger. For now, raising is clear.
-        print(f"Error: Prompt file not found at: {full_path}")
         raise
     except Exception as e:
+        full_path = PROMPTS_DIR / prompt_path
         print(f"Error reading prompt file at: {full_path}: {e}")
-        raise IOError(f"Error reading prompt file at: {full_path}: {e}") 
\ No newline at end of file
+        raise IOError(f"Error reading prompt file at: {full_path}: {e}")
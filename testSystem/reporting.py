@@ -60,8 +60,12 @@ class Reporter:
             test_files = self.get_test_files()
             
             prompt_template = load_prompt("reporting/detailed_report.prompt")
+            # The load test is given separately as the basis of the performance score
+            load_test = results.get("load_test") or {"status": "skipped", "reason": "not run"}
             prompt = prompt_template.format(
-                results_json=json.dumps(results, ensure_ascii=False, indent=2),
+                results_json=json.dumps({k: v for k, v in results.items() if k != "load_test"},
+                                        ensure_ascii=False, indent=2),
+                load_test_json=json.dumps(load_test, ensure_ascii=False, indent=2),
                 functional_weight=SCORE_WEIGHTS['功能性'],
                 robustness_weight=SCORE_WEIGHTS['健壮性'],
                 security_weight=SCORE_WEIGHTS['安全性'],
@@ -0,0 +1,352 @@
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# ========== Results Store ==========
+# Every server test is appended to one SQLite database as soon as its result comes in: the run
+# it belongs to (with its settings), the five dimension scores, the total, the LLM tokens and
+# cost of the test suite, every executed test case and the load test measurements. The analysis scripts in scripts/ query
+# this store instead of crawling data/raw_run_data. The database is local (ignored by git): in a
+# fresh checkout, runs from before the store existed are added with scripts/import_results.py.
+# Rows are only ever inserted: a re-test is a new run.
+# - RESULTS_STORE: 'false' stops recording benchmark results (default: true)
+# - RESULTS_DB_PATH: database file (default: data/results.sqlite)
+RESULTS_STORE = os.getenv("RESULTS_STORE", "true").lower() == "true"
+DEFAULT_RESULTS_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "results.sqlite"
+
+# 2: load_tests
+SCHEMA_VERSION = 2
+SOURCE_LIVE = "live"
+SOURCE_BACKFILL = "backfill"
+
+# Score columns by dimension (the keys of reporting.SCORE_WEIGHTS). Not imported from reporting so
+# that the analysis scripts can read the store without the LLM dependencies.
+DIMENSION_COLUMNS = {
+    "功能性": "functionality",
+    "健壮性": "robustness",
+    "安全性": "security",
+    "性能": "performance",
+    "透明性": "transparency",
+}
+
+# Test subject of suites that do not test the servers of one model
+SUITE_SUBJECTS = {
+    "public_server_tests": "Public Baseline",
+    "refinement_server_tests": "refinement",
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS schema_info (
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    source TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{{}}',
+    recorded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS server_results (
+    result_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    suite TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    report_name TEXT,
+    project_name TEXT,
+    public_server_name TEXT,
+    {", ".join(f"{column} REAL" for column in DIMENSION_COLUMNS.values())},
+    total_score REAL,
+    total_cases INTEGER,
+    duration REAL,
+    llm_tokens INTEGER,
+    llm_cost REAL,
+    error TEXT,
+    abnormal_termination TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_server_results_run ON server_results(run_id, suite);
+CREATE INDEX IF NOT EXISTS idx_server_results_subject ON server_results(subject, public_server_name);
+CREATE TABLE IF NOT EXISTS test_cases (
+    result_id INTEGER NOT NULL REFERENCES server_results(result_id),
+    tool_name TEXT NOT NULL,
+    case_name TEXT,
+    purpose TEXT,
+    args TEXT,
+    response TEXT,
+    execution_time REAL,
+    is_functional_test INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_test_cases_result ON test_cases(result_id);
+CREATE TABLE IF NOT EXISTS generation_costs (
+    cost_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    project_name TEXT NOT NULL,
+    total_tokens INTEGER,
+    cost_usd REAL,
+    source_file TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generation_costs_subject ON generation_costs(subject, project_name);
+CREATE TABLE IF NOT EXISTS load_tests (
+    result_id INTEGER NOT NULL REFERENCES server_results(result_id),
+    tool_name TEXT,
+    concurrency INTEGER,
+    duration REAL,
+    requests INTEGER,
+    errors INTEGER,
+    error_rate REAL,
+    throughput REAL,
+    p50 REAL,
+    p95 REAL,
+    p99 REAL
+);
+CREATE INDEX IF NOT EXISTS idx_load_tests_result ON load_tests(result_id);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, timeout=5)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def project_name_for(report_name: str, subject: str) -> str:
+    """Report names of model suites are '<model>-<project>': the project part."""
+    prefix = f"{subject}-"
+    return report_name[len(prefix):] if report_name.startswith(prefix) else report_name
+
+
+class ResultsStore:
+    """
+    Append-only SQLite store of benchmark results.
+    Usage:
+        store = ResultsStore(Path("data/results.sqlite"))
+        store.record_run("run_20250716_101039", metadata={"mode": "pipeline"})
+        store.record_server_result("run_20250716_101039", "pipeline_server_tests", result, subject="deepseek-v3")
+    """
+
+    def __init__(self, db_path: Path, read_only: bool = False):
+        """
+        A read-only store (for the analysis scripts) never creates, migrates or otherwise
+        changes the database; it must exist already.
+        """
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            if not self.db_path.is_file():
+                raise FileNotFoundError(f"Results store {self.db_path} does not exist. "
+                                        f"Build it with scripts/import_results.py.")
+            self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                         timeout=30, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            row = self._conn.execute("SELECT version FROM schema_info").fetchone()
+            if row is not None and row[0] > SCHEMA_VERSION:
+                raise RuntimeError(f"Results store {self.db_path} has schema version {row[0]}, "
+                                   f"this code only knows version {SCHEMA_VERSION}.")
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            row = self._conn.execute("SELECT version FROM schema_info").fetchone()
+            if row is None:
+                self._conn.execute("INSERT INTO schema_info (version) VALUES (?)", (SCHEMA_VERSION,))
+            elif row[0] > SCHEMA_VERSION:
+                raise RuntimeError(f"Results store {self.db_path} has schema version {row[0]}, "
+                                   f"this code only knows version {SCHEMA_VERSION}.")
+            elif row[0] < SCHEMA_VERSION:
+                # Later versions only add tables, which the schema script has just created
+                self._conn.execute("UPDATE schema_info SET version = ?", (SCHEMA_VERSION,))
+            self._conn.commit()
+
+    def has_run(self, run_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def record_run(self, run_id: str, started_at: Optional[str] = None, source: str = SOURCE_LIVE,
+                   metadata: Optional[Dict[str, Any]] = None):
+        """Registers a run. A run that is already registered keeps its first metadata."""
+        metadata = dict(metadata or {})
+        if source == SOURCE_LIVE:
+            metadata.setdefault("git_commit", _git_commit())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at, source, metadata, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, started_at or _now(), source, json.dumps(metadata, ensure_ascii=False, default=str), _now())
+            )
+            self._conn.commit()
+
+    def record_scores(self, run_id: str, suite: str, subject: str, scores: Dict[str, float],
+                      total_score: Optional[float] = None, report_name: Optional[str] = None,
+                      project_name: Optional[str] = None, public_server_name: Optional[str] = None,
+                      total_cases: Optional[int] = None, suite_summary: Optional[Dict] = None,
+                      error: Optional[str] = None, abnormal_termination: Optional[str] = None,
+                      test_results: Optional[Dict[str, List[Dict]]] = None,
+                      load_test: Optional[Dict] = None) -> int:
+        """
+        Appends the result of one server test and returns its result_id.
+        scores is keyed by the Chinese dimension names (as in the tester results); missing dimensions are stored as NULL.
+        A completed load_test (testSystem/load_test.py) is stored as one row for all tools (tool_name NULL) and one per tool.
+        """
+        suite_summary = suite_summary or {}
+        row = {
+            "run_id": run_id,
+            "suite": suite,
+            "subject": subject,
+            "report_name": report_name,
+            "project_name": project_name,
+            "public_server_name": public_server_name,
+            **{column: scores.get(dim) for dim, column in DIMENSION_COLUMNS.items()},
+            "total_score": total_score,
+            "total_cases": total_cases,
+            "duration": suite_summary.get("total_duration"),
+            "llm_tokens": suite_summary.get("total_llm_tokens"),
+            "llm_cost": suite_summary.get("total_cost"),
+            "error": error,
+            "abnormal_termination": abnormal_termination,
+            "recorded_at": _now(),
+        }
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO server_results ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                list(row.values())
+            )
+            result_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO test_cases (result_id, tool_name, case_name, purpose, args, response, execution_time, "
+                "is_functional_test) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (result_id, tool_name, case.get("case_name"), case.get("purpose"),
+                     json.dumps(case.get("args"), ensure_ascii=False, default=str),
+                     case["response"] if isinstance(case.get("response"), str) else
+                     json.dumps(case.get("response"), ensure_ascii=False, default=str),
+                     case.get("execution_time"), int(bool(case.get("is_functional_test"))))
+                    for tool_name, cases in (test_results or {}).items() for case in cases
+                ]
+            )
+            if load_test and load_test.get("status") == "completed":
+                measurements = [(None, load_test)] + list((load_test.get("per_tool") or {}).items())
+                self._conn.executemany(
+                    "INSERT INTO load_tests (result_id, tool_name, concurrency, duration, requests, errors, error_rate, "
+                    "throughput, p50, p95, p99) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (result_id, tool_name, load_test.get("concurrency"), load_test.get("duration"),
+                         summary.get("requests"), summary.get("errors"), summary.get("error_rate"),
+                         summary.get("throughput"), summary.get("p50"), summary.get("p95"), summary.get("p99"))
+                        for tool_name, summary in measurements
+                    ]
+                )
+            self._conn.commit()
+        return result_id
+
+    def record_server_result(self, run_id: str, suite: str, result: Dict, subject: Optional[str] = None,
+                             public_server_name: Optional[str] = None) -> int:
+        """Appends a tester result (an entry of MCPIntelligentTester.benchmark_results)."""
+        report_name = result.get("report_name") or result.get("server_name") or ""
+        subject = subject or SUITE_SUBJECTS.get(suite, suite)
+        if public_server_name is None and suite == "public_server_tests":
+            # Public servers are tested under their own directory name
+            public_server_name = report_name
+        return self.record_scores(
+            run_id, suite, subject,
+            scores=result.get("scores") or {},
+            total_score=result.get("total_score"),
+            report_name=report_name,
+            project_name=project_name_for(report_name, subject),
+            public_server_name=public_server_name,
+            total_cases=result.get("total_cases"),
+            suite_summary=result.get("suite_summary"),
+            error=result.get("error"),
+            abnormal_termination=result.get("abnormal_termination"),
+            test_results=result.get("test_results"),
+            load_test=result.get("load_test"),
+        )
+
+    def has_generation_cost(self, source_file: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM generation_costs WHERE source_file = ?",
+                                      (source_file,)).fetchone() is not None
+
+    def record_generation_cost(self, subject: str, project_name: str, total_tokens: int, cost_usd: float,
+                               source_file: Optional[str] = None):
+        """Appends the token and cost totals of generating one server."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO generation_costs (subject, project_name, total_tokens, cost_usd, source_file, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (subject, project_name, total_tokens, cost_usd, source_file, _now())
+            )
+            self._conn.commit()
+
+    def query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        """Rows of a read query as dicts."""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, tuple(params)).fetchall()]
+
+    def server_results(self, suites: Optional[List[str]] = None) -> List[Dict]:
+        """All server results (optionally of some suites) with the start time of their run, oldest run first."""
+        sql = "SELECT r.started_at, s.* FROM server_results s JOIN runs r ON r.run_id = s.run_id"
+        params: List[str] = []
+        if suites:
+            sql += f" WHERE s.suite IN ({', '.join('?' for _ in suites)})"
+            params = list(suites)
+        return self.query(sql + " ORDER BY s.run_id, s.result_id", params)
+
+    def load_tests(self, suites: Optional[List[str]] = None) -> List[Dict]:
+        """Server-level load test measurements next to the scores of their server results, oldest run first."""
+        if not self.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'load_tests'"):
+            # A version 1 store opened read-only has no measurements
+            return []
+        sql = ("SELECT s.run_id, s.suite, s.subject, s.report_name, s.project_name, s.public_server_name, "
+               "s.performance, s.total_score, l.concurrency, l.duration, l.requests, l.errors, l.error_rate, "
+               "l.throughput, l.p50, l.p95, l.p99 "
+               "FROM load_tests l JOIN server_results s ON s.result_id = l.result_id WHERE l.tool_name IS NULL")
+        params: List[str] = []
+        if suites:
+            sql += f" AND s.suite IN ({', '.join('?' for _ in suites)})"
+            params = list(suites)
+        return self.query(sql + " ORDER BY s.run_id, s.result_id", params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_results_store(db_path: Optional[Path] = None, read_only: bool = False) -> ResultsStore:
+    """The store at db_path, RESULTS_DB_PATH or data/results.sqlite (read_only: see ResultsStore)."""
+    return ResultsStore(Path(db_path or os.getenv("RESULTS_DB_PATH") or DEFAULT_RESULTS_DB_PATH), read_only=read_only)
+
+
+_results_store: Optional[ResultsStore] = None
+_results_store_initialized = False
+_results_store_lock = threading.Lock()
+
+
+def get_results_store() -> Optional[ResultsStore]:
+    """Process-wide store for recording benchmark results, or None if RESULTS_STORE=false or it cannot be opened."""
+    global _results_store, _results_store_initialized
+    with _results_store_lock:
+        if not _results_store_initialized:
+            _results_store_initialized = True
+            if RESULTS_STORE:
+                try:
+                    _results_store = open_results_store()
+                    print(f"Recording benchmark results in {_results_store.db_path}")
+                except Exception as e:
+                    print(f"Warning: Results store unavailable, results are only written as reports: {e}")
+        return _results_store
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Ensure other modules can be imported
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from testSystem.load_test import LOAD_TEST, LOAD_TEST_CONCURRENCY, LOAD_TEST_DURATION, LOAD_TEST_MAX_REQUESTS
+from testSystem.reporting import SCORE_DIMENSIONS
+from testSystem.results_store import get_results_store
+
+# ========== Benchmark Scheduler ==========
+# Every server test runs in its own worker process (its own session / process group), started
+# and awaited by a single asyncio event loop. A test that exceeds its deadline is cancelled by
+# killing the worker together with everything it started (MCP server, zygote, grandchildren),
+# so no server process outlives its test. Progress is reported through events: printed, passed
+# to an optional callback and appended to <report dir>/benchmark_events.jsonl. Each result is
+# also appended to the results store (testSystem/results_store.py) as soon as it arrives, under
+# the run named after the output directory (run_<timestamp>).
+# - BENCHMARK_TASK_TIMEOUT: deadline of one server test in seconds (default: 1800)
+BENCHMARK_TASK_TIMEOUT = float(os.getenv("BENCHMARK_TASK_TIMEOUT", 30 * 60))
+# Tool timeout and consecutive timeout limit of the worker's tester
+WORKER_TOOL_TIMEOUT = 50.0
+WORKER_MAX_CONSECUTIVE_TIMEOUTS = 2
+WORKER_MODEL_NAME = "qwen-plus"
+
+
+def _now() -> str:
+    return datetime.now().strftime('%H:%M:%S')
+
+
+def _descendant_pids(pid: int) -> List[int]:
+    """All descendants of pid, children first. Uses psutil when available, /proc otherwise."""
+    try:
+        import psutil
+        return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+    except ImportError:
+        pass
+    except Exception:
+        return []
+
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return []
+    children: Dict[int, List[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # The command name may contain spaces and parentheses: the ppid follows the last ')'
+            stat = (entry / "stat").read_text()
+            ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    descendants, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return descendants
+
+
+def kill_process_tree(pid: int):
+    """
+    Kills a worker and every process it started. Descendants are collected before anything is
+    killed, so servers that were reparented or run in their own session are not missed.
+    """
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+        return
+
+    own_group = os.getpgrp()
+    targets = [pid] + _descendant_pids(pid)
+    for target in targets:
+        try:
+            group = os.getpgid(target)
+            if group != own_group:
+                os.killpg(group, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            os.kill(target, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def timeout_result(task: Dict, task_timeout: float) -> Dict:
+    """The result recorded for a test that was killed at its deadline."""
+    server_file = task["path"]
+    limit = f"{task_timeout / 60:g} minutes" if task_timeout >= 60 else f"{task_timeout:g} seconds"
+    return {
+        task["name"]: {
+            "server_name": os.path.basename(server_file).replace('.py', ''),
+            "parent_dir": os.path.basename(os.path.dirname(os.path.abspath(server_file))),
+            "report_name": task["name"],
+            "server_path": server_file,
+            "timestamp": datetime.now().isoformat(),
+            "error": f"Test task timeout ({limit})",
+            "abnormal_termination": f"Task timeout after {limit}",
+            "tools": [],
+            "test_results": {},
+            "total_cases": 0,
+            "total_score": 0,
+            "scores": {dim: 0 for dim in SCORE_DIMENSIONS}
+        }
+    }
+
+
+def print_progress_event(event: Dict):
+    """Default console output of scheduler events."""
+    progress = f"[{event['done']}/{event['total']}]"
+    name = event.get("name")
+    if event["event"] == "started":
+        print(f"[{_now()}] >> Starting test: {name}")
+    elif event["event"] == "completed":
+        if event.get("total_score") is not None:
+            print(f"[{_now()}] ✅ Test completed: {name} | Score: {event['total_score']} | {event['duration']:.0f}s {progress}")
+        else:
+            print(f"[{_now()}] ⚠️ Test completed but no valid score: {name} - {event.get('error') or 'No result returned'} {progress}")
+    elif event["event"] == "timeout":
+        print(f"[{_now()}] ⚠️ Test task timeout ({event['timeout']:.0f} seconds), worker process tree killed: {name} {progress}")
+    elif event["event"] == "failed":
+        print(f"[{_now()}] ❌ Test error: {name} - {event.get('error')} {progress}")
+    elif event["event"] == "finished":
+        print(f"[{_now()}] Benchmark finished: {event['completed']} completed, {event['timeouts']} timed out, "
+              f"{event['failed']} failed in {event['duration']:.0f}s")
+
+
+class BenchmarkScheduler:
+    """Runs server tests as worker processes with at most `concurrency` in flight and a hard deadline each."""
+
+    def __init__(self, output_dir: str, output_dir_name: str, concurrency: int = 1,
+                 task_timeout: Optional[float] = None, on_event: Optional[Callable[[Dict], None]] = None):
+        self.report_dir = os.path.join(output_dir, output_dir_name)
+        self.suite = output_dir_name
+        self.run_id = os.path.basename(os.path.normpath(output_dir))
+        self.concurrency = max(1, concurrency)
+        self.task_timeout = task_timeout or BENCHMARK_TASK_TIMEOUT
+        self.on_event = on_event
+        self.events_path = os.path.join(self.report_dir, "benchmark_events.jsonl")
+        self.results_store = get_results_store()
+        self.total = 0
+        self.done = 0
+
+    def _emit(self, event_type: str, **data):
+        event = {"event": event_type, "timestamp": datetime.now().isoformat(), "done": self.done, "total": self.total, **data}
+        print_progress_event(event)
+        try:
+            with open(self.events_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Failed to record scheduler event: {e}")
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"Scheduler event callback failed: {e}")
+
+    def _record_results(self, task: Dict, results: Dict):
+        """Appends a task's results to the results store; a store failure never fails the test."""
+        if self.results_store is None:
+            return
+        for report_name, result in results.items():
+            try:
+                self.results_store.record_server_result(self.run_id, self.suite, result, subject=task.get("model"),
+                                                        public_server_name=task.get("public_server_name"))
+            except Exception as e:
+                print(f"Failed to record {report_name} in the results store: {e}")
+
+    def _report_dir_for(self, task: Dict) -> str:
+        report_dir = self.report_dir
+        if task.get("model"):
+            report_dir = os.path.join(report_dir, task["model"])
+        os.makedirs(report_dir, exist_ok=True)
+        return report_dir
+
+    async def _spawn_worker(self, task: Dict, report_dir: str, result_file: str) -> asyncio.subprocess.Process:
+        command = [
+            sys.executable, "-m", "testSystem.scheduler",
+            "--server-file", task["path"],
+            "--project-name", task["name"],
+            "--report-dir", report_dir,
+            "--result-file", result_file,
+        ]
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(p for p in [str(PROJECT_ROOT), env.get("PYTHONPATH", "")] if p)
+        if sys.platform == "win32":
+            return await asyncio.create_subprocess_exec(*command, env=env, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        return await asyncio.create_subprocess_exec(*command, env=env, start_new_session=True)
+
+    async def run_task(self, semaphore: asyncio.Semaphore, task: Dict) -> Dict:
+        async with semaphore:
+            report_dir = self._report_dir_for(task)
+            fd, result_file = tempfile.mkstemp(prefix="benchmark_result_", suffix=".json", dir=report_dir)
+            os.close(fd)
+            start = time.time()
+            process = None
+            try:
+                process = await self._spawn_worker(task, report_dir, result_file)
+                self._emit("started", name=task["name"], model=task.get("model"), pid=process.pid)
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=self.task_timeout)
+                except asyncio.TimeoutError:
+                    kill_process_tree(process.pid)
+                    await process.wait()
+                    results = timeout_result(task, self.task_timeout)
+                    self._save_timeout_report(report_dir, task["name"], results)
+                    self._record_results(task, results)
+                    self.done += 1
+                    self._emit("timeout", name=task["name"], model=task.get("model"), timeout=self.task_timeout)
+                    return results
+
+                results = self._read_results(result_file)
+                self._record_results(task, results)
+                self.done += 1
+                if process.returncode != 0 and not results:
+                    self._emit("failed", name=task["name"], model=task.get("model"),
+                               error=f"worker exited with code {process.returncode}", duration=time.time() - start)
+                    return {}
+                summary = next(iter(results.values()), {}) if results else {}
+                self._emit("completed", name=task["name"], model=task.get("model"), duration=time.time() - start,
+                           total_score=summary.get("total_score"), error=summary.get("error"))
+                return results
+            except asyncio.CancelledError:
+                # The whole run is being cancelled (e.g. Ctrl+C): do not leave the test running
+                if process is not None and process.returncode is None:
+                    kill_process_tree(process.pid)
+                raise
+            except Exception as e:
+                self.done += 1
+                self._emit("failed", name=task["name"], model=task.get("model"), error=str(e), duration=time.time() - start)
+                return {}
+            finally:
+                try:
+                    os.remove(result_file)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read_results(result_file: str) -> Dict:
+        try:
+            with open(result_file, "r", encoding="utf-8") as f:
+                content = f.read()
+            return json.loads(content) if content else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _save_timeout_report(report_dir: str, name: str, results: Dict):
+        try:
+            timeout_report_path = os.path.join(report_dir, f"test_report_{name}.json")
+            with open(timeout_report_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"[{_now()}] Timeout report created: {timeout_report_path}")
+        except Exception as e:
+            print(f"Failed to create timeout report: {e}")
+
+    async def run(self, tasks: List[Dict]) -> Dict:
+        """Runs all tasks and returns their merged benchmark results, keyed by report name."""
+        os.makedirs(self.report_dir, exist_ok=True)
+        self.total, self.done = len(tasks), 0
+        start = time.time()
+        if self.results_store is not None:
+            try:
+                self.results_store.record_run(self.run_id, metadata={
+                    "output_dir": os.path.dirname(self.report_dir),
+                    "concurrency": self.concurrency,
+                    "task_timeout": self.task_timeout,
+                    "tester_model": WORKER_MODEL_NAME,
+                    "test_case_cache_mode": os.getenv("TEST_CASE_CACHE_MODE", "reuse"),
+                    "load_test": {"enabled": LOAD_TEST, "concurrency": LOAD_TEST_CONCURRENCY,
+                                  "duration": LOAD_TEST_DURATION, "max_requests": LOAD_TEST_MAX_REQUESTS},
+                })
+            except Exception as e:
+                print(f"Failed to record run {self.run_id} in the results store: {e}")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(*(self.run_task(semaphore, task) for task in tasks))
+
+        final_results = {}
+        for outcome in outcomes:
+            final_results.update(outcome)
+        timeouts = sum(1 for r in final_results.values() if str(r.get("abnormal_termination", "")).startswith("Task timeout"))
+        self._emit("finished", completed=len(final_results) - timeouts, timeouts=timeouts,
+                   failed=len(tasks) - len(final_results), duration=time.time() - start)
+        return final_results
+
+
+def run_benchmark_tasks(tasks: List[Dict], output_dir: str, output_dir_name: str, concurrency: int = 1,
+                        task_timeout: Optional[float] = None, on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Tests every task ({"path", "name", "model"[, "public_server_name"]}) and returns the merged benchmark results.
+    Reports go to <output_dir>/<output_dir_name>[/<model>].
+    """
+    scheduler = BenchmarkScheduler(output_dir, output_dir_name, concurrency, task_timeout, on_event)
+    return asyncio.run(scheduler.run(tasks))
+
+
+def _worker_main():
+    """Worker process entry: tests one server and writes the tester's benchmark results to --result-file."""
+    parser = argparse.ArgumentParser(description="Benchmark worker: tests a single MCP server")
+    parser.add_argument("--server-file", required=True)
+    parser.add_argument("--project-name", required=True)
+    parser.add_argument("--report-dir", required=True)
+    parser.add_argument("--result-file", required=True)
+    parser.add_argument("--model-name", default=WORKER_MODEL_NAME)
+    args = parser.parse_args()
+
+    from testSystem.intelligent_benchmark import MCPIntelligentTester
+
+    tester = MCPIntelligentTester(
+        output_dir=args.report_dir,
+        project_name_override=args.project_name,
+        tool_timeout=WORKER_TOOL_TIMEOUT,
+        max_consecutive_timeouts=WORKER_MAX_CONSECUTIVE_TIMEOUTS
+    )
+    try:
+        asyncio.run(tester.execute_test_suite_async(args.server_file, args.model_name))
+    finally:
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(tester.benchmark_results, f, ensure_ascii=False, default=str)
+
+
+if __name__ == "__main__":
+    _worker_main()
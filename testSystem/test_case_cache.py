@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from testSystem.prompts.utils import load_prompt
+
+try:
+    from framwork.mcp_swe_flow.utils.disk_cache import DiskLRUStore
+except ImportError:
+    DiskLRUStore = None
+
+# ========== Test Case Cache ==========
+# Generated test cases are stored per tool, keyed by a canonical hash of the tool's name,
+# description and args_schema, the version of the generation prompt and the test-files listing.
+# Servers whose tools look the same (the same task implemented by different models, or the same
+# server in a later run) get the same cases, which skips the LLM call and keeps cross-model
+# comparisons free of generation variance. Results of earlier tools in the run are deliberately
+# not part of the key.
+# - TEST_CASE_CACHE_MODE:
+#     reuse:      serve cached cases, generate and store on a miss (default)
+#     regenerate: always generate, replacing cached cases (--regenerate-test-cases)
+#     frozen:     serve cached cases, generate on a miss without storing (--freeze-test-cases)
+#     off:        no cache
+# - TEST_CASE_CACHE_PATH / TEST_CASE_CACHE_MAX_MB: cache file and its size budget
+CACHE_MODE_REUSE = "reuse"
+CACHE_MODE_REGENERATE = "regenerate"
+CACHE_MODE_FROZEN = "frozen"
+CACHE_MODE_OFF = "off"
+CACHE_MODES = (CACHE_MODE_REUSE, CACHE_MODE_REGENERATE, CACHE_MODE_FROZEN, CACHE_MODE_OFF)
+
+# Bump when the stored format or the meaning of a key changes
+CACHE_FORMAT_VERSION = 1
+GENERATION_PROMPT = "benchmark/generate_test_cases.prompt"
+DEFAULT_TEST_CASE_CACHE_PATH = Path(__file__).resolve().parent.parent / "logs" / "test_case_cache" / "test_case_cache.sqlite"
+
+
+def _canonical_schema(schema: Any) -> Any:
+    """args_schema as plain JSON: MCP adapters give a dict, other tools may give a pydantic model class."""
+    if hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema()
+    if hasattr(schema, "schema") and callable(schema.schema):
+        return schema.schema()
+    return schema
+
+
+def prompt_version() -> str:
+    """Content hash of the generation prompt: editing the prompt invalidates its cached cases."""
+    return hashlib.sha256(load_prompt(GENERATION_PROMPT).encode("utf-8")).hexdigest()[:16]
+
+
+def make_test_case_key(tool: Dict, test_files: List[str]) -> str:
+    payload = json.dumps({
+        "format": CACHE_FORMAT_VERSION,
+        "prompt": prompt_version(),
+        "name": tool["name"],
+        "description": " ".join(str(tool.get("description") or "").split()),
+        "args_schema": _canonical_schema(tool.get("args_schema") or {}),
+        "test_files": sorted(str(f) for f in (test_files or [])),
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TestCaseCache:
+    """Test cases (JSON lists) on top of a DiskLRUStore, shared by all benchmark workers."""
+
+    def __init__(self, store, mode: str = CACHE_MODE_REUSE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported test case cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        self.store = store
+        self.mode = mode
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        if self.mode == CACHE_MODE_REGENERATE:
+            return None
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+        try:
+            cases = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        return cases if isinstance(cases, list) and cases else None
+
+    def set(self, key: str, cases: List[Dict]):
+        # Empty results are failures, never cached
+        if self.mode == CACHE_MODE_FROZEN or not cases:
+            return
+        try:
+            self.store.set(key, json.dumps(cases, ensure_ascii=False, default=str).encode("utf-8"))
+        except Exception as e:
+            print(f"Failed to store test cases in the cache: {e}")
+
+
+_test_case_cache: Optional[TestCaseCache] = None
+_test_case_cache_initialized = False
+_test_case_cache_lock = threading.Lock()
+
+
+def get_test_case_cache() -> Optional[TestCaseCache]:
+    """Process-wide test case cache, or None if TEST_CASE_CACHE_MODE=off or the cache is unavailable."""
+    global _test_case_cache, _test_case_cache_initialized
+    with _test_case_cache_lock:
+        if not _test_case_cache_initialized:
+            _test_case_cache_initialized = True
+            mode = os.getenv("TEST_CASE_CACHE_MODE", CACHE_MODE_REUSE).lower()
+            if mode not in CACHE_MODES:
+                print(f"Warning: Unknown TEST_CASE_CACHE_MODE '{mode}', using '{CACHE_MODE_REUSE}'")
+                mode = CACHE_MODE_REUSE
+            if mode != CACHE_MODE_OFF and DiskLRUStore is not None:
+                cache_path = Path(os.getenv("TEST_CASE_CACHE_PATH", str(DEFAULT_TEST_CASE_CACHE_PATH)))
+                try:
+                    max_mb = int(os.getenv("TEST_CASE_CACHE_MAX_MB", 64))
+                except ValueError:
+                    max_mb = 64
+                _test_case_cache = TestCaseCache(DiskLRUStore(cache_path, max_bytes=max_mb * 1024 * 1024), mode=mode)
+                print(f"Test case cache at {cache_path} (mode={mode})")
+        return _test_case_cache
+
+
+def set_test_case_cache_mode(mode: str):
+    """Selects the cache mode for this process and the benchmark workers it starts (they inherit the environment)."""
+    global _test_case_cache, _test_case_cache_initialized
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unsupported test case cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+    os.environ["TEST_CASE_CACHE_MODE"] = mode
+    with _test_case_cache_lock:
+        _test_case_cache, _test_case_cache_initialized = None, False
+
+
+def add_test_case_cache_arguments(parser):
+    """--regenerate-test-cases / --freeze-test-cases, shared by main.py and intelligent_benchmark.py."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--regenerate-test-cases",
+        action="store_true",
+        help="Generate all test cases with the LLM again and replace the cached ones"
+    )
+    group.add_argument(
+        "--freeze-test-cases",
+        action="store_true",
+        help="Use cached test cases and do not change the cache (tools without cached cases are still generated)"
+    )
+
+
+def apply_test_case_cache_arguments(args):
+    if args.regenerate_test_cases:
+        set_test_case_cache_mode(CACHE_MODE_REGENERATE)
+    elif args.freeze_test_cases:
+        set_test_case_cache_mode(CACHE_MODE_FROZEN)